@@ -1,3 +1,4 @@
+import asyncio
 import json
 from dotenv import load_dotenv
 from pydantic_ai import Agent
@@ -12,6 +13,7 @@ from app.ai_tool.output_formats import (
 from app.ai_tool.system_prompts import (
     base_system_prompt,
     summary_system_prompt,
+    summary_reduce_system_prompt,
     tutor_feedback_system_prompt,
     student_feedback_system_prompt,
     lesson_plan_system_prompt,
@@ -19,6 +21,15 @@ from app.ai_tool.system_prompts import (
     chapter_system_prompt,
 )
 
+from app.ai_tool.chunking import (
+    TranscriptWindow,
+    estimate_tokens,
+    format_timestamp,
+    map_windows,
+    split_windows,
+)
+from app.ai_tool.compaction import Compaction, compact_segments, compact_text
+from app.ai_tool.encoding import EncodedTranscript
 from app.utils.settings import Settings
 from app.models.transcript import Transcript
 
@@ -49,6 +60,20 @@ class BaseAgent:
             output_type=self.output_type,
         )
 
+    def compact(self, segments: list[dict]) -> list[dict]:
+        """``segments`` compacted for the prompt, logging the tokens saved."""
+        compaction = compact_segments(segments)
+        compaction.report(type(self).__name__)
+        return compaction.segments
+
+    def compact_str(self, text: str) -> str:
+        """``text`` compacted for the prompt, logging the tokens saved."""
+        compacted = compact_text(text)
+        Compaction(
+            tokens_before=estimate_tokens(text), tokens_after=estimate_tokens(compacted)
+        ).report(type(self).__name__)
+        return compacted
+
 
 class ChapterAgent(BaseAgent):
     system_prompt: str = chapter_system_prompt
@@ -57,8 +82,31 @@ class ChapterAgent(BaseAgent):
     output_type = LessonChaptersOutput
 
     async def break_down_lesson(self, transcript: Transcript):
-        response = await self.get_agent().run(json.dumps(transcript.transcription))
-        return response.output.chapters
+        """Chapters of the lesson, chaptering long lessons a window at a time.
+
+        The transcript is sent in the line encoding of
+        app/ai_tool/encoding.py, and the chapters' timestamps are mapped back
+        to the segments' times. The windows' chapters are consecutive, so
+        they are returned in order without another model call.
+        """
+        encoding = EncodedTranscript.from_segments(self.compact(transcript.segments))
+        windows = split_windows(
+            encoding.segments, settings.agent_window_tokens, cost=encoding.line_tokens
+        )
+        if len(windows) <= 1:
+            response = await self.get_agent().run(encoding.render())
+            return encoding.real_chapters(response.output.chapters)
+
+        async def break_down_window(index: int, window: TranscriptWindow):
+            response = await self.get_agent().run(encoding.render(window.segments))
+            return response.output.chapters
+
+        outputs = await map_windows(
+            windows, break_down_window, settings.agent_window_concurrency
+        )
+        return encoding.real_chapters(
+            [chapter for chapters in outputs for chapter in chapters]
+        )
 
 
 class SummaryAgent(BaseAgent):
@@ -68,7 +116,77 @@ class SummaryAgent(BaseAgent):
     output_type = SummaryOutput
 
     async def summarize_lesson(self, transcript: Transcript):
-        response = await self.get_agent().run(transcript.to_concatonated_transcript())
+        """Summarize the lesson, summarizing long lessons a window at a time.
+
+        Each window is summarized separately and the summaries are then
+        combined by ``SummaryReduceAgent``.
+        """
+        segments = self.compact(transcript.segments)
+        windows = split_windows(segments, settings.agent_window_tokens)
+        if len(windows) <= 1:
+            response = await self.get_agent().run(
+                '\n'.join(segment['text'] for segment in segments)
+            )
+            return response.output
+
+        async def summarize_window(index: int, window: TranscriptWindow):
+            response = await self.get_agent().run(
+                f'Part {index + 1} of {len(windows)} of the lesson, from '
+                f'{format_timestamp(window.start_time)} to '
+                f'{format_timestamp(window.end_time)}:\n\n{window.text}'
+            )
+            return response.output
+
+        summaries = await map_windows(
+            windows, summarize_window, settings.agent_window_concurrency
+        )
+        return await SummaryReduceAgent().combine_summaries(summaries)
+
+
+class SummaryReduceAgent(BaseAgent):
+    system_prompt: str = summary_reduce_system_prompt
+    name: str = 'Summary Reduce Agent'
+    description: str = 'A helpful assistant that combines summaries of lesson parts'
+    output_type = SummaryOutput
+
+    @staticmethod
+    def render(index: int, summary: SummaryOutput) -> str:
+        return (
+            f'Part {index + 1}\n\nKey points:\n{summary.key_points}\n\n'
+            f'Summary:\n{summary.long_summary}\n\n'
+            f'Recommended focus:\n{summary.recommended_focus}'
+        )
+
+    async def combine_summaries(self, summaries: list[SummaryOutput]) -> SummaryOutput:
+        """Combine consecutive summaries into one, in rounds if they don't fit.
+
+        Each round combines groups of at least two summaries that fit
+        ``agent_window_tokens`` together, so the number of summaries at
+        least halves every round.
+        """
+        while True:
+            groups, tokens = [[]], 0
+            for index, summary in enumerate(summaries):
+                rendered = self.render(index, summary)
+                size = estimate_tokens(rendered)
+                group = groups[-1]
+                if len(group) >= 2 and tokens + size > settings.agent_window_tokens:
+                    group, tokens = [], 0
+                    groups.append(group)
+                group.append(rendered)
+                tokens += size
+            if len(groups) == 1:
+                return await self._combine(groups[0])
+            semaphore = asyncio.Semaphore(settings.agent_window_concurrency)
+
+            async def combine_group(group: list[str]) -> SummaryOutput:
+                async with semaphore:
+                    return await self._combine(group)
+
+            summaries = await asyncio.gather(*map(combine_group, groups))
+
+    async def _combine(self, rendered: list[str]) -> SummaryOutput:
+        response = await self.get_agent().run('\n\n'.join(rendered))
         return response.output
 
 
@@ -80,7 +198,7 @@ class FeedbackAgent(BaseAgent):
         return json.loads(response.output)
 
     async def provide_feedback_with_str(self, transcript: str):
-        response = await self.get_agent().run(transcript)
+        response = await self.get_agent().run(self.compact_str(transcript))
         output = response.output
         return output.strengths, output.improvements
 
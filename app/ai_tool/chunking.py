@@ -0,0 +1,110 @@
+"""Splitting long transcripts into windows that fit an agent's prompt.
+
+Token counts are estimated locally rather than with the model's tokenizer,
+so splitting needs no network access and no tokenizer files. The estimate
+counts a token per punctuation mark and one per four characters of each
+word, which errs on the high side for English text.
+"""
+
+import asyncio
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Iterable, TypeVar
+
+T = TypeVar('T')
+
+_WORD_RE = re.compile(r'\w+|[^\w\s]')
+
+
+def estimate_tokens(text: str) -> int:
+    return sum(math.ceil(len(word) / 4) for word in _WORD_RE.findall(text))
+
+
+def segment_tokens(segment: dict) -> int:
+    """Estimated tokens of a segment's text, plus one for the line break."""
+    return estimate_tokens(segment['text']) + 1
+
+
+@dataclass
+class TranscriptWindow:
+    """Consecutive segments of a transcript that fit in one prompt."""
+
+    segments: list[dict] = field(default_factory=list)
+    tokens: int = 0
+
+    @property
+    def start_time(self) -> float:
+        return self.segments[0]['start_time']
+
+    @property
+    def end_time(self) -> float:
+        return max(segment['end_time'] for segment in self.segments)
+
+    @property
+    def text(self) -> str:
+        return '\n'.join(segment['text'] for segment in self.segments)
+
+
+def _speaker(segment: dict):
+    return segment['user']['id']
+
+
+def split_windows(
+    segments: Iterable[dict],
+    max_tokens: int,
+    cost: Callable[[dict], int] = segment_tokens,
+) -> list[TranscriptWindow]:
+    """Split ``segments`` into windows of at most ``max_tokens`` by ``cost``.
+
+    Segments are taken in start time order and never split, so a single
+    segment over the budget gets a window of its own. When a window fills
+    up mid-turn it is cut where that speaker's turn began, as long as that
+    keeps at least half the budget in the window, so turns stay whole.
+    """
+    windows = []
+    current = []
+    # Running token totals of ``current`` and of its segments before the
+    # latest speaker's turn, which starts at index ``turn_start``.
+    tokens = turn_tokens = 0
+    turn_start = 0
+    ordered = sorted(segments, key=lambda segment: segment['start_time'])
+    for segment in ordered:
+        size = cost(segment)
+        while current and tokens + size > max_tokens:
+            cut, cut_tokens = len(current), tokens
+            if 0 < turn_start and turn_tokens >= max_tokens / 2:
+                cut, cut_tokens = turn_start, turn_tokens
+            windows.append(TranscriptWindow(current[:cut], cut_tokens))
+            current = current[cut:]
+            tokens -= cut_tokens
+            turn_start = turn_tokens = 0
+        if current and _speaker(segment) != _speaker(current[-1]):
+            turn_start, turn_tokens = len(current), tokens
+        current.append(segment)
+        tokens += size
+    if current:
+        windows.append(TranscriptWindow(current, tokens))
+    return windows
+
+
+async def map_windows(
+    windows: list[TranscriptWindow],
+    run: Callable[[int, TranscriptWindow], Awaitable[T]],
+    concurrency: int,
+) -> list[T]:
+    """``run`` on every window, ``concurrency`` at a time, in window order."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(index: int, window: TranscriptWindow) -> T:
+        async with semaphore:
+            return await run(index, window)
+
+    return await asyncio.gather(
+        *(limited(index, window) for index, window in enumerate(windows))
+    )
+
+
+def format_timestamp(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    return f'{minutes:02d}:{seconds:02d}'
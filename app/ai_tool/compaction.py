@@ -0,0 +1,109 @@
+"""Deterministic clean-up of transcripts before they are sent to an agent.
+
+Lessonspace transcripts are many short segments, often several in a row from
+the same speaker, full of fillers and words repeated while speaking. None of
+that helps a summary or feedback, but all of it is paid for in tokens. The
+same input always compacts to the same output.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+from app.ai_tool.chunking import segment_tokens
+from app.utils.logging import logger
+from app.utils.metrics import metrics
+
+# Fillers, with a comma before or after them, e.g. "so, um, we" -> "so we".
+# "er" is left alone as it can't be told apart from "err" or "ER".
+_FILLER_RE = re.compile(
+    r'(?:,\s*)?\b(?:u+m+|u+h+|uhm|erm+|a+h+|h+m+|m+h+m+|m{2,})\b,?', re.IGNORECASE
+)
+# Quoted speech is kept word for word.
+_QUOTED_RE = re.compile(r'("[^"]*"|“[^”]*”)')
+# Words are letters only, so numbers ("1, 1, 2, 3") are never collapsed.
+_WORD = r'[^\W\d_]+'
+# Short words people stutter on. Other words said twice are usually meant,
+# as in "I had had enough", so they are only collapsed from three in a row.
+_STUTTER_WORDS = 'a|an|and|but|he|i|it|my|she|so|the|they|to|we|what|you'
+# A phrase of two or three words said more than once in a row.
+_REPEATED_PHRASE_RE = re.compile(
+    rf'\b({_WORD}(?:\s+{_WORD}){{1,2}})(?:[\s,]+\1\b)+', re.IGNORECASE
+)
+_REPEATED_WORD_RE = re.compile(
+    rf'\b(?:({_WORD})(?:[\s,]+\1\b){{2,}}|({_STUTTER_WORDS})(?:[\s,]+\2\b)+)\b',
+    re.IGNORECASE,
+)
+_SPACE_BEFORE_PUNCTUATION_RE = re.compile(r'\s+([,.?!;:])')
+
+
+def _drop_fillers(text: str) -> str:
+    # Splitting on the quotes' group puts the quoted parts at odd indexes.
+    parts = _QUOTED_RE.split(text)
+    parts[::2] = [_FILLER_RE.sub(' ', part) for part in parts[::2]]
+    return ''.join(parts)
+
+
+def compact_text(text: str) -> str:
+    text = _drop_fillers(text)
+    text = _REPEATED_PHRASE_RE.sub(r'\1', text)
+    text = _REPEATED_WORD_RE.sub(lambda match: match[1] or match[2], text)
+    text = ' '.join(text.split())
+    text = _SPACE_BEFORE_PUNCTUATION_RE.sub(r'\1', text)
+    return text.lstrip(',.;: ')
+
+
+@dataclass
+class Compaction:
+    segments: list[dict] = field(default_factory=list)
+    tokens_before: int = 0
+    tokens_after: int = 0
+
+    @property
+    def reduction(self) -> float:
+        """Share of the estimated tokens removed."""
+        if not self.tokens_before:
+            return 0.0
+        return 1 - self.tokens_after / self.tokens_before
+
+    def report(self, name: str) -> None:
+        logger.info(
+            f'[{name}] compacted transcript',
+            tokens_before=self.tokens_before,
+            tokens_after=self.tokens_after,
+            reduction=round(self.reduction, 3),
+        )
+        metrics.increment('agents.compaction.tokens_before', self.tokens_before)
+        metrics.increment('agents.compaction.tokens_after', self.tokens_after)
+
+
+def _same_turn(segment: dict, other: dict) -> bool:
+    return segment['user']['id'] == other['user']['id'] and segment.get(
+        'breakout_id'
+    ) == other.get('breakout_id')
+
+
+def compact_segments(segments: list[dict]) -> Compaction:
+    """Segments in start time order, cleaned up and merged into speaker turns.
+
+    Each segment's text goes through ``compact_text``, segments left empty
+    are dropped, a segment repeating the one before it is skipped, and runs
+    of segments by the same speaker in the same breakout room are merged into
+    one spanning their times. The given segments are not modified.
+    """
+    compaction = Compaction()
+    previous_text = None
+    for segment in sorted(segments, key=lambda segment: segment['start_time']):
+        compaction.tokens_before += segment_tokens(segment)
+        text = compact_text(segment['text'])
+        if not text:
+            continue
+        last = compaction.segments[-1] if compaction.segments else None
+        if last is not None and _same_turn(segment, last):
+            last['end_time'] = max(last['end_time'], segment['end_time'])
+            if text.lower() != previous_text:
+                last['text'] += ' ' + text
+        else:
+            compaction.segments.append({**segment, 'text': text})
+        previous_text = text.lower()
+    compaction.tokens_after = sum(map(segment_tokens, compaction.segments))
+    return compaction
@@ -0,0 +1,100 @@
+"""Compact line-per-segment encoding of transcripts for time-aware agents.
+
+As JSON, every segment repeats its key names and the speaker's id and name,
+so most of the prompt is syntax. Here each segment is one line::
+
+    Speakers:
+    S1 = Alice
+    S2 = Bob
+
+    [00:00] S1: Hello, shall we start?
+    [00:04] S2: Yes!
+
+Times are minutes and seconds from the first segment. Agents answer with
+those timestamps, which ``EncodedTranscript.real_time`` maps back to the
+segments' own times.
+"""
+
+import bisect
+from dataclasses import dataclass, field
+
+from app.ai_tool.chunking import estimate_tokens, format_timestamp
+from app.ai_tool.output_formats import ChapterOutput
+
+
+def parse_timestamp(timestamp: str) -> float | None:
+    """Seconds in an ``[hh:]mm:ss`` timestamp, or None if it isn't one."""
+    try:
+        parts = [float(part) for part in timestamp.strip().strip('[]').split(':')]
+    except ValueError:
+        return None
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + part
+    return seconds
+
+
+@dataclass
+class EncodedTranscript:
+    segments: list[dict]
+    offset: float = 0.0
+    aliases: dict = field(default_factory=dict)
+    legend: str = ''
+    # Whole seconds from ``offset`` of each segment, in segment order.
+    seconds: list[int] = field(default_factory=list)
+
+    @classmethod
+    def from_segments(cls, segments: list[dict]) -> 'EncodedTranscript':
+        segments = sorted(segments, key=lambda segment: segment['start_time'])
+        offset = segments[0]['start_time'] if segments else 0.0
+        aliases, names = {}, []
+        for segment in segments:
+            user = segment['user']
+            if user['id'] not in aliases:
+                aliases[user['id']] = f'S{len(aliases) + 1}'
+                names.append(f'{aliases[user["id"]]} = {user["name"]}')
+        return cls(
+            segments=segments,
+            offset=offset,
+            aliases=aliases,
+            legend='Speakers:\n' + '\n'.join(names),
+            seconds=[int(s['start_time'] - offset) for s in segments],
+        )
+
+    def line(self, segment: dict) -> str:
+        timestamp = format_timestamp(segment['start_time'] - self.offset)
+        return f'[{timestamp}] {self.aliases[segment["user"]["id"]]}: {segment["text"]}'
+
+    def line_tokens(self, segment: dict) -> int:
+        return estimate_tokens(self.line(segment)) + 1
+
+    def render(self, segments: list[dict] | None = None) -> str:
+        """The legend followed by a line for each of ``segments``, or all of them."""
+        lines = map(self.line, self.segments if segments is None else segments)
+        return self.legend + '\n\n' + '\n'.join(lines)
+
+    def real_time(self, timestamp: str, end: bool = False) -> str:
+        """The segment time, in seconds, that an encoded ``timestamp`` refers to.
+
+        Start timestamps map to the start of the first segment at or after
+        them and end timestamps to the end of the last segment at or before
+        them. Anything that isn't a timestamp is returned unchanged.
+        """
+        seconds = parse_timestamp(timestamp)
+        if seconds is None or not self.segments:
+            return timestamp
+        if end:
+            index = max(bisect.bisect_right(self.seconds, seconds) - 1, 0)
+            return str(self.segments[index]['end_time'])
+        index = min(bisect.bisect_left(self.seconds, seconds), len(self.segments) - 1)
+        return str(self.segments[index]['start_time'])
+
+    def real_chapters(self, chapters: list[ChapterOutput]) -> list[ChapterOutput]:
+        return [
+            ChapterOutput(
+                start_time=self.real_time(chapter.start_time),
+                end_time=self.real_time(chapter.end_time, end=True),
+                description=chapter.description,
+            )
+            for chapter in chapters
+        ]
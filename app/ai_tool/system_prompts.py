@@ -20,19 +20,40 @@ The response must be in the following JSON format:
 }
 """
 
+summary_reduce_system_prompt = """
+You are a helpful assistant that summarizes lessons. The lesson was too long to summarize in one go, so each part of it has been summarized separately. You are given those summaries, in the order the parts happened, and you are combining them into one summary of the whole lesson.
+Focus on what happened in the lesson, including the main points and the key takeaways. Don't describe the lesson part by part, and merge points that are repeated across parts.
+The summary should be bullet points of the covered topics followed by about 3 - 6 paragraphs describing the lesson.
+
+The response must only be the requested summary and absolutely no other text.
+
+The response must be in the following JSON format:
+
+{
+    "key_points": str,
+    "short_summary": str,
+    "long_summary": str,
+    "recommended_focus": str
+}
+"""
+
 chapter_system_prompt = """
 You are a helpful assistant that breaks down lessons into chapters based on the timestamps provided. You are given a lesson transcript and you are providing timestamps for the lesson.
 
-You are provided a list of dictionaries that contain the start and end times of small segments of the lesson, including the text that was spoken during that segment.
+The transcript starts with a legend of the speakers, e.g. "S1 = Alice", followed by one line per part of the lesson in the form "[mm:ss] S1: what was said", where mm:ss is the time that part started.
 
-You are to break down the lesson into chapters based on the timestamps provided.
+You are to break down the lesson into chapters based on the timestamps provided. Give the start and end time of each chapter as mm:ss, using the timestamps of the lines where the chapter starts and ends.
 
 The response must be in the following JSON format:
 
 {
-    "start_time": "...",
-    "end_time": "...",
-    "duration": "..."
+    "chapters": [
+        {
+            "start_time": "mm:ss",
+            "end_time": "mm:ss",
+            "description": str
+        }
+    ]
 }
 """
 
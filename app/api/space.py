@@ -1,13 +1,25 @@
-from fastapi import APIRouter, Depends
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Body, Depends, Query
 from app.schema.lesson_planning import LessonPlanResponse, LessonSequenceResponse
-from app.schema.space import SpaceRequest, SpaceResponse, TranscriptionWebhook
-from app.schema.transcript import PostLessonResponse
+from app.schema.space import (
+    MAX_BATCH_SIZE,
+    BatchSpaceResponse,
+    PrewarmResponse,
+    SpaceRequest,
+    SpaceResponse,
+    TranscriptionJobResponse,
+    TranscriptionWebhook,
+)
+from app.schema.transcript import PostLessonResponse, TranscriptSegmentPage
 from app.services.lesson_planning import LessonPlanService, LessonSequenceService
 from app.services.lessonspace import LessonspaceService
+from app.services.prewarm import PrewarmService
 from app.services.transcription import TranscriptionService
+from app.services.transcription_job import TranscriptionJobService
 from app.schema.transcript import TranscriptResponse
-from app.db.session import get_db
-from sqlmodel import Session
+from app.db.session import get_async_db
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 router = APIRouter(prefix='/api/space', tags=['space'])
 
@@ -15,45 +27,81 @@ router = APIRouter(prefix='/api/space', tags=['space'])
 @router.post('/', response_model=SpaceResponse)
 async def create_space(
     request: SpaceRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     service: LessonspaceService = Depends(LessonspaceService),
 ) -> SpaceResponse:
     return await service.get_or_create_space(request, db)
 
 
-@router.post('/webhook/transcription/{lesson_id}')
+@router.post('/batch', response_model=BatchSpaceResponse)
+async def create_spaces(
+    requests: Annotated[list[SpaceRequest], Body(max_length=MAX_BATCH_SIZE)],
+    db: AsyncSession = Depends(get_async_db),
+    service: LessonspaceService = Depends(LessonspaceService),
+) -> BatchSpaceResponse:
+    return await service.create_spaces(requests, db)
+
+
+@router.post('/prewarm', response_model=PrewarmResponse)
+async def prewarm_spaces(
+    requests: Annotated[list[SpaceRequest], Body(max_length=MAX_BATCH_SIZE)],
+    db: AsyncSession = Depends(get_async_db),
+    service: PrewarmService = Depends(PrewarmService),
+) -> PrewarmResponse:
+    return await service.schedule(requests, db)
+
+
+@router.post(
+    '/webhook/transcription/{lesson_id}',
+    status_code=202,
+    response_model=TranscriptionJobResponse,
+)
 async def handle_transcription_webhook(
     lesson_id: str,
     webhook: TranscriptionWebhook,
-    db: Session = Depends(get_db),
-):
-    service = TranscriptionService()
-    await service.handle_webhook(webhook, lesson_id, db)
-    return {'status': 'success'}
+    db: AsyncSession = Depends(get_async_db),
+    service: TranscriptionJobService = Depends(TranscriptionJobService),
+) -> TranscriptionJobResponse:
+    return await service.enqueue(webhook, lesson_id, db)
 
 
 @router.get('/transcripts/{lesson_id}', response_model=TranscriptResponse)
 async def get_transcript(
     lesson_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     service: TranscriptionService = Depends(TranscriptionService),
 ):
     return await service.get_transcript_by_id(lesson_id, db)
 
 
+@router.get('/transcripts/{lesson_id}/segments', response_model=TranscriptSegmentPage)
+async def get_transcript_segments(
+    lesson_id: str,
+    start: Optional[float] = Query(None, ge=0),
+    end: Optional[float] = Query(None, ge=0),
+    user_id: Optional[int] = None,
+    after: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    service: TranscriptionService = Depends(TranscriptionService),
+) -> TranscriptSegmentPage:
+    return await service.get_segments(
+        lesson_id, db, start=start, end=end, user_id=user_id, after=after, limit=limit
+    )
+
+
 @router.get('/lesson-summary/{lesson_id}', response_model=PostLessonResponse)
 async def get_lesson_summary(
     lesson_id: str,
-    db: Session = Depends(get_db),
     service: TranscriptionService = Depends(TranscriptionService),
 ):
-    return await service.get_lesson_summary(lesson_id, db)
+    return await service.get_lesson_summary(lesson_id)
 
 
 @router.post('/create-lesson-plan', response_model=LessonPlanResponse)
 async def create_lesson_plan(
     lesson_info: dict,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     service: LessonPlanService = Depends(LessonPlanService),
 ):
     lesson_plan = await service.create_lesson_plan(lesson_info)
@@ -63,7 +111,7 @@ async def create_lesson_plan(
 @router.post('/create-lesson-sequence', response_model=LessonSequenceResponse)
 async def create_lesson_sequence(
     lesson_info: dict,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     service: LessonSequenceService = Depends(LessonSequenceService),
 ):
     return await service.create_lesson_sequence(lesson_info)
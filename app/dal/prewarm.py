@@ -0,0 +1,94 @@
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+from sqlmodel import Session, select
+
+from app.models.prewarm import ScheduledLaunch
+from app.schema.space import SpaceRequest
+
+
+def pending_launches_statement(lesson_ids: list[str]):
+    return (
+        select(ScheduledLaunch)
+        .where(ScheduledLaunch.lesson_id.in_(lesson_ids))
+        .where(ScheduledLaunch.status == 'pending')
+    )
+
+
+def scheduled_rows(
+    pending: list[ScheduledLaunch], launches: list[tuple[SpaceRequest, datetime]]
+) -> tuple[list[ScheduledLaunch], list[ScheduledLaunch]]:
+    """Every launch's row, updated from ``pending`` or new, and the new rows to add."""
+    by_lesson = {row.lesson_id: row for row in pending}
+    rows, new_rows = [], []
+    for request, launch_at in launches:
+        row = by_lesson.get(request.lesson_id)
+        if row is None:
+            row = ScheduledLaunch(lesson_id=request.lesson_id)
+            new_rows.append(row)
+        row.request = request.model_dump(mode='json')
+        row.launch_at = launch_at
+        rows.append(row)
+    return rows, new_rows
+
+
+def due_launches_statement(now: datetime, limit: int, stale_before: datetime):
+    """Due launches, locked for claiming.
+
+    ``SKIP LOCKED`` lets several prewarm workers poll the table without
+    claiming the same lesson. Launches left running by a worker that died
+    before ``stale_before`` are claimed again.
+    """
+    return (
+        select(ScheduledLaunch)
+        .where(
+            or_(
+                and_(
+                    ScheduledLaunch.status == 'pending',
+                    ScheduledLaunch.launch_at <= now,
+                ),
+                and_(
+                    ScheduledLaunch.status == 'running',
+                    ScheduledLaunch.claimed_at < stale_before,
+                ),
+            )
+        )
+        .order_by(ScheduledLaunch.launch_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+
+
+def mark_claimed(launches: list[ScheduledLaunch], now: datetime) -> None:
+    for launch in launches:
+        launch.status = 'running'
+        launch.attempts += 1
+        launch.claimed_at = now
+
+
+def schedule_launches(
+    db: Session, launches: list[tuple[SpaceRequest, datetime]]
+) -> list[ScheduledLaunch]:
+    """Store or reschedule pending pre-warm launches in a single transaction."""
+    statement = pending_launches_statement(
+        [request.lesson_id for request, _ in launches]
+    )
+    rows, new_rows = scheduled_rows(db.exec(statement).all(), launches)
+    db.add_all(new_rows)
+    db.commit()
+    return rows
+
+
+def claim_due_launches(
+    db: Session, now: datetime, limit: int, stale_before: datetime
+) -> list[ScheduledLaunch]:
+    """Mark due launches as running and return them, skipping rows locked elsewhere."""
+    launches = db.exec(due_launches_statement(now, limit, stale_before)).all()
+    mark_claimed(launches, now)
+    db.commit()
+    return launches
+
+
+def save_launches(db: Session, launches: list[ScheduledLaunch]) -> None:
+    db.add_all(launches)
+    db.commit()
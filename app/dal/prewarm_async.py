@@ -0,0 +1,42 @@
+"""``AsyncSession`` versions of the helpers in ``app.dal.prewarm``."""
+
+from datetime import datetime
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.dal.prewarm import (
+    due_launches_statement,
+    mark_claimed,
+    pending_launches_statement,
+    scheduled_rows,
+)
+from app.models.prewarm import ScheduledLaunch
+from app.schema.space import SpaceRequest
+
+
+async def schedule_launches(
+    db: AsyncSession, launches: list[tuple[SpaceRequest, datetime]]
+) -> list[ScheduledLaunch]:
+    """Store or reschedule pending pre-warm launches in a single transaction."""
+    statement = pending_launches_statement(
+        [request.lesson_id for request, _ in launches]
+    )
+    rows, new_rows = scheduled_rows((await db.exec(statement)).all(), launches)
+    db.add_all(new_rows)
+    await db.commit()
+    return rows
+
+
+async def claim_due_launches(
+    db: AsyncSession, now: datetime, limit: int, stale_before: datetime
+) -> list[ScheduledLaunch]:
+    """Mark due launches as running and return them, skipping rows locked elsewhere."""
+    launches = (await db.exec(due_launches_statement(now, limit, stale_before))).all()
+    mark_claimed(launches, now)
+    await db.commit()
+    return launches
+
+
+async def save_launches(db: AsyncSession, launches: list[ScheduledLaunch]) -> None:
+    db.add_all(launches)
+    await db.commit()
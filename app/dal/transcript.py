@@ -1,23 +1,250 @@
-from sqlmodel import Session, select
+from datetime import datetime, timezone
+from itertools import batched
+from typing import Iterator, Optional
+
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, SQLModel, select
 from app.ai_tool.output_formats import SummaryOutput
-from app.models.transcript import Feedback, Space, Summary, Transcript, UserSpaceModel
+from app.schema.space import UserSpace
+from app.models.transcript import (
+    Feedback,
+    Space,
+    SpeakerTranscript,
+    Summary,
+    Transcript,
+    TranscriptSegmentModel,
+    UserSpaceModel,
+)
+
+# Columns refreshed when a participant is launched again.
+USER_SPACE_UPSERT_COLUMNS = (
+    'role',
+    'leader',
+    'client_url',
+    'client_url_expires_at',
+    'not_before',
+)
+# Segments inserted per statement, keeping the bind parameters of a long
+# transcript under the driver's limit.
+SEGMENT_INSERT_BATCH = 1000
+
+
+def insert_statement(row: SQLModel):
+    """``INSERT ... RETURNING`` for ``row``, so no refresh is needed after commit."""
+    model = type(row)
+    return insert(model).values(**row.model_dump(exclude={'id'})).returning(model)
+
+
+def upsert_space_statement(lesson_id: str, lesson_space_id: str):
+    """Insert the lesson's ``Space``, returning the stored row if it already exists."""
+    statement = insert(Space).values(
+        **Space(lesson_id=lesson_id, lesson_space_id=lesson_space_id).model_dump(
+            exclude={'id'}
+        )
+    )
+    # A no-op update, rather than DO NOTHING, makes RETURNING yield the
+    # existing row on conflict.
+    return (
+        statement.on_conflict_do_update(
+            constraint='uq_space_lesson_room',
+            set_={'lesson_space_id': statement.excluded.lesson_space_id},
+        )
+        .returning(Space)
+        .execution_options(populate_existing=True)
+    )
+
+
+def upsert_user_spaces_statement(user_spaces: list[UserSpaceModel]):
+    """Insert or update many ``UserSpaceModel`` rows in one statement.
+
+    Rows are matched on ``(lesson_id, user_id)``; when the same participant is
+    given twice the last one wins, as Postgres can't update a row twice in one
+    statement.
+    """
+    rows = {
+        (row.lesson_id, str(row.user_id)): row.model_dump(exclude={'id'})
+        for row in user_spaces
+    }
+    statement = insert(UserSpaceModel).values(list(rows.values()))
+    return (
+        statement.on_conflict_do_update(
+            constraint='uq_userspace_lesson_user',
+            set_={
+                column: statement.excluded[column]
+                for column in USER_SPACE_UPSERT_COLUMNS
+            },
+        )
+        .returning(UserSpaceModel)
+        .execution_options(populate_existing=True)
+    )
+
+
+def claim_transcript_statement(transcript: Transcript, stale_before: datetime):
+    """Store a transcript and claim it for processing, in one statement.
+
+    A row is returned when the transcript is new, or when it was stored before
+    but never processed and its claim is older than ``stale_before``. Nothing
+    is returned for a transcript that is processed or being processed, and
+    the row lock taken on conflict stops two workers claiming it at once.
+    """
+    statement = insert(Transcript).values(
+        **transcript.model_dump(exclude={'id', 'claimed_at'}),
+        claimed_at=datetime.now(timezone.utc),
+    )
+    return (
+        statement.on_conflict_do_update(
+            constraint='uq_transcript_lesson_hash',
+            set_={'claimed_at': statement.excluded.claimed_at},
+            where=Transcript.processed_at.is_(None)
+            & (
+                Transcript.claimed_at.is_(None) | (Transcript.claimed_at < stale_before)
+            ),
+        )
+        .returning(Transcript)
+        .execution_options(populate_existing=True)
+    )
+
+
+def finish_transcript_statement(transcript_id: int, processed: bool):
+    """Release the claim on a transcript, marking it processed if all went well."""
+    values = {'claimed_at': None}
+    if processed:
+        values['processed_at'] = datetime.now(timezone.utc)
+    return update(Transcript).where(Transcript.id == transcript_id).values(**values)
+
+
+def save_segments_statements(transcript: Transcript) -> Iterator:
+    """Replace the lesson's stored segments with ``transcript``'s.
+
+    Statements are made as they are executed, so only one batch of rows is
+    built at a time.
+    """
+    yield delete(TranscriptSegmentModel).where(
+        TranscriptSegmentModel.lesson_id == transcript.lesson_id
+    )
+    rows = (
+        row.model_dump(exclude={'id'})
+        for row in TranscriptSegmentModel.from_transcript(transcript)
+    )
+    for batch in batched(rows, SEGMENT_INSERT_BATCH):
+        yield insert(TranscriptSegmentModel).values(list(batch))
+
+
+def save_speakers_statements(transcript: Transcript, speakers: dict[int, dict]) -> list:
+    """Replace the lesson's stored ``SpeakerTranscript`` rows with ``speakers``."""
+    statements = [
+        delete(SpeakerTranscript).where(
+            SpeakerTranscript.lesson_id == transcript.lesson_id
+        )
+    ]
+    if speakers:
+        rows = [
+            SpeakerTranscript(
+                transcript_id=transcript.id,
+                lesson_id=transcript.lesson_id,
+                user_id=user_id,
+                **speaker,
+            ).model_dump(exclude={'id'})
+            for user_id, speaker in speakers.items()
+        ]
+        statements.append(insert(SpeakerTranscript).values(rows))
+    return statements
+
+
+def segments_statement(
+    lesson_id: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    user_id: Optional[int] = None,
+    after: Optional[int] = None,
+    limit: int = 100,
+):
+    """A page of the lesson's segments in start time order.
+
+    ``start`` and ``end`` select the segments starting in that window, in
+    seconds. Pages are keyed on ``position``, so ``after`` is the position of
+    the last segment of the previous page.
+    """
+    statement = select(TranscriptSegmentModel).where(
+        TranscriptSegmentModel.lesson_id == lesson_id
+    )
+    if start is not None:
+        statement = statement.where(TranscriptSegmentModel.start_time >= start)
+    if end is not None:
+        statement = statement.where(TranscriptSegmentModel.start_time < end)
+    if user_id is not None:
+        statement = statement.where(TranscriptSegmentModel.user_id == user_id)
+    if after is not None:
+        statement = statement.where(TranscriptSegmentModel.position > after)
+    return statement.order_by(TranscriptSegmentModel.position).limit(limit)
+
+
+def transcript_statement(lesson_id: str):
+    """The lesson's transcripts, most recently stored first."""
+    return (
+        select(Transcript)
+        .where(Transcript.lesson_id == lesson_id)
+        .order_by(Transcript.id.desc())
+    )
+
+
+def transcript_by_hash_statement(lesson_id: str, content_hash: str):
+    return select(Transcript).where(
+        Transcript.lesson_id == lesson_id, Transcript.content_hash == content_hash
+    )
+
+
+def summary_statement(lesson_id: str):
+    """The lesson's summaries, most recent first."""
+    return (
+        select(Summary)
+        .where(Summary.lesson_id == lesson_id)
+        .order_by(Summary.id.desc())
+    )
+
+
+def feedback_statement(lesson_id: str):
+    """The most recent ``Feedback`` of each participant in the lesson."""
+    return (
+        select(Feedback)
+        .where(Feedback.lesson_id == lesson_id)
+        .distinct(Feedback.user_id)
+        .order_by(Feedback.user_id, Feedback.id.desc())
+    )
+
+
+def speaker_transcripts_statement(lesson_id: str):
+    return (
+        select(SpeakerTranscript)
+        .where(SpeakerTranscript.lesson_id == lesson_id)
+        .order_by(SpeakerTranscript.user_id)
+    )
+
+
+def space_statement(lesson_id: str):
+    return select(Space).where(Space.lesson_id == lesson_id)
+
+
+def user_spaces_statement(lesson_id: str):
+    return select(UserSpaceModel).where(UserSpaceModel.lesson_id == lesson_id)
 
 
 def create_transcript(
     db: Session, lesson_id: str, transcription: list[dict]
 ) -> Transcript:
-    transcript = Transcript(lesson_id=lesson_id, transcription=transcription)
-    db.add(transcript)
+    transcript = db.exec(
+        insert_statement(Transcript.from_segments(transcription, lesson_id=lesson_id))
+    ).scalar_one()
     db.commit()
-    db.refresh(transcript)
     return transcript
 
 
 def create_summary(db: Session, lesson_id: str, summary: SummaryOutput) -> Summary:
-    summary = Summary(lesson_id=lesson_id, **summary.model_dump())
-    db.add(summary)
+    summary = db.exec(
+        insert_statement(Summary(lesson_id=lesson_id, **summary.model_dump()))
+    ).scalar_one()
     db.commit()
-    db.refresh(summary)
     return summary
 
 
@@ -29,76 +256,156 @@ def create_feedback(
     strengths: str,
     improvements: str,
 ) -> Feedback:
-    feedback = Feedback(
-        lesson_id=lesson_id,
-        user_id=user_id,
-        role=role,
-        strengths=strengths,
-        improvements=improvements,
-    )
-    db.add(feedback)
+    feedback = db.exec(
+        insert_statement(
+            Feedback(
+                lesson_id=lesson_id,
+                user_id=user_id,
+                role=role,
+                strengths=strengths,
+                improvements=improvements,
+            )
+        )
+    ).scalar_one()
     db.commit()
-    db.refresh(feedback)
     return feedback
 
 
+def claim_transcript(
+    db: Session, transcript: Transcript, stale_before: datetime
+) -> Transcript | None:
+    transcript = db.exec(
+        claim_transcript_statement(transcript, stale_before)
+    ).scalar_one_or_none()
+    db.commit()
+    return transcript
+
+
+def finish_transcript(db: Session, transcript_id: int, processed: bool) -> None:
+    db.exec(finish_transcript_statement(transcript_id, processed))
+    db.commit()
+
+
+def save_segments(db: Session, transcript: Transcript) -> None:
+    for statement in save_segments_statements(transcript):
+        db.exec(statement)
+    db.commit()
+
+
+def save_speaker_transcripts(
+    db: Session, transcript: Transcript, speakers: dict[int, dict]
+) -> None:
+    for statement in save_speakers_statements(transcript, speakers):
+        db.exec(statement)
+    db.commit()
+
+
+# The app reads through app.dal.transcript_async; these readers run the same
+# statements on a sync Session, for the tests.
+
+
+def get_speaker_transcripts(lesson_id: str, db: Session) -> list[SpeakerTranscript]:
+    return db.exec(speaker_transcripts_statement(lesson_id)).all()
+
+
 def get_transcript(lesson_id: str, db: Session) -> Transcript | None:
-    statement = select(Transcript).where(Transcript.lesson_id == lesson_id)
-    return db.exec(statement).first()
+    """The lesson's most recently stored transcript."""
+    return db.exec(transcript_statement(lesson_id)).first()
 
 
 def get_summary(lesson_id: str, db: Session) -> Summary | None:
-    """Retrieve ``Summary`` for a given ``lesson_id``.
-
-    A ``Summary`` is linked to a ``Transcript`` via ``transcript_id`` so we
-    first find the transcript and then the related summary.
-    """
-    statement = select(Summary).where(Summary.lesson_id == lesson_id)
-    return db.exec(statement).first()
+    """The lesson's most recent ``Summary``."""
+    return db.exec(summary_statement(lesson_id)).first()
 
 
 def get_feedback(lesson_id: str, db: Session) -> list[Feedback]:
-    statement = select(Feedback).where(Feedback.lesson_id == lesson_id)
-    return db.exec(statement).all()
+    """The most recent ``Feedback`` of each participant in the lesson."""
+    return db.exec(feedback_statement(lesson_id)).all()
 
 
 def get_or_create_space(db: Session, lesson_id: str, lesson_space_id: str) -> Space:
-    statement = (
-        select(Space)
-        .where(Space.lesson_space_id == lesson_space_id)
-        .where(Space.lesson_id == lesson_id)
-    )
-    space = db.exec(statement).first()
-    if not space:
-        space = Space(lesson_id=lesson_id, lesson_space_id=lesson_space_id)
-        db.add(space)
-        db.commit()
-        db.refresh(space)
+    space = db.exec(upsert_space_statement(lesson_id, lesson_space_id)).scalar_one()
+    db.commit()
     return space
 
 
+def get_space(lesson_id: str, db: Session) -> Space | None:
+    return db.exec(space_statement(lesson_id)).first()
+
+
 def create_or_update_user_space(
-    db: Session, user_id: int, lesson_id: str, role: str, leader: bool
+    db: Session,
+    user_id: int,
+    lesson_id: str,
+    role: str,
+    leader: bool,
+    client_url: Optional[str] = None,
+    client_url_expires_at: Optional[datetime] = None,
+    not_before: Optional[datetime] = None,
 ) -> UserSpaceModel:
-    statement = (
-        select(UserSpaceModel)
-        .where(UserSpaceModel.user_id == user_id)
-        .where(UserSpaceModel.lesson_id == lesson_id)
+    statement = upsert_user_spaces_statement(
+        [
+            UserSpaceModel(
+                user_id=user_id,
+                lesson_id=lesson_id,
+                role=role,
+                leader=leader,
+                client_url=client_url,
+                client_url_expires_at=client_url_expires_at,
+                not_before=not_before,
+            )
+        ]
     )
-    user_space = db.exec(statement).first()
-    if user_space:
-        user_space.role = role
-        user_space.leader = leader
-    else:
-        user_space = UserSpaceModel(
-            user_id=user_id, lesson_id=lesson_id, role=role, leader=leader
-        )
-        db.add(user_space)
+    user_space = db.exec(statement).scalar_one()
     db.commit()
-    db.refresh(user_space)
     return user_space
 
 
 def get_user_spaces(lesson_id: str, db: Session) -> list[UserSpaceModel]:
-    statement = select(UserSpaceModel).where(UserSpaceModel.lesson_id == lesson_id)
-    return db.exec(statement).all()
+    return db.exec(user_spaces_statement(lesson_id)).all()
+
+
+def launched_user_spaces(
+    lesson_id: str,
+    user_spaces: list[UserSpace],
+    client_url_expires_at: Optional[datetime],
+    not_before: Optional[datetime],
+) -> list[UserSpaceModel]:
+    return [
+        UserSpaceModel(
+            user_id=user_space.user_id,
+            lesson_id=lesson_id,
+            role=user_space.role,
+            leader=user_space.leader,
+            client_url=user_space.space_url,
+            client_url_expires_at=client_url_expires_at,
+            not_before=not_before,
+        )
+        for user_space in user_spaces
+    ]
+
+
+def save_space_launches(
+    db: Session,
+    lesson_id: str,
+    lesson_space_id: str,
+    user_spaces: list[UserSpace],
+    client_url_expires_at: Optional[datetime] = None,
+    not_before: Optional[datetime] = None,
+) -> None:
+    """Persist the ``Space`` and every launched ``UserSpaceModel`` in one transaction.
+
+    The number of round trips stays the same however many participants were
+    launched: one upsert for the space, one for all the user spaces and a
+    single commit.
+    """
+    db.exec(upsert_space_statement(lesson_id, lesson_space_id))
+    if user_spaces:
+        db.exec(
+            upsert_user_spaces_statement(
+                launched_user_spaces(
+                    lesson_id, user_spaces, client_url_expires_at, not_before
+                )
+            )
+        )
+    db.commit()
@@ -0,0 +1,215 @@
+"""``AsyncSession`` versions of the helpers in ``app.dal.transcript``."""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.ai_tool.output_formats import SummaryOutput
+from app.dal.transcript import (
+    claim_transcript_statement,
+    feedback_statement,
+    finish_transcript_statement,
+    insert_statement,
+    launched_user_spaces,
+    save_segments_statements,
+    save_speakers_statements,
+    segments_statement,
+    space_statement,
+    speaker_transcripts_statement,
+    summary_statement,
+    transcript_by_hash_statement,
+    transcript_statement,
+    upsert_space_statement,
+    upsert_user_spaces_statement,
+    user_spaces_statement,
+)
+from app.schema.space import UserSpace
+from app.models.transcript import (
+    Feedback,
+    Space,
+    SpeakerTranscript,
+    Summary,
+    Transcript,
+    TranscriptSegmentModel,
+    UserSpaceModel,
+)
+
+
+async def create_transcript(
+    db: AsyncSession, lesson_id: str, transcription: list[dict]
+) -> Transcript:
+    result = await db.exec(
+        insert_statement(Transcript.from_segments(transcription, lesson_id=lesson_id))
+    )
+    transcript = result.scalar_one()
+    await db.commit()
+    return transcript
+
+
+async def create_summary(
+    db: AsyncSession, lesson_id: str, summary: SummaryOutput
+) -> Summary:
+    result = await db.exec(
+        insert_statement(Summary(lesson_id=lesson_id, **summary.model_dump()))
+    )
+    summary = result.scalar_one()
+    await db.commit()
+    return summary
+
+
+async def create_feedback(
+    db: AsyncSession,
+    lesson_id: str,
+    user_id: int,
+    role: str,
+    strengths: str,
+    improvements: str,
+) -> Feedback:
+    result = await db.exec(
+        insert_statement(
+            Feedback(
+                lesson_id=lesson_id,
+                user_id=user_id,
+                role=role,
+                strengths=strengths,
+                improvements=improvements,
+            )
+        )
+    )
+    feedback = result.scalar_one()
+    await db.commit()
+    return feedback
+
+
+async def claim_transcript(
+    db: AsyncSession, transcript: Transcript, stale_before: datetime
+) -> Transcript | None:
+    result = await db.exec(claim_transcript_statement(transcript, stale_before))
+    transcript = result.scalar_one_or_none()
+    await db.commit()
+    return transcript
+
+
+async def finish_transcript(
+    db: AsyncSession, transcript_id: int, processed: bool
+) -> None:
+    await db.exec(finish_transcript_statement(transcript_id, processed))
+    await db.commit()
+
+
+async def save_segments(db: AsyncSession, transcript: Transcript) -> None:
+    for statement in save_segments_statements(transcript):
+        await db.exec(statement)
+    await db.commit()
+
+
+async def save_speaker_transcripts(
+    db: AsyncSession, transcript: Transcript, speakers: dict[int, dict]
+) -> None:
+    for statement in save_speakers_statements(transcript, speakers):
+        await db.exec(statement)
+    await db.commit()
+
+
+async def get_speaker_transcripts(
+    lesson_id: str, db: AsyncSession
+) -> list[SpeakerTranscript]:
+    return (await db.exec(speaker_transcripts_statement(lesson_id))).all()
+
+
+async def get_segments(
+    lesson_id: str,
+    db: AsyncSession,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    user_id: Optional[int] = None,
+    after: Optional[int] = None,
+    limit: int = 100,
+) -> list[TranscriptSegmentModel]:
+    statement = segments_statement(lesson_id, start, end, user_id, after, limit)
+    return (await db.exec(statement)).all()
+
+
+async def get_transcript(lesson_id: str, db: AsyncSession) -> Transcript | None:
+    return (await db.exec(transcript_statement(lesson_id))).first()
+
+
+async def get_transcript_by_hash(
+    lesson_id: str, content_hash: str, db: AsyncSession
+) -> Transcript | None:
+    statement = transcript_by_hash_statement(lesson_id, content_hash)
+    return (await db.exec(statement)).first()
+
+
+async def get_summary(lesson_id: str, db: AsyncSession) -> Summary | None:
+    return (await db.exec(summary_statement(lesson_id))).first()
+
+
+async def get_feedback(lesson_id: str, db: AsyncSession) -> list[Feedback]:
+    return (await db.exec(feedback_statement(lesson_id))).all()
+
+
+async def get_or_create_space(
+    db: AsyncSession, lesson_id: str, lesson_space_id: str
+) -> Space:
+    result = await db.exec(upsert_space_statement(lesson_id, lesson_space_id))
+    space = result.scalar_one()
+    await db.commit()
+    return space
+
+
+async def get_space(lesson_id: str, db: AsyncSession) -> Space | None:
+    return (await db.exec(space_statement(lesson_id))).first()
+
+
+async def create_or_update_user_space(
+    db: AsyncSession,
+    user_id: int,
+    lesson_id: str,
+    role: str,
+    leader: bool,
+    client_url: Optional[str] = None,
+    client_url_expires_at: Optional[datetime] = None,
+    not_before: Optional[datetime] = None,
+) -> UserSpaceModel:
+    statement = upsert_user_spaces_statement(
+        [
+            UserSpaceModel(
+                user_id=user_id,
+                lesson_id=lesson_id,
+                role=role,
+                leader=leader,
+                client_url=client_url,
+                client_url_expires_at=client_url_expires_at,
+                not_before=not_before,
+            )
+        ]
+    )
+    user_space = (await db.exec(statement)).scalar_one()
+    await db.commit()
+    return user_space
+
+
+async def get_user_spaces(lesson_id: str, db: AsyncSession) -> list[UserSpaceModel]:
+    return (await db.exec(user_spaces_statement(lesson_id))).all()
+
+
+async def save_space_launches(
+    db: AsyncSession,
+    lesson_id: str,
+    lesson_space_id: str,
+    user_spaces: list[UserSpace],
+    client_url_expires_at: Optional[datetime] = None,
+    not_before: Optional[datetime] = None,
+) -> None:
+    """Persist the ``Space`` and every launched ``UserSpaceModel`` in one transaction."""
+    await db.exec(upsert_space_statement(lesson_id, lesson_space_id))
+    if user_spaces:
+        await db.exec(
+            upsert_user_spaces_statement(
+                launched_user_spaces(
+                    lesson_id, user_spaces, client_url_expires_at, not_before
+                )
+            )
+        )
+    await db.commit()
@@ -0,0 +1,59 @@
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.transcription_job import TranscriptionJob
+from app.schema.space import TranscriptionWebhook
+
+
+async def enqueue_job(
+    db: AsyncSession, lesson_id: str, webhook: TranscriptionWebhook
+) -> TranscriptionJob:
+    job = TranscriptionJob(lesson_id=lesson_id, webhook=webhook.model_dump(mode='json'))
+    db.add(job)
+    await db.commit()
+    return job
+
+
+async def claim_due_jobs(
+    db: AsyncSession, now: datetime, limit: int, stale_before: datetime
+) -> list[TranscriptionJob]:
+    """Mark due jobs as running and return them.
+
+    ``SKIP LOCKED`` lets several workers poll the table without claiming the
+    same job. Jobs left running by a worker that died before
+    ``stale_before`` are claimed again and counted in ``reclaims``.
+    """
+    statement = (
+        select(TranscriptionJob)
+        .where(
+            or_(
+                and_(
+                    TranscriptionJob.status == 'pending',
+                    TranscriptionJob.run_at <= now,
+                ),
+                and_(
+                    TranscriptionJob.status == 'running',
+                    TranscriptionJob.claimed_at < stale_before,
+                ),
+            )
+        )
+        .order_by(TranscriptionJob.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    jobs = (await db.exec(statement)).all()
+    for job in jobs:
+        job.reclaims = job.reclaims + 1 if job.status == 'running' else 0
+        job.status = 'running'
+        job.attempts += 1
+        job.claimed_at = now
+    await db.commit()
+    return jobs
+
+
+async def save_jobs(db: AsyncSession, jobs: list[TranscriptionJob]) -> None:
+    db.add_all(jobs)
+    await db.commit()
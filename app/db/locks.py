@@ -0,0 +1,49 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from sqlalchemy import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# First key of the two-key advisory lock form, so our locks can't collide
+# with advisory locks taken by anything else on the database.
+SPACE_LOCK_NAMESPACE = 1001
+MIGRATION_LOCK_NAMESPACE = 1002
+
+
+@asynccontextmanager
+async def advisory_lock(
+    db: AsyncSession,
+    namespace: int,
+    key: str,
+    timeout: float = 30.0,
+    poll_interval: float = 0.05,
+) -> AsyncIterator[None]:
+    """Hold a transaction-scoped Postgres advisory lock for ``key`` in ``db``.
+
+    The lock is taken with ``pg_try_advisory_xact_lock`` on the session's own
+    connection and polled, so waiting never blocks the event loop and the
+    caller needs no second connection. It is released when the session's
+    transaction ends: when the writes it guards are committed, or when the
+    block exits, which commits, or rolls back on error. Other databases have
+    no advisory locks, so nothing is locked.
+    """
+    if db.bind.dialect.name != 'postgresql':
+        yield
+        return
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    statement = text('SELECT pg_try_advisory_xact_lock(:namespace, hashtext(:key))')
+    while not await db.scalar(statement, {'namespace': namespace, 'key': key}):
+        if loop.time() >= deadline:
+            await db.rollback()
+            raise TimeoutError(f'Timed out waiting for advisory lock on {key}')
+        await asyncio.sleep(poll_interval)
+    try:
+        yield
+    except BaseException:
+        await db.rollback()
+        raise
+    if db.in_transaction():
+        await db.commit()
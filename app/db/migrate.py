@@ -0,0 +1,183 @@
+"""Versioned SQL migrations.
+
+Migrations are the numbered ``.sql`` files in ``app/db/migrations``, applied
+in order and recorded in the ``schema_migrations`` table. Run them with
+``python -m app.db.migrate`` before starting the new code; workers only check
+the recorded version on startup.
+
+A file starting with ``-- migrate: no-transaction`` is run outside a
+transaction, one statement at a time, which ``CREATE INDEX CONCURRENTLY``
+needs. Such statements should be idempotent (``IF NOT EXISTS``) since a
+failure part way through can't be rolled back.
+"""
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from app.db.locks import MIGRATION_LOCK_NAMESPACE
+from app.utils.logging import logger
+
+MIGRATIONS_DIR = Path(__file__).parent / 'migrations'
+NO_TRANSACTION = '-- migrate: no-transaction'
+
+_CREATE_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR NOT NULL,
+    applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+)
+"""
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    sql: str
+
+    @property
+    def transactional(self) -> bool:
+        return not self.sql.startswith(NO_TRANSACTION)
+
+    def statements(self) -> list[str]:
+        """The file split into single statements, for non-transactional runs.
+
+        Statements end with a semicolon at the end of a line, except inside
+        ``$$`` quoted bodies such as ``DO`` blocks.
+        """
+        statements = []
+        current = ''
+        for part in re.split(r'(?<=;)\s*$', self.sql, flags=re.MULTILINE):
+            current += part
+            if current.count('$$') % 2 == 0:
+                statements.append(current)
+                current = ''
+        statements.append(current)
+        return [
+            statement.strip()
+            for statement in statements
+            if re.sub(r'--.*$', '', statement, flags=re.MULTILINE).strip()
+        ]
+
+
+def load_migrations(directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    migrations = []
+    for path in sorted(directory.glob('*.sql')):
+        version, _, name = path.stem.partition('_')
+        migrations.append(Migration(int(version), name, path.read_text()))
+    versions = [migration.version for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f'Duplicate migration versions in {directory}')
+    return migrations
+
+
+def current_version(connection: Connection) -> Optional[int]:
+    """The latest applied version, or None if migrations have never run."""
+    if connection.scalar(text("SELECT to_regclass('schema_migrations')")) is None:
+        return None
+    return connection.scalar(text('SELECT max(version) FROM schema_migrations'))
+
+
+def migrate(bind: Engine, directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    """Apply every pending migration and return the ones applied."""
+    applied = []
+    with bind.connect() as connection:
+        # Session-level, so concurrent runs (e.g. several release jobs) wait
+        # for each other across the per-migration transactions.
+        connection.execute(
+            text('SELECT pg_advisory_lock(:namespace, 0)'),
+            {'namespace': MIGRATION_LOCK_NAMESPACE},
+        )
+        connection.commit()
+        try:
+            with connection.begin():
+                connection.execute(text(_CREATE_VERSION_TABLE))
+            done = set(
+                connection.scalars(text('SELECT version FROM schema_migrations'))
+            )
+            connection.commit()
+            for migration in load_migrations(directory):
+                if migration.version in done:
+                    continue
+                logger.info(
+                    '[Migrate] applying migration',
+                    version=migration.version,
+                    migration=migration.name,
+                )
+                if migration.transactional:
+                    with connection.begin():
+                        _execute_script(connection, migration.sql)
+                        _record(connection, migration)
+                else:
+                    connection.execution_options(isolation_level='AUTOCOMMIT')
+                    try:
+                        for statement in migration.statements():
+                            _execute_script(connection, statement)
+                        _record(connection, migration)
+                    finally:
+                        # Everything is committed as it runs; this only ends
+                        # SQLAlchemy's transaction so the level can be reset.
+                        connection.rollback()
+                        connection.execution_options(
+                            isolation_level=connection.default_isolation_level
+                        )
+                applied.append(migration)
+        finally:
+            connection.rollback()
+            connection.execute(
+                text('SELECT pg_advisory_unlock(:namespace, 0)'),
+                {'namespace': MIGRATION_LOCK_NAMESPACE},
+            )
+            connection.commit()
+    return applied
+
+
+def _execute_script(connection: Connection, sql: str) -> None:
+    # Straight to the DBAPI cursor without parameters, so '%' in the SQL (e.g.
+    # format() in DO blocks) isn't taken for a placeholder.
+    with connection.connection.cursor() as cursor:
+        cursor.execute(sql)
+
+
+def _record(connection: Connection, migration: Migration) -> None:
+    connection.execute(
+        text('INSERT INTO schema_migrations (version, name) VALUES (:version, :name)'),
+        {'version': migration.version, 'name': migration.name},
+    )
+
+
+def check_schema_version(bind: Engine, directory: Path = MIGRATIONS_DIR) -> None:
+    """Refuse to start against a database missing migrations this code needs.
+
+    Costs two small queries, so every worker can run it on startup.
+    """
+    expected = load_migrations(directory)[-1].version
+    with bind.connect() as connection:
+        version = current_version(connection)
+    if version is None or version < expected:
+        raise RuntimeError(
+            f'Database schema is at version {version}, expected {expected}. '
+            'Run `python -m app.db.migrate`.'
+        )
+    if version > expected:
+        logger.warning(
+            '[Migrate] database schema is newer than the code',
+            version=version,
+            expected=expected,
+        )
+
+
+if __name__ == '__main__':
+    from app.db.session import engine
+
+    applied = migrate(engine)
+    logger.info(
+        '[Migrate] database is up to date',
+        applied_count=len(applied),
+        version=applied[-1].version if applied else None,
+    )
@@ -0,0 +1,45 @@
+-- Tables as created by SQLModel.metadata.create_all before migrations were
+-- introduced. IF NOT EXISTS lets this run against those databases too.
+CREATE TABLE IF NOT EXISTS space (
+    id SERIAL PRIMARY KEY,
+    lesson_id VARCHAR NOT NULL,
+    lesson_space_id VARCHAR NOT NULL,
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_space_lesson_id ON space (lesson_id);
+
+CREATE TABLE IF NOT EXISTS userspacemodel (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    role VARCHAR NOT NULL,
+    leader BOOLEAN NOT NULL,
+    lesson_id VARCHAR NOT NULL,
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS transcript (
+    id SERIAL PRIMARY KEY,
+    transcription JSONB,
+    lesson_id VARCHAR NOT NULL,
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS summary (
+    id SERIAL PRIMARY KEY,
+    long_summary VARCHAR,
+    short_summary VARCHAR,
+    key_points VARCHAR,
+    recommended_focus VARCHAR,
+    lesson_id VARCHAR NOT NULL,
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS feedback (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    role VARCHAR NOT NULL,
+    strengths VARCHAR,
+    improvements VARCHAR,
+    lesson_id VARCHAR NOT NULL,
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+);
@@ -0,0 +1,5 @@
+-- Stored launch URLs, reused until they expire.
+ALTER TABLE userspacemodel
+    ADD COLUMN IF NOT EXISTS client_url VARCHAR,
+    ADD COLUMN IF NOT EXISTS client_url_expires_at TIMESTAMP WITHOUT TIME ZONE,
+    ADD COLUMN IF NOT EXISTS not_before TIMESTAMP WITHOUT TIME ZONE;
@@ -0,0 +1,15 @@
+-- Queue of lessons launched ahead of time by the prewarm worker.
+CREATE TABLE IF NOT EXISTS scheduledlaunch (
+    id SERIAL PRIMARY KEY,
+    lesson_id VARCHAR NOT NULL,
+    request JSONB NOT NULL,
+    launch_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    status VARCHAR NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_error VARCHAR,
+    claimed_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_scheduledlaunch_lesson_id ON scheduledlaunch (lesson_id);
+CREATE INDEX IF NOT EXISTS ix_scheduledlaunch_status ON scheduledlaunch (status);
+CREATE INDEX IF NOT EXISTS ix_scheduledlaunch_launch_at ON scheduledlaunch (launch_at);
@@ -0,0 +1,22 @@
+-- Naive timestamps were always written in UTC; store them as timestamptz.
+-- Columns that are already timestamptz are left alone.
+DO $$
+DECLARE
+    target RECORD;
+BEGIN
+    FOR target IN
+        SELECT table_name, column_name
+        FROM information_schema.columns
+        WHERE table_schema = current_schema()
+          AND table_name IN (
+              'space', 'userspacemodel', 'transcript', 'summary', 'feedback',
+              'scheduledlaunch'
+          )
+          AND data_type = 'timestamp without time zone'
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE %I ALTER COLUMN %I TYPE TIMESTAMP WITH TIME ZONE USING %I AT TIME ZONE ''UTC''',
+            target.table_name, target.column_name, target.column_name
+        );
+    END LOOP;
+END $$;
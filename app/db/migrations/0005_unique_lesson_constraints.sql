@@ -0,0 +1,32 @@
+-- One space per lesson and room, and one row per participant of a lesson,
+-- so writers can upsert. Older duplicates are dropped first, keeping the
+-- latest row.
+DELETE FROM space a USING space b
+WHERE a.lesson_id = b.lesson_id
+  AND a.lesson_space_id = b.lesson_space_id
+  AND a.id < b.id;
+
+DELETE FROM userspacemodel a USING userspacemodel b
+WHERE a.lesson_id = b.lesson_id
+  AND a.user_id = b.user_id
+  AND a.id < b.id;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'uq_space_lesson_room'
+          AND conrelid = 'space'::regclass
+    ) THEN
+        ALTER TABLE space
+            ADD CONSTRAINT uq_space_lesson_room UNIQUE (lesson_id, lesson_space_id);
+    END IF;
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'uq_userspace_lesson_user'
+          AND conrelid = 'userspacemodel'::regclass
+    ) THEN
+        ALTER TABLE userspacemodel
+            ADD CONSTRAINT uq_userspace_lesson_user UNIQUE (lesson_id, user_id);
+    END IF;
+END $$;
@@ -0,0 +1,6 @@
+-- migrate: no-transaction
+-- Every read of these tables filters on lesson_id. userspacemodel is served
+-- by the (lesson_id, user_id) index of uq_userspace_lesson_user.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_transcript_lesson_id ON transcript (lesson_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_summary_lesson_id ON summary (lesson_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_feedback_lesson_id ON feedback (lesson_id);
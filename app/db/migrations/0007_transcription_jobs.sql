@@ -0,0 +1,15 @@
+-- Queue of transcription webhooks processed by the transcription worker.
+CREATE TABLE IF NOT EXISTS transcriptionjob (
+    id SERIAL PRIMARY KEY,
+    lesson_id VARCHAR NOT NULL,
+    webhook JSONB NOT NULL,
+    run_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    status VARCHAR NOT NULL,
+    attempts INTEGER NOT NULL,
+    last_error VARCHAR,
+    claimed_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_transcriptionjob_lesson_id ON transcriptionjob (lesson_id);
+CREATE INDEX IF NOT EXISTS ix_transcriptionjob_run_at ON transcriptionjob (run_at);
+CREATE INDEX IF NOT EXISTS ix_transcriptionjob_status ON transcriptionjob (status);
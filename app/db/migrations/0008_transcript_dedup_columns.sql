@@ -0,0 +1,6 @@
+-- Content hash and processing state of transcripts, so repeat webhook
+-- deliveries aren't processed again.
+ALTER TABLE transcript
+    ADD COLUMN IF NOT EXISTS content_hash VARCHAR,
+    ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMP WITH TIME ZONE,
+    ADD COLUMN IF NOT EXISTS processed_at TIMESTAMP WITH TIME ZONE;
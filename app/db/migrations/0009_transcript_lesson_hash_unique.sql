@@ -0,0 +1,17 @@
+-- migrate: no-transaction
+-- Existing transcripts have no hash; NULLs never conflict.
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_transcript_lesson_hash
+    ON transcript (lesson_id, content_hash);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'uq_transcript_lesson_hash'
+          AND conrelid = 'transcript'::regclass
+    ) THEN
+        ALTER TABLE transcript
+            ADD CONSTRAINT uq_transcript_lesson_hash
+            UNIQUE USING INDEX uq_transcript_lesson_hash;
+    END IF;
+END $$;
@@ -0,0 +1,2 @@
+-- Transcript segments in the compact format of app/models/transcript_codec.py.
+ALTER TABLE transcript ADD COLUMN IF NOT EXISTS transcription_packed BYTEA;
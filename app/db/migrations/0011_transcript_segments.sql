@@ -0,0 +1,16 @@
+-- Transcript segments stored one row per segment, sorted by start time.
+CREATE TABLE IF NOT EXISTS transcriptsegmentmodel (
+    id SERIAL PRIMARY KEY,
+    transcript_id INTEGER NOT NULL,
+    lesson_id VARCHAR NOT NULL,
+    position INTEGER NOT NULL,
+    start_time DOUBLE PRECISION NOT NULL,
+    end_time DOUBLE PRECISION NOT NULL,
+    user_id INTEGER NOT NULL,
+    user_name VARCHAR NOT NULL,
+    breakout_id VARCHAR,
+    text VARCHAR NOT NULL,
+    CONSTRAINT uq_segment_lesson_position UNIQUE (lesson_id, position)
+);
+CREATE INDEX IF NOT EXISTS ix_segment_lesson_start_time ON transcriptsegmentmodel (lesson_id, start_time);
+CREATE INDEX IF NOT EXISTS ix_segment_lesson_user ON transcriptsegmentmodel (lesson_id, user_id);
@@ -0,0 +1,13 @@
+-- Each participant's text from the lesson's latest transcript.
+CREATE TABLE IF NOT EXISTS speakertranscript (
+    id SERIAL PRIMARY KEY,
+    transcript_id INTEGER NOT NULL,
+    lesson_id VARCHAR NOT NULL,
+    user_id INTEGER NOT NULL,
+    name VARCHAR NOT NULL,
+    role VARCHAR NOT NULL,
+    text VARCHAR NOT NULL,
+    segment_count INTEGER NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    CONSTRAINT uq_speakertranscript_lesson_user UNIQUE (lesson_id, user_id)
+);
@@ -0,0 +1,2 @@
+-- Times a job was claimed again after the worker running it stopped.
+ALTER TABLE transcriptionjob ADD COLUMN IF NOT EXISTS reclaims INTEGER NOT NULL DEFAULT 0;
@@ -0,0 +1,47 @@
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.utils.metrics import metrics
+
+
+class InstrumentedQueuePool(QueuePool):
+    """``QueuePool`` reporting checkout waits and exhaustion to ``metrics``.
+
+    ``<prefix>.checkout_wait_ms`` times every checkout, including opening a
+    new connection. ``<prefix>.pool_exhausted`` counts checkouts that found
+    no idle connection and no overflow left, so had to wait, and
+    ``<prefix>.pool_timeouts`` those that gave up after ``pool_timeout``.
+    """
+
+    metrics_prefix = 'db.sync'
+
+    def _do_get(self):
+        if (
+            self._max_overflow > -1
+            and self.checkedin() == 0
+            and self.overflow() >= self._max_overflow
+        ):
+            metrics.increment(f'{self.metrics_prefix}.pool_exhausted')
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            metrics.increment(f'{self.metrics_prefix}.pool_timeouts')
+            raise
+        finally:
+            metrics.observe(
+                f'{self.metrics_prefix}.checkout_wait_ms',
+                (time.perf_counter() - started) * 1000,
+            )
+        metrics.set_gauge(f'{self.metrics_prefix}.checked_out', self.checkedout())
+        return record
+
+    def _do_return_conn(self, record) -> None:
+        super()._do_return_conn(record)
+        metrics.set_gauge(f'{self.metrics_prefix}.checked_out', self.checkedout())
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    metrics_prefix = 'db.async'
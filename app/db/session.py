@@ -1,18 +1,82 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator
+from uuid import uuid4
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlmodel import SQLModel, Session, create_engine
-from app.utils.settings import get_settings
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+from app.utils.settings import Settings, get_settings
 
 settings = get_settings()
+
+
+def engine_options(settings: Settings, is_async: bool = False) -> dict:
+    """Pool and driver options shared by the sync and async engines."""
+    options = {
+        'echo': settings.dev,
+        'poolclass': InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        'pool_size': settings.db_pool_size,
+        'max_overflow': settings.db_max_overflow,
+        'pool_timeout': settings.db_pool_timeout,
+        'pool_recycle': settings.db_pool_recycle,
+        'pool_pre_ping': settings.db_pool_pre_ping,
+    }
+    if settings.db_pgbouncer and is_async:
+        # A transaction pooler may run each transaction on a different server
+        # connection, so asyncpg must not cache or reuse named prepared
+        # statements. psycopg2 doesn't use server-side prepared statements.
+        options['connect_args'] = {
+            'statement_cache_size': 0,
+            'prepared_statement_cache_size': 0,
+            'prepared_statement_name_func': lambda: f'__asyncpg_{uuid4()}__',
+        }
+    return options
+
+
 # The SQLModel helper "create_engine" is a thin wrapper around SQLAlchemy's
 # create_engine but keeps the right typing information for SQLModel.
 # Echo is enabled when running in dev mode so that SQL emitted can be
 # inspected easily during development.
-engine = create_engine(settings.database_url, echo=settings.dev)
+engine = create_engine(settings.database_url, **engine_options(settings))
+
+
+def async_database_url(database_url: str) -> str:
+    """Return ``database_url`` with the asyncpg driver for Postgres URLs."""
+    url = make_url(database_url)
+    if url.get_backend_name() == 'postgresql':
+        url = url.set(drivername='postgresql+asyncpg')
+    return url.render_as_string(hide_password=False)
+
 
-# TODO: Consider adding pooling
+# The same database reached through asyncpg, used by the request handlers so
+# queries never block the event loop.
+async_engine = create_async_engine(
+    async_database_url(settings.database_url),
+    **engine_options(settings, is_async=True),
+)
+# Objects stay usable after commit, as lazy loading is not possible on an
+# async session.
+async_session = async_sessionmaker(
+    async_engine, class_=AsyncSession, expire_on_commit=False
+)
 
 
 def get_db() -> Generator[Session, None, None]:
     """FastAPI dependency that provides a SQLModel-aware session."""
     with Session(engine) as session:
         yield session
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """FastAPI dependency that provides a SQLModel-aware ``AsyncSession``."""
+    async with async_session() as session:
+        yield session
+
+
+def get_async_session_factory() -> async_sessionmaker:
+    """FastAPI dependency for code that opens its own short-lived sessions.
+
+    Used where a request would otherwise hold a pooled connection while
+    awaiting something slow, such as an LLM call.
+    """
+    return async_session
@@ -1,11 +1,15 @@
 import sentry_sdk
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
-from sqlmodel import SQLModel
-from app.db.session import engine
+from app.db.migrate import check_schema_version
+from app.db.session import async_engine, engine
 from app.utils.settings import get_settings
 from app.middleware import api_key_auth_middleware
 from app.api.space import router
+from app.services.lessonspace import create_lesson_semaphore
+from app.utils.http import create_http_client
+from app.utils.metrics import metrics
+from app.utils.rate_limit import create_launch_scheduler
 import logfire
 
 settings = get_settings()
@@ -27,12 +31,21 @@ def scrub_sensitive_data(record):
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Create database tables on startup and dispose engine on shutdown."""
-    # Create all tables if they do not exist yet.
-    SQLModel.metadata.create_all(bind=engine)
+    """Check the database schema and create shared outbound clients on startup, release them on shutdown."""
+    # Migrations run once per release (python -m app.db.migrate); workers only
+    # refuse to start against a database that is behind.
+    check_schema_version(engine)
+    # One pooled client per worker so outbound connections are reused.
+    app.state.http_client = create_http_client(settings)
+    app.state.launch_scheduler = create_launch_scheduler(settings)
+    # Batch requests share one limit so together they fit in the async pool.
+    app.state.lesson_semaphore = create_lesson_semaphore(settings)
     yield
-    # Gracefully dispose the engine once the application stops.
+    await app.state.launch_scheduler.aclose()
+    await app.state.http_client.aclose()
+    # Gracefully dispose the engines once the application stops.
     engine.dispose()
+    await async_engine.dispose()
 
 
 app = FastAPI(
@@ -56,6 +69,12 @@ async def health_check():
     return {'status': 'healthy'}
 
 
+@app.get('/api/metrics')
+async def get_metrics():
+    """In-process metrics for the worker that serves the request."""
+    return metrics.snapshot()
+
+
 if __name__ == '__main__':
     import uvicorn
 
@@ -0,0 +1,35 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field, SQLModel
+
+from app.schema.space import SpaceRequest
+
+
+class ScheduledLaunch(SQLModel, table=True):
+    """A lesson whose spaces are launched ahead of ``not_before`` by the prewarm worker."""
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    lesson_id: str = Field(index=True, nullable=False)
+    request: dict = Field(nullable=False, sa_type=JSONB)
+    launch_at: datetime = Field(
+        nullable=False, index=True, sa_type=DateTime(timezone=True)
+    )
+    # pending -> running -> launched, or back to pending for a retry until
+    # the attempts run out and it is marked failed.
+    status: str = Field(default='pending', nullable=False, index=True)
+    attempts: int = Field(default=0, nullable=False)
+    last_error: Optional[str] = Field(default=None, nullable=True)
+    claimed_at: Optional[datetime] = Field(
+        default=None, nullable=True, sa_type=DateTime(timezone=True)
+    )
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        sa_type=DateTime(timezone=True),
+    )
+
+    def to_space_request(self) -> SpaceRequest:
+        return SpaceRequest.model_validate(self.request)
@@ -1,78 +1,320 @@
 # See schema.sql for the SQL definition of the transcripts table
-from typing import Optional
+import hashlib
+import json
+from typing import Iterable, Iterator, Optional
 from sqlmodel import Field, SQLModel
 from datetime import datetime, timezone
+from sqlalchemy import DateTime, Index, LargeBinary, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSONB
 
 from app.ai_tool.output_formats import SummaryOutput
-from app.schema.transcript import FeedbackWithUserOutput
+from app.models.transcript_codec import (
+    SegmentPacker,
+    can_pack_segment,
+    iter_unpacked,
+    unpack_segments,
+)
+from app.schema.transcript import FeedbackWithUserOutput, TranscriptSegment, User
+from app.utils.dates import as_utc
 
 
 class Space(SQLModel, table=True):
+    __table_args__ = (
+        UniqueConstraint('lesson_id', 'lesson_space_id', name='uq_space_lesson_room'),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     lesson_id: str = Field(index=True, nullable=False)
     lesson_space_id: str = Field(nullable=False)
     created_at: datetime = Field(
-        default_factory=lambda: datetime.now(timezone.utc), nullable=False
+        default_factory=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        sa_type=DateTime(timezone=True),
     )
 
 
 class UserSpaceModel(SQLModel, table=True):
+    # The unique constraint's (lesson_id, user_id) index also serves lookups
+    # by lesson_id alone, so there is no separate lesson_id index.
+    __table_args__ = (
+        UniqueConstraint('lesson_id', 'user_id', name='uq_userspace_lesson_user'),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(nullable=False)
     role: str = Field(nullable=False)
     leader: bool = Field(nullable=False)
     lesson_id: str = Field(nullable=False)
+    # Launch URL returned by Lessonspace, reused until it expires so repeat
+    # requests for the same lesson don't call Lessonspace again.
+    client_url: Optional[str] = Field(default=None, nullable=True)
+    client_url_expires_at: Optional[datetime] = Field(
+        default=None, nullable=True, sa_type=DateTime(timezone=True)
+    )
+    not_before: Optional[datetime] = Field(
+        default=None, nullable=True, sa_type=DateTime(timezone=True)
+    )
     created_at: datetime = Field(
-        default_factory=lambda: datetime.now(timezone.utc), nullable=False
+        default_factory=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        sa_type=DateTime(timezone=True),
     )
 
+    def has_valid_client_url(
+        self, role: str, leader: bool, not_before: Optional[datetime]
+    ) -> bool:
+        """Whether the stored launch URL can be served for this role and ``not_before``."""
+        if not self.client_url or not self.client_url_expires_at:
+            return False
+        if self.role != role or self.leader != leader:
+            return False
+        if as_utc(self.not_before) != as_utc(not_before):
+            return False
+        return self.client_url_expires_at > datetime.now(timezone.utc)
+
+
+def _hash_segment(digest, segment: dict) -> None:
+    digest.update(json.dumps(segment, sort_keys=True).encode())
+    digest.update(b'\n')
+
+
+def transcript_hash(transcription: Iterable[dict]) -> str:
+    """SHA-256 of the segments, identifying repeat deliveries of a transcript."""
+    digest = hashlib.sha256()
+    for segment in transcription:
+        _hash_segment(digest, segment)
+    return digest.hexdigest()
+
 
 class Transcript(SQLModel, table=True):
+    __table_args__ = (
+        UniqueConstraint('lesson_id', 'content_hash', name='uq_transcript_lesson_hash'),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    transcription: Optional[list[dict]] = Field(nullable=True, sa_type=JSONB)
-    lesson_id: str = Field(nullable=False)
+    # Segments are stored in one of two columns: transcription_packed holds
+    # them in the compact format of app/models/transcript_codec.py, and
+    # transcription is used for segments that format can't represent. Read
+    # them through ``segments``.
+    transcription: Optional[list[dict]] = Field(
+        default=None, nullable=True, sa_type=JSONB
+    )
+    transcription_packed: Optional[bytes] = Field(
+        default=None, nullable=True, sa_type=LargeBinary
+    )
+    lesson_id: str = Field(index=True, nullable=False)
+    content_hash: Optional[str] = Field(default=None, nullable=True)
+    # Set while a worker runs the agents on this transcript, and once they
+    # have all succeeded; repeat deliveries are skipped in either case.
+    claimed_at: Optional[datetime] = Field(
+        default=None, nullable=True, sa_type=DateTime(timezone=True)
+    )
+    processed_at: Optional[datetime] = Field(
+        default=None, nullable=True, sa_type=DateTime(timezone=True)
+    )
     created_at: datetime = Field(
-        default_factory=lambda: datetime.now(timezone.utc), nullable=False
+        default_factory=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        sa_type=DateTime(timezone=True),
     )
 
     def __repr__(self):
         return f'<Transcript(lesson_id={self.lesson_id}, created_at={self.created_at})>'
 
+    @classmethod
+    def from_segments(cls, segments: Iterable[dict], **fields) -> 'Transcript':
+        """A ``Transcript`` storing ``segments`` packed whenever they fit the format."""
+        builder = TranscriptBuilder()
+        for segment in segments:
+            builder.add(segment)
+        return builder.build(**fields)
+
+    @property
+    def segments(self) -> list[dict]:
+        """The transcript's segments, whichever column they are stored in."""
+        if self.transcription_packed is not None:
+            return unpack_segments(self.transcription_packed)
+        return self.transcription or []
+
+    def iter_segments(self) -> Iterator[dict]:
+        """The transcript's segments made one at a time, rather than as a list."""
+        if self.transcription_packed is not None:
+            return iter_unpacked(self.transcription_packed)
+        return iter(self.transcription or [])
+
     def to_concatonated_transcript(self):
-        return '\n'.join([segment['text'] for segment in self.transcription])
+        return '\n'.join([segment['text'] for segment in self.segments])
 
     def get_user_transcript(self, user_id: int):
         return '\n'.join(
             [
                 segment['text']
-                for segment in self.transcription
+                for segment in self.segments
                 if segment['user']['id'] == user_id
             ]
         )
 
     def gather_user_transcripts(
         self, users_lookup: dict[int, UserSpaceModel]
-    ) -> dict[int, dict[str, str]]:
-        user_transcripts = {}
-        for segment in self.transcription:
-            user_id = segment['user']['id']
-            text = segment['text']
-            name = segment['user']['name']
-            # role = users_lookup[user_id].role
-            if user_id == 3632572:
-                role = 'tutor'
-            else:
-                role = 'student'
-            if user_id not in user_transcripts:
-                user_transcripts[user_id] = {
-                    'text': text,
-                    'role': role,
-                    'name': name,
+    ) -> dict[int, dict]:
+        """Each speaker's name, role, joined text and number of segments.
+
+        Built in one pass, collecting the texts to join once at the end. Roles
+        come from the lesson's ``UserSpaceModel`` rows; speakers without one
+        are taken to be students.
+        """
+        speakers = {}
+        for segment in self.iter_segments():
+            user = segment['user']
+            if (speaker := speakers.get(user['id'])) is None:
+                user_space = users_lookup.get(user['id'])
+                speaker = speakers[user['id']] = {
+                    'name': user['name'],
+                    'role': user_space.role if user_space else 'student',
+                    'texts': [],
                 }
-            else:
-                user_transcripts[user_id]['text'] += ' ' + text
-        return user_transcripts
+            speaker['texts'].append(segment['text'])
+        return {
+            user_id: {
+                'name': speaker['name'],
+                'role': speaker['role'],
+                'text': ' '.join(speaker['texts']),
+                'segment_count': len(speaker['texts']),
+            }
+            for user_id, speaker in speakers.items()
+        }
+
+
+class TranscriptBuilder:
+    """A transcript's stored form, built one segment at a time.
+
+    Each segment is added to the content hash and to the packed columns as
+    it arrives and is then dropped. Segments are only kept whole once one
+    turns up that the packed format can't hold, as they are then stored as
+    JSON.
+    """
+
+    def __init__(self):
+        self.segment_count = 0
+        self._digest = hashlib.sha256()
+        self._packer = SegmentPacker()
+        self._segments: Optional[list] = None
+
+    def add(self, segment: dict) -> None:
+        _hash_segment(self._digest, segment)
+        self.segment_count += 1
+        if self._segments is None and can_pack_segment(segment):
+            self._packer.add(segment)
+            return
+        if self._segments is None:
+            self._segments = unpack_segments(self._packer.pack())
+        self._segments.append(segment)
+
+    @property
+    def content_hash(self) -> str:
+        """``transcript_hash`` of the segments added so far."""
+        return self._digest.hexdigest()
+
+    def build(self, **fields) -> Transcript:
+        if self._segments is None:
+            return Transcript(transcription_packed=self._packer.pack(), **fields)
+        return Transcript(transcription=self._segments, **fields)
+
+
+class TranscriptSegmentModel(SQLModel, table=True):
+    """A segment of the lesson's latest transcript, stored one row per segment.
+
+    Segments are sorted by start time when the transcript is stored and
+    numbered by ``position``, so parts of a transcript can be read without
+    loading the whole of it.
+    """
+
+    __table_args__ = (
+        UniqueConstraint('lesson_id', 'position', name='uq_segment_lesson_position'),
+        Index('ix_segment_lesson_start_time', 'lesson_id', 'start_time'),
+        Index('ix_segment_lesson_user', 'lesson_id', 'user_id'),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    transcript_id: int = Field(nullable=False)
+    lesson_id: str = Field(nullable=False)
+    position: int = Field(nullable=False)
+    start_time: float = Field(nullable=False)
+    end_time: float = Field(nullable=False)
+    user_id: int = Field(nullable=False)
+    user_name: str = Field(nullable=False)
+    breakout_id: Optional[str] = Field(default=None, nullable=True)
+    text: str = Field(nullable=False)
+
+    @classmethod
+    def from_transcript(
+        cls, transcript: Transcript
+    ) -> Iterator['TranscriptSegmentModel']:
+        """Rows for ``transcript``'s segments, numbered in start time order.
+
+        Rows are made one at a time from the packed columns. Transcripts
+        stored as JSON have segments the rows can't hold, so they get none.
+        """
+        if transcript.transcription_packed is None:
+            return
+        times = [
+            (segment['start_time'], segment['end_time'])
+            for segment in transcript.iter_segments()
+        ]
+        positions = [0] * len(times)
+        for position, index in enumerate(
+            sorted(range(len(times)), key=times.__getitem__)
+        ):
+            positions[index] = position
+        for position, segment in zip(positions, transcript.iter_segments()):
+            yield cls(
+                transcript_id=transcript.id,
+                lesson_id=transcript.lesson_id,
+                position=position,
+                start_time=segment['start_time'],
+                end_time=segment['end_time'],
+                user_id=segment['user']['id'],
+                user_name=segment['user']['name'],
+                breakout_id=segment.get('breakout_id'),
+                text=segment['text'],
+            )
+
+    def to_schema(self):
+        return TranscriptSegment(
+            start_time=self.start_time,
+            end_time=self.end_time,
+            user=User(id=self.user_id, name=self.user_name),
+            breakout_id=self.breakout_id,
+            text=self.text,
+        )
+
+
+class SpeakerTranscript(SQLModel, table=True):
+    """What one participant said in the lesson's latest transcript.
+
+    Built when the transcript is stored, so the feedback agents and other
+    per-participant readers don't walk the segments again.
+    """
+
+    __table_args__ = (
+        UniqueConstraint(
+            'lesson_id', 'user_id', name='uq_speakertranscript_lesson_user'
+        ),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    transcript_id: int = Field(nullable=False)
+    lesson_id: str = Field(nullable=False)
+    user_id: int = Field(nullable=False)
+    name: str = Field(nullable=False)
+    role: str = Field(nullable=False)
+    text: str = Field(nullable=False)
+    segment_count: int = Field(nullable=False)
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        sa_type=DateTime(timezone=True),
+    )
 
 
 class Summary(SQLModel, table=True):
@@ -83,8 +325,11 @@ class Summary(SQLModel, table=True):
     short_summary: str = Field(nullable=True)
     key_points: str = Field(nullable=True)
     recommended_focus: str = Field(nullable=True)
-    lesson_id: str = Field(nullable=False)
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    lesson_id: str = Field(index=True, nullable=False)
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_type=DateTime(timezone=True),
+    )
 
     def to_schema(self):
         return SummaryOutput(
@@ -103,8 +348,11 @@ class Feedback(SQLModel, table=True):
     role: str = Field(nullable=False)
     strengths: str = Field(nullable=True)
     improvements: str = Field(nullable=True)
-    lesson_id: str = Field(nullable=False)
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    lesson_id: str = Field(index=True, nullable=False)
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_type=DateTime(timezone=True),
+    )
 
     def to_schema(self):
         return FeedbackWithUserOutput(
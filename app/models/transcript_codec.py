@@ -0,0 +1,129 @@
+"""Compact storage format for transcript segments.
+
+Lessonspace segments look like::
+
+    {'start_time': 0.0, 'end_time': 1.5, 'user': {'id': 1, 'name': 'Alice'},
+     'breakout_id': 'main', 'text': 'Hello'}
+
+Stored as JSON, every segment repeats the key names and the speaker's
+name. Here they are stored column by column instead: parallel arrays of
+times, indexes into a dictionary of users and of breakout rooms, the
+length of every text and the texts joined into one block. The document is
+then zlib compressed.
+"""
+
+import json
+import zlib
+from typing import Any, Iterable, Iterator
+
+FORMAT_VERSION = 1
+_REQUIRED_KEYS = {'start_time', 'end_time', 'user', 'text'}
+_OPTIONAL_KEYS = {'breakout_id'}
+# Breakout index of segments without a breakout_id key.
+_NO_BREAKOUT = -1
+
+
+def can_pack_segment(segment: Any) -> bool:
+    """Whether ``segment`` can be packed without losing anything."""
+    if not isinstance(segment, dict):
+        return False
+    keys = segment.keys()
+    if not _REQUIRED_KEYS <= keys or not keys <= _REQUIRED_KEYS | _OPTIONAL_KEYS:
+        return False
+    user = segment['user']
+    if not isinstance(user, dict) or user.keys() != {'id', 'name'}:
+        return False
+    return isinstance(segment['text'], str)
+
+
+def can_pack(segments: Iterable[Any]) -> bool:
+    """Whether ``pack_segments`` stores ``segments`` without losing anything."""
+    return all(map(can_pack_segment, segments))
+
+
+class SegmentPacker:
+    """Builds the packed format one segment at a time.
+
+    Only the columns are kept, not the segments, so a transcript can be
+    packed as it is read.
+    """
+
+    def __init__(self):
+        self.users: dict[str, int] = {}
+        self.breakouts: dict[str, int] = {}
+        self.columns = {
+            'v': FORMAT_VERSION,
+            'start_time': [],
+            'end_time': [],
+            'user': [],
+            'breakout': [],
+            'text_length': [],
+        }
+        self.texts = []
+
+    def add(self, segment: dict) -> None:
+        user = segment['user']
+        # Keyed on the JSON so ids and names of any type keep their type.
+        user_key = json.dumps([user['id'], user['name']])
+        self.columns['start_time'].append(segment['start_time'])
+        self.columns['end_time'].append(segment['end_time'])
+        self.columns['user'].append(self.users.setdefault(user_key, len(self.users)))
+        if 'breakout_id' in segment:
+            breakout_key = json.dumps(segment['breakout_id'])
+            self.columns['breakout'].append(
+                self.breakouts.setdefault(breakout_key, len(self.breakouts))
+            )
+        else:
+            self.columns['breakout'].append(_NO_BREAKOUT)
+        self.columns['text_length'].append(len(segment['text']))
+        self.texts.append(segment['text'])
+
+    def pack(self) -> bytes:
+        document = {
+            **self.columns,
+            'users': [json.loads(key) for key in self.users],
+            'breakouts': [json.loads(key) for key in self.breakouts],
+            'text': ''.join(self.texts),
+        }
+        encoded = json.dumps(document, ensure_ascii=False, separators=(',', ':'))
+        return zlib.compress(encoded.encode())
+
+
+def pack_segments(segments: Iterable[dict]) -> bytes:
+    packer = SegmentPacker()
+    for segment in segments:
+        packer.add(segment)
+    return packer.pack()
+
+
+def iter_unpacked(data: bytes) -> Iterator[dict]:
+    """The segments of packed ``data``, made one at a time."""
+    columns = json.loads(zlib.decompress(data))
+    if columns['v'] != FORMAT_VERSION:
+        raise ValueError(f'Unknown transcript format version {columns["v"]}')
+    users = columns['users']
+    breakouts = columns['breakouts']
+    text = columns['text']
+    offset = 0
+    for start_time, end_time, user, breakout, text_length in zip(
+        columns['start_time'],
+        columns['end_time'],
+        columns['user'],
+        columns['breakout'],
+        columns['text_length'],
+    ):
+        user_id, name = users[user]
+        segment = {
+            'start_time': start_time,
+            'end_time': end_time,
+            'user': {'id': user_id, 'name': name},
+        }
+        if breakout != _NO_BREAKOUT:
+            segment['breakout_id'] = breakouts[breakout]
+        segment['text'] = text[offset : offset + text_length]
+        offset += text_length
+        yield segment
+
+
+def unpack_segments(data: bytes) -> list[dict]:
+    return list(iter_unpacked(data))
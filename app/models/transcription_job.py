@@ -0,0 +1,41 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field, SQLModel
+
+from app.schema.space import TranscriptionWebhook
+
+
+class TranscriptionJob(SQLModel, table=True):
+    """A transcription webhook waiting to be processed by the transcription worker."""
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    lesson_id: str = Field(index=True, nullable=False)
+    webhook: dict = Field(nullable=False, sa_type=JSONB)
+    run_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        index=True,
+        sa_type=DateTime(timezone=True),
+    )
+    # pending -> running -> done, or back to pending for a retry until the
+    # attempts run out and it is dead-lettered as dead.
+    status: str = Field(default='pending', nullable=False, index=True)
+    attempts: int = Field(default=0, nullable=False)
+    # Claims in a row that found the job still running after its worker
+    # stopped; a job picked up from pending starts again from 0.
+    reclaims: int = Field(default=0, nullable=False)
+    last_error: Optional[str] = Field(default=None, nullable=True)
+    claimed_at: Optional[datetime] = Field(
+        default=None, nullable=True, sa_type=DateTime(timezone=True)
+    )
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        sa_type=DateTime(timezone=True),
+    )
+
+    def to_webhook(self) -> TranscriptionWebhook:
+        return TranscriptionWebhook.model_validate(self.webhook)
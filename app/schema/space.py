@@ -2,6 +2,9 @@ from pydantic import BaseModel, Field, EmailStr
 from typing import List, Optional, Union
 from datetime import datetime
 
+# Most lessons accepted by one batch or prewarm request.
+MAX_BATCH_SIZE = 100
+
 
 class User(BaseModel):
     user_id: Union[int, str] = Field(..., description='Unique identifier for the user')
@@ -48,7 +51,45 @@ class SpaceResponse(BaseModel):
     )
 
 
+class BatchSpaceResult(BaseModel):
+    lesson_id: str = Field(..., description='Lesson identifier from the request')
+    space: Optional[SpaceResponse] = Field(
+        None, description='The created space, if provisioning succeeded'
+    )
+    error: Optional[str] = Field(
+        None, description='Why provisioning failed for this lesson'
+    )
+
+
+class BatchSpaceResponse(BaseModel):
+    results: List[BatchSpaceResult] = Field(
+        ..., description='One result per requested lesson, in request order'
+    )
+
+
+class ScheduledLaunchResponse(BaseModel):
+    lesson_id: str = Field(..., description='Lesson identifier from the request')
+    launch_at: datetime = Field(
+        ..., description='When the spaces for this lesson will be launched'
+    )
+
+
+class PrewarmResponse(BaseModel):
+    scheduled: List[ScheduledLaunchResponse] = Field(
+        ..., description='Lessons scheduled for pre-warming'
+    )
+    skipped: List[str] = Field(
+        ..., description='Lessons without not_before, which cannot be pre-warmed'
+    )
+
+
 class TranscriptionWebhook(BaseModel):
     transcriptionUrl: str = Field(
         ..., description='Pre-signed S3 URL for downloading the transcription'
     )
+
+
+class TranscriptionJobResponse(BaseModel):
+    job_id: int = Field(..., description='Identifier of the queued job')
+    lesson_id: str = Field(..., description='Lesson the transcription belongs to')
+    status: str = Field(..., description='Job status, pending until a worker runs it')
@@ -1,7 +1,7 @@
 # See schema.sql for the SQL definition of the transcripts table
 from datetime import datetime
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 from app.ai_tool.output_formats import ChapterOutput
 
@@ -15,10 +15,16 @@ class TranscriptSegment(BaseModel):
     start_time: float
     end_time: float
     user: User
-    breakout_id: str
+    breakout_id: Optional[str] = None
     text: str
 
 
+class TranscriptSegmentPage(BaseModel):
+    segments: List[TranscriptSegment]
+    # Pass as ``after`` to fetch the next page; None on the last page.
+    next_cursor: Optional[int] = None
+
+
 class Transcript(BaseModel):
     transcription: List[TranscriptSegment]
 
@@ -1,14 +1,33 @@
 import httpx
-from app.dal.transcript import create_or_update_user_space, get_or_create_space
+from app.dal.transcript_async import get_space, get_user_spaces, save_space_launches
 from app.utils.settings import get_settings
-from app.schema.space import SpaceRequest, SpaceResponse, UserSpace
+from app.schema.space import (
+    BatchSpaceResponse,
+    BatchSpaceResult,
+    SpaceRequest,
+    SpaceResponse,
+    UserSpace,
+)
 import asyncio
-from fastapi import HTTPException
+import json
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from fastapi import Depends, HTTPException, Request
+from app.db.locks import SPACE_LOCK_NAMESPACE, advisory_lock
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
 from app.utils.dataclass import BaseRequest
+from app.utils.http import client_session, get_http_client
+from app.utils.rate_limit import (
+    LaunchScheduler,
+    LocalTokenBucket,
+    get_launch_scheduler,
+)
 from dataclasses import dataclass
-from typing import Optional, Dict, Union
+from typing import Annotated, Optional, Dict, Union
 from app.utils.logging import logger
-from sqlmodel import Session
+from app.utils.single_flight import SingleFlight
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 settings = get_settings()
 
@@ -23,14 +42,105 @@ class LessonSpaceRequest(BaseRequest):
     timeouts: Optional[Dict] = None
 
 
+# Lessons currently being provisioned by this worker.
+_in_flight = SingleFlight()
+
+# Shared by every LessonspaceService in the worker, so an outage seen by one
+# request makes the next ones fail fast.
+lessonspace_breaker = CircuitBreaker(
+    'lessonspace',
+    failure_rate_threshold=settings.lessonspace_breaker_failure_rate,
+    slow_call_duration=settings.lessonspace_breaker_slow_call_duration,
+    slow_call_rate_threshold=settings.lessonspace_breaker_slow_call_rate,
+    window_size=settings.lessonspace_breaker_window,
+    minimum_calls=settings.lessonspace_breaker_minimum_calls,
+    open_duration=settings.lessonspace_breaker_open_duration,
+    half_open_calls=settings.lessonspace_breaker_half_open_calls,
+)
+
+
+def _flight_key(request: SpaceRequest) -> str:
+    participants = sorted(
+        [(str(tutor.user_id), 'tutor', tutor.is_leader) for tutor in request.tutors]
+        + [(str(student.user_id), 'student', False) for student in request.students]
+    )
+    not_before = request.not_before.isoformat() if request.not_before else None
+    return json.dumps([request.lesson_id, participants, not_before])
+
+
+def _first_launch(to_launch: list) -> int:
+    # The lesson leader creates the room; tutors are listed first so a lesson
+    # without a leader falls back to its first tutor, then its first student.
+    return next(
+        (position for position, (*_, leader) in enumerate(to_launch) if leader), 0
+    )
+
+
+def batch_concurrency(settings) -> int:
+    """Lessons of a batch provisioned at once, leaving a pooled connection spare."""
+    pool_capacity = settings.db_pool_size + settings.db_max_overflow
+    return max(1, min(settings.lessonspace_batch_concurrency, pool_capacity - 1))
+
+
+def create_lesson_semaphore(settings) -> asyncio.Semaphore:
+    """Limit on batch lessons provisioned at once, shared by the whole worker."""
+    return asyncio.Semaphore(batch_concurrency(settings))
+
+
+def get_lesson_semaphore(request: Request) -> Optional[asyncio.Semaphore]:
+    """FastAPI dependency returning the worker's batch limit, if the lifespan created one."""
+    return getattr(request.app.state, 'lesson_semaphore', None)
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
 class LessonspaceService:
-    def __init__(self):
+    def __init__(
+        self,
+        http_client: Annotated[
+            Optional[httpx.AsyncClient], Depends(get_http_client)
+        ] = None,
+        launch_scheduler: Annotated[
+            Optional[LaunchScheduler], Depends(get_launch_scheduler)
+        ] = None,
+        lesson_semaphore: Annotated[
+            Optional[asyncio.Semaphore], Depends(get_lesson_semaphore)
+        ] = None,
+    ):
+        self.http_client = http_client
+        self.launch_scheduler = launch_scheduler or LaunchScheduler(
+            LocalTokenBucket(
+                rate=settings.lessonspace_rate_limit,
+                capacity=settings.lessonspace_rate_burst,
+            ),
+            max_retries=settings.lessonspace_max_retries,
+            backoff=settings.lessonspace_retry_backoff,
+            backoff_max=settings.lessonspace_retry_backoff_max,
+        )
+        self.circuit_breaker = lessonspace_breaker
+        self.timeout = httpx.Timeout(
+            settings.lessonspace_timeout, connect=settings.lessonspace_connect_timeout
+        )
         self.api_key = settings.lessonspace_api_key
         self.base_url = settings.lessonspace_api_url
         self.headers = {'Authorization': f'Organisation {self.api_key}'}
+        # Bounds concurrent launches across every lesson handled by this
+        # instance, including all lessons of a batch request.
+        self.launch_semaphore = asyncio.Semaphore(
+            settings.lessonspace_launch_concurrency
+        )
+        # Bounds the batch lessons provisioned at once across the worker, so
+        # the sessions of concurrent batches together fit in the async pool.
+        self.lesson_semaphore = lesson_semaphore or create_lesson_semaphore(settings)
+
+    async def _limited(self, coro):
+        async with self.launch_semaphore:
+            return await coro
 
     async def _create_user_space(
-        self, db, client, lesson_id, user, role, leader: bool, not_before=None
+        self, client, lesson_id, user, role, leader: bool, not_before=None
     ):
         request = LessonSpaceRequest(
             id=lesson_id,
@@ -50,16 +160,22 @@ class LessonspaceService:
         if not_before:
             request.timeouts = {'not_before': not_before.isoformat()}
 
-        resp = await client.post(
-            f'{self.base_url}/spaces/launch/',
-            headers=self.headers,
-            json=request.to_dict(),
+        # Server errors and timeouts count against the breaker; 429s are left
+        # to the scheduler's backoff.
+        resp = await self.launch_scheduler.send(
+            lambda: self.circuit_breaker.call(
+                lambda: client.post(
+                    f'{self.base_url}/spaces/launch/',
+                    headers=self.headers,
+                    json=request.to_dict(),
+                    timeout=self.timeout,
+                ),
+                is_failure=lambda response: response.status_code >= 500,
+            )
         )
         resp.raise_for_status()
         data = resp.json()
 
-        get_or_create_space(db, lesson_id, data['room_id'])
-        create_or_update_user_space(db, user.user_id, lesson_id, role, leader)
         return UserSpace(
             user_id=user.user_id,
             name=user.name,
@@ -68,60 +184,81 @@ class LessonspaceService:
             leader=leader,
         ), data['room_id']
 
-    async def get_or_create_space(
-        self, request: SpaceRequest, db: Optional[Session] = None
-    ) -> SpaceResponse:
-        try:
-            async with httpx.AsyncClient() as client:
-                tasks = []
-                for tutor in request.tutors:
-                    tasks.append(
-                        self._create_user_space(
-                            db,
-                            client,
-                            request.lesson_id,
-                            tutor,
-                            'tutor',
-                            tutor.is_leader,
-                            request.not_before,
-                        )
-                    )
-                for student in request.students:
-                    tasks.append(
-                        self._create_user_space(
-                            db,
-                            client,
-                            request.lesson_id,
-                            student,
-                            'student',
-                            False,
-                            request.not_before,
-                        )
+    async def _launch_participants(
+        self, request: SpaceRequest, to_launch: list, space_id: Optional[str]
+    ):
+        """Launch ``to_launch`` participants, establishing the room first if needed.
+
+        When the lesson has no room yet, the leader is launched on its own so
+        its ``room_id`` becomes the space id, then everyone else is launched in
+        parallel against that room. Fan-out failures are returned rather than
+        raised so the successful launches can still be stored.
+        """
+        launched = []
+        timings = {}
+        async with client_session(self.http_client) as client:
+
+            def launch(user, role, leader):
+                return self._limited(
+                    self._create_user_space(
+                        client,
+                        request.lesson_id,
+                        user,
+                        role,
+                        leader,
+                        request.not_before,
                     )
-                results = await asyncio.gather(*tasks)
-                user_spaces, room_ids = zip(*results)
-                tutor_spaces = [us for us in user_spaces if us.role == 'tutor']
-                student_spaces = [us for us in user_spaces if us.role == 'student']
-                space_id = room_ids[0] if room_ids else None
-                space_response = SpaceResponse(
-                    space_id=space_id,
-                    lesson_id=request.lesson_id,
-                    tutor_spaces=tutor_spaces,
-                    student_spaces=student_spaces,
                 )
 
-                logger.info(
-                    '[LessonSpaceService] created new space',
-                    lesson_id=request.lesson_id,
-                    space_id=space_id,
-                    tutor_count=len(tutor_spaces),
-                    student_count=len(student_spaces),
-                    not_before=request.not_before.isoformat()
-                    if request.not_before
-                    else None,
-                )
+            pending = list(to_launch)
+            if space_id is None:
+                first = _first_launch(pending)
+                index, user, role, leader = pending.pop(first)
+                started = time.perf_counter()
+                user_space, space_id = await launch(user, role, leader)
+                timings['first_launch_ms'] = _elapsed_ms(started)
+                launched.append((index, user_space))
+
+            started = time.perf_counter()
+            results = await asyncio.gather(
+                *[launch(user, role, leader) for _, user, role, leader in pending],
+                return_exceptions=True,
+            )
+            timings['fan_out_ms'] = _elapsed_ms(started)
+
+        errors = []
+        for (index, *_), result in zip(pending, results):
+            if isinstance(result, BaseException):
+                errors.append(result)
+            else:
+                launched.append((index, result[0]))
+        return space_id, launched, errors, timings
 
-                return space_response
+    async def get_or_create_space(
+        self, request: SpaceRequest, db: Optional[AsyncSession] = None
+    ) -> SpaceResponse:
+        """Return launch URLs for every participant of the lesson.
+
+        Concurrent calls for the same lesson and participants are coalesced
+        within the worker, and a Postgres advisory lock on the lesson makes
+        other workers wait for the leader and then read its stored URLs.
+        """
+        try:
+            return await _in_flight.do(
+                _flight_key(request),
+                lambda: self._locked_get_or_create_space(request, db),
+            )
+        except CircuitOpenError as e:
+            logger.warning(
+                '[LessonSpaceService] Lessonspace circuit is open',
+                lesson_id=request.lesson_id,
+                retry_in=round(e.retry_in, 1),
+            )
+            raise HTTPException(
+                status_code=503,
+                detail='Lessonspace is unavailable, try again shortly',
+                headers={'Retry-After': str(max(1, math.ceil(e.retry_in)))},
+            )
         except Exception as e:
             logger.error(
                 '[LessonSpaceService] error in get_or_create_space',
@@ -131,3 +268,154 @@ class LessonspaceService:
             raise HTTPException(
                 status_code=500, detail='Internal server error: ' + str(e)
             )
+
+    async def _locked_get_or_create_space(
+        self, request: SpaceRequest, db: Optional[AsyncSession]
+    ) -> SpaceResponse:
+        if db is None:
+            return await self._get_or_create_space(request, db)
+        # The work is shared by coalesced callers and outlives a cancelled
+        # leader, so it gets its own session rather than the leader's, which
+        # is closed once that client goes away. The lock is taken on it too,
+        # so a lesson being provisioned holds one pooled connection, and is
+        # released when its launches are committed.
+        async with AsyncSession(db.bind, expire_on_commit=False) as session:
+            async with advisory_lock(
+                session,
+                SPACE_LOCK_NAMESPACE,
+                request.lesson_id,
+                timeout=settings.space_lock_timeout,
+            ):
+                return await self._get_or_create_space(request, session)
+
+    async def _get_or_create_space(
+        self, request: SpaceRequest, db: Optional[AsyncSession]
+    ) -> SpaceResponse:
+        participants = [
+            (tutor, 'tutor', tutor.is_leader) for tutor in request.tutors
+        ] + [(student, 'student', False) for student in request.students]
+
+        # Participants whose stored launch URL is still valid are answered
+        # from the database; only new or expired ones go to Lessonspace.
+        space = await get_space(request.lesson_id, db) if db is not None else None
+        stored = (
+            {str(us.user_id): us for us in await get_user_spaces(request.lesson_id, db)}
+            if space
+            else {}
+        )
+        user_spaces = {}
+        to_launch = []
+        for index, (user, role, leader) in enumerate(participants):
+            user_space = stored.get(str(user.user_id))
+            if user_space and user_space.has_valid_client_url(
+                role, leader, request.not_before
+            ):
+                user_spaces[index] = UserSpace(
+                    user_id=user.user_id,
+                    name=user.name,
+                    role=role,
+                    space_url=user_space.client_url,
+                    leader=leader,
+                )
+            else:
+                to_launch.append((index, user, role, leader))
+
+        space_id = space.lesson_space_id if space else None
+        timings = {}
+        stale_count = 0
+        if to_launch:
+            try:
+                space_id, launched, errors, timings = await self._launch_participants(
+                    request, to_launch, space_id
+                )
+            except CircuitOpenError as e:
+                launched, errors = [], [e]
+            # Launch results are persisted together once the fan-out is done,
+            # keeping successful launches even if another participant failed.
+            if db is not None and launched:
+                await save_space_launches(
+                    db,
+                    request.lesson_id,
+                    space_id,
+                    [user_space for _, user_space in launched],
+                    client_url_expires_at=datetime.now(timezone.utc)
+                    + timedelta(seconds=settings.lessonspace_client_url_ttl),
+                    not_before=request.not_before,
+                )
+            for index, user_space in launched:
+                user_spaces[index] = user_space
+            if errors:
+                circuit_open = next(
+                    (e for e in errors if isinstance(e, CircuitOpenError)), None
+                )
+                if circuit_open is None:
+                    raise errors[0]
+                # Lessonspace is down: fall back to stored URLs, even expired
+                # ones, rather than failing the whole lesson.
+                for index, user, role, leader in to_launch:
+                    if index in user_spaces:
+                        continue
+                    user_space = stored.get(str(user.user_id))
+                    if not (user_space and user_space.client_url):
+                        raise circuit_open
+                    user_spaces[index] = UserSpace(
+                        user_id=user.user_id,
+                        name=user.name,
+                        role=role,
+                        space_url=user_space.client_url,
+                        leader=leader,
+                    )
+                    stale_count += 1
+
+        ordered = [user_spaces[index] for index in range(len(participants))]
+        tutor_spaces = [us for us in ordered if us.role == 'tutor']
+        student_spaces = [us for us in ordered if us.role == 'student']
+        space_response = SpaceResponse(
+            space_id=space_id,
+            lesson_id=request.lesson_id,
+            tutor_spaces=tutor_spaces,
+            student_spaces=student_spaces,
+        )
+
+        logger.info(
+            '[LessonSpaceService] created new space'
+            if to_launch
+            else '[LessonSpaceService] served space from stored urls',
+            lesson_id=request.lesson_id,
+            space_id=space_id,
+            tutor_count=len(tutor_spaces),
+            student_count=len(student_spaces),
+            launched_count=len(to_launch) - stale_count,
+            stale_count=stale_count,
+            **timings,
+            not_before=request.not_before.isoformat() if request.not_before else None,
+        )
+
+        return space_response
+
+    async def create_spaces(
+        self, requests: list[SpaceRequest], db: Optional[AsyncSession] = None
+    ) -> BatchSpaceResponse:
+        """Provision many lessons at once, reporting failures per lesson.
+
+        ``get_or_create_space`` runs each lesson on its own session on the same
+        engine as ``db``, so they can run concurrently. Only
+        ``lesson_semaphore`` lessons run at once, as each holds a pooled
+        connection until its launches are stored.
+        """
+
+        async def _provision(request: SpaceRequest) -> BatchSpaceResult:
+            try:
+                async with self.lesson_semaphore:
+                    space = await self.get_or_create_space(request, db)
+            except HTTPException as e:
+                return BatchSpaceResult(lesson_id=request.lesson_id, error=e.detail)
+            return BatchSpaceResult(lesson_id=request.lesson_id, space=space)
+
+        results = await asyncio.gather(*[_provision(request) for request in requests])
+        logger.info(
+            '[LessonSpaceService] provisioned batch',
+            lesson_count=len(results),
+            failed_count=sum(1 for result in results if result.error),
+        )
+        return BatchSpaceResponse(results=results)
@@ -0,0 +1,137 @@
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Annotated, Optional
+
+from fastapi import Depends
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.dal.prewarm_async import claim_due_launches, save_launches, schedule_launches
+from app.schema.space import (
+    MAX_BATCH_SIZE,
+    PrewarmResponse,
+    ScheduledLaunchResponse,
+    SpaceRequest,
+)
+from app.services.lessonspace import LessonspaceService
+from app.utils.dates import as_utc
+from app.utils.logging import logger
+from app.utils.settings import get_settings
+
+settings = get_settings()
+
+
+def prewarm_launch_at(
+    lesson_id: str, not_before: datetime, now: Optional[datetime] = None
+) -> datetime:
+    """When to launch a lesson's spaces ahead of ``not_before``.
+
+    Lessons are spread evenly across ``prewarm_window`` seconds ending
+    ``prewarm_lead_time`` seconds before they start, using a hash of the
+    lesson id so the same lesson always gets the same slot. The slot is
+    never earlier than the stored URLs could expire by ``not_before``, and
+    never in the past.
+    """
+    now = now or datetime.now(timezone.utc)
+    not_before = as_utc(not_before)
+    window = max(1, settings.prewarm_window)
+    window_start = not_before - timedelta(
+        seconds=settings.prewarm_lead_time + settings.prewarm_window
+    )
+    launch_at = window_start + timedelta(
+        seconds=zlib.crc32(lesson_id.encode()) % window
+    )
+    earliest_valid = not_before - timedelta(
+        seconds=settings.lessonspace_client_url_ttl - settings.prewarm_lead_time
+    )
+    return max(launch_at, earliest_valid, now)
+
+
+def prewarm_batch_limit() -> int:
+    """Most due lessons claimed at once, the same cap as a batch request.
+
+    ``create_spaces`` provisions them ``batch_concurrency`` at a time, so a
+    full batch never needs more connections than the async pool holds.
+    """
+    return max(1, min(settings.prewarm_batch_size, MAX_BATCH_SIZE))
+
+
+class PrewarmService:
+    def __init__(
+        self,
+        lessonspace: Annotated[
+            Optional[LessonspaceService], Depends(LessonspaceService)
+        ] = None,
+    ):
+        self.lessonspace = lessonspace
+
+    async def schedule(
+        self, requests: list[SpaceRequest], db: AsyncSession
+    ) -> PrewarmResponse:
+        now = datetime.now(timezone.utc)
+        launches = [
+            (request, prewarm_launch_at(request.lesson_id, request.not_before, now))
+            for request in requests
+            if request.not_before
+        ]
+        scheduled = await schedule_launches(db, launches) if launches else []
+        skipped = [request.lesson_id for request in requests if not request.not_before]
+        logger.info(
+            '[PrewarmService] scheduled lessons',
+            scheduled_count=len(scheduled),
+            skipped_count=len(skipped),
+        )
+        return PrewarmResponse(
+            scheduled=[
+                ScheduledLaunchResponse(
+                    lesson_id=request.lesson_id, launch_at=launch_at
+                )
+                for request, launch_at in launches
+            ],
+            skipped=skipped,
+        )
+
+    async def run_due(self, db: AsyncSession) -> int:
+        """Launch every due lesson and store the URLs; returns how many were claimed."""
+        now = datetime.now(timezone.utc)
+        launches = await claim_due_launches(
+            db,
+            now,
+            limit=prewarm_batch_limit(),
+            stale_before=now - timedelta(seconds=settings.prewarm_claim_timeout),
+        )
+        if not launches:
+            return 0
+
+        lessonspace = self.lessonspace or LessonspaceService()
+        response = await lessonspace.create_spaces(
+            [launch.to_space_request() for launch in launches], db
+        )
+        errors = {result.lesson_id: result.error for result in response.results}
+        for launch in launches:
+            error = errors.get(launch.lesson_id)
+            launch.claimed_at = None
+            launch.last_error = error
+            if error is None:
+                launch.status = 'launched'
+                continue
+            retry_at = now + timedelta(
+                seconds=settings.prewarm_retry_delay * launch.attempts
+            )
+            not_before = as_utc(launch.to_space_request().not_before)
+            if (
+                launch.attempts < settings.prewarm_max_attempts
+                and retry_at < not_before
+            ):
+                launch.status = 'pending'
+                launch.launch_at = retry_at
+            else:
+                # Participants will be launched when they join instead.
+                launch.status = 'failed'
+        await save_launches(db, launches)
+
+        logger.info(
+            '[PrewarmService] launched due lessons',
+            claimed_count=len(launches),
+            failed_count=sum(1 for launch in launches if launch.last_error),
+        )
+        return len(launches)
@@ -1,41 +1,106 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Annotated, AsyncIterator, Optional
+
 import httpx
-from fastapi import HTTPException
+from fastapi import Depends, HTTPException
 from app.utils.settings import get_settings
 from app.schema.space import TranscriptionWebhook
-from app.dal.transcript import (
+from app.schema.transcript import TranscriptSegmentPage
+from app.dal.transcript_async import (
+    claim_transcript,
     create_feedback,
     create_summary,
-    create_transcript,
+    finish_transcript,
     get_feedback,
+    get_segments,
+    get_speaker_transcripts,
     get_summary,
     get_transcript,
+    get_transcript_by_hash,
     get_user_spaces,
+    save_segments,
+    save_speaker_transcripts,
 )
-from app.models.transcript import Transcript
-from sqlmodel import Session
+from app.models.transcript import SpeakerTranscript, Transcript, TranscriptBuilder
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.ai_tool.agents import (
     ChapterAgent,
     StudentFeedbackAgent,
     SummaryAgent,
     TutorFeedbackAgent,
 )
+from app.db.session import get_async_session_factory
+from app.utils.http import client_session, get_http_client
+from app.utils.json_stream import JSONArrayStream
 from app.utils.logging import logger
+from app.utils.metrics import metrics
 
 settings = get_settings()
 
 
+class TranscriptInProgressError(Exception):
+    """Raised for a delivery of a transcript another worker is processing."""
+
+    def __init__(self, lesson_id: str):
+        super().__init__(
+            f'Transcript for lesson {lesson_id} is being processed elsewhere'
+        )
+        self.lesson_id = lesson_id
+
+
 class TranscriptionService:
-    def __init__(self):
+    """Stores transcripts and runs the post-lesson agents.
+
+    Methods that await the agents open a short-lived session from
+    ``session_factory`` for each database step instead of taking the request
+    session, so no pooled connection is held while an LLM call is running.
+    """
+
+    def __init__(
+        self,
+        http_client: Annotated[
+            Optional[httpx.AsyncClient], Depends(get_http_client)
+        ] = None,
+        session_factory: Annotated[
+            Optional[async_sessionmaker], Depends(get_async_session_factory)
+        ] = None,
+    ):
+        self.http_client = http_client
+        self.session_factory = session_factory or get_async_session_factory()
         self.api_key = settings.lessonspace_api_key
         self.base_url = settings.lessonspace_api_url
         self.headers = {'Authorization': f'Organisation {self.api_key}'}
+        self.download_timeout = httpx.Timeout(
+            settings.transcript_download_timeout,
+            connect=settings.transcript_download_connect_timeout,
+        )
 
-    async def download_transcription(self, transcription_url: str) -> dict:
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(transcription_url)
+    async def stream_transcription(self, transcription_url: str) -> AsyncIterator[dict]:
+        """Yield the transcript's segments as they are downloaded.
+
+        The body is parsed chunk by chunk, so neither the raw bytes nor the
+        decoded text of the whole transcript are ever held in memory.
+        """
+        parser = JSONArrayStream()
+        async with client_session(self.http_client) as client:
+            async with client.stream(
+                'GET', transcription_url, timeout=self.download_timeout
+            ) as response:
                 response.raise_for_status()
-                return response.json()
+                async for chunk in response.aiter_bytes():
+                    for segment in parser.feed(chunk):
+                        yield segment
+        for segment in parser.close():
+            yield segment
+
+    async def download_transcription(self, transcription_url: str) -> TranscriptBuilder:
+        """The transcript's hash and stored form, built as its segments arrive."""
+        transcript = TranscriptBuilder()
+        try:
+            async for segment in self.stream_transcription(transcription_url):
+                transcript.add(segment)
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 403:
                 logger.error(
@@ -64,21 +129,30 @@ class TranscriptionService:
             raise HTTPException(
                 status_code=500, detail='Failed to download transcription: ' + str(e)
             )
+        return transcript
 
     async def handle_webhook(
-        self, webhook: TranscriptionWebhook, lesson_id: str, db: Session
+        self, webhook: TranscriptionWebhook, lesson_id: str
     ) -> None:
+        """Store the transcript and run the agents on it, once per distinct transcript.
+
+        Deliveries are matched on the lesson and a hash of the downloaded
+        segments. A transcript that was already processed is skipped without
+        calling the agents; one being processed by another worker raises
+        ``TranscriptInProgressError``, so the job is deferred.
+        """
         try:
-            transcription_data = await self.download_transcription(
-                webhook.transcriptionUrl
-            )
-            transcript = create_transcript(db, lesson_id, transcription_data)
-            logger.info(
-                '[TranscriptionService] stored transcription',
-                lesson_id=lesson_id,
-                transcript_id=transcript.id,
-                transcription_length=len(transcription_data),
+            downloaded = await self.download_transcription(webhook.transcriptionUrl)
+            content_hash = downloaded.content_hash
+            stale_before = datetime.now(timezone.utc) - timedelta(
+                seconds=settings.transcription_claim_timeout
             )
+            async with self.session_factory() as db:
+                transcript = await claim_transcript(
+                    db,
+                    downloaded.build(lesson_id=lesson_id, content_hash=content_hash),
+                    stale_before,
+                )
         except Exception as e:
             logger.error(
                 '[TranscriptionService] error handling webhook',
@@ -88,47 +162,160 @@ class TranscriptionService:
             raise HTTPException(
                 status_code=500, detail='Failed to process transcription: ' + str(e)
             )
+        if transcript is None:
+            async with self.session_factory() as db:
+                existing = await get_transcript_by_hash(lesson_id, content_hash, db)
+            metrics.increment('transcription.duplicate_deliveries')
+            if existing.processed_at is None:
+                # Raised so the job runs again later, and picks the transcript
+                # up if that worker dies.
+                raise TranscriptInProgressError(lesson_id)
+            logger.info(
+                '[TranscriptionService] transcription already processed, skipping',
+                lesson_id=lesson_id,
+                content_hash=content_hash,
+            )
+            return
+        logger.info(
+            '[TranscriptionService] stored transcription',
+            lesson_id=lesson_id,
+            transcript_id=transcript.id,
+            transcription_length=downloaded.segment_count,
+        )
+
+        processed = False
+        try:
+            await self._materialize(transcript)
+            failed = await self._run_agents(transcript, lesson_id)
+            processed = not failed
+        finally:
+            async with self.session_factory() as db:
+                await finish_transcript(db, transcript.id, processed=processed)
+        if failed:
+            raise RuntimeError(
+                f'Agent tasks failed for lesson {lesson_id}: {", ".join(failed)}'
+            )
+
+    async def _materialize(self, transcript: Transcript) -> None:
+        """Store the segment rows and per-speaker text read after ingest."""
+        async with self.session_factory() as db:
+            users = await get_user_spaces(transcript.lesson_id, db)
+            speakers = transcript.gather_user_transcripts(
+                {user.user_id: user for user in users}
+            )
+            await save_segments(db, transcript)
+            await save_speaker_transcripts(db, transcript, speakers)
+
+    async def _run_agents(self, transcript: Transcript, lesson_id: str) -> list[str]:
+        """Store the summary and feedback not yet stored for ``transcript``.
 
-        summary = await SummaryAgent().summarize_lesson(transcript)
-        create_summary(db, lesson_id, summary)
+        Returns the names of the tasks that failed.
+        """
+        async with self.session_factory() as db:
+            speakers = await get_speaker_transcripts(lesson_id, db)
+            # Results stored by an earlier, partly failed, run on this
+            # transcript are kept rather than generated again.
+            summary = await get_summary(lesson_id, db)
+            feedback = await get_feedback(lesson_id, db)
+        has_summary = (
+            summary is not None and summary.created_at >= transcript.created_at
+        )
+        has_feedback = {
+            row.user_id for row in feedback if row.created_at >= transcript.created_at
+        }
+
+        # The agent calls are independent, so they run side by side, and one
+        # failing doesn't stop the others from being stored.
+        semaphore = asyncio.Semaphore(settings.transcription_agent_concurrency)
+        tasks = {}
+        if not has_summary:
+            tasks['summary'] = self._summarize(transcript, lesson_id, semaphore)
+        for speaker in speakers:
+            if speaker.user_id not in has_feedback:
+                tasks[f'feedback:{speaker.user_id}'] = self._give_feedback(
+                    lesson_id, speaker, semaphore
+                )
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        failed = []
+        for name, result in zip(tasks, results):
+            if isinstance(result, Exception):
+                failed.append(name)
+                logger.error(
+                    '[TranscriptionService] agent task failed',
+                    lesson_id=lesson_id,
+                    task=name,
+                    error=str(result),
+                )
+        return failed
 
-        users = get_user_spaces(lesson_id, db)
-        users_lookup = {user.user_id: user for user in users}
-        user_transcripts = transcript.gather_user_transcripts(users_lookup)
+    async def _summarize(
+        self, transcript: Transcript, lesson_id: str, semaphore: asyncio.Semaphore
+    ) -> None:
+        async with semaphore:
+            summary = await SummaryAgent().summarize_lesson(transcript)
+        async with self.session_factory() as db:
+            await create_summary(db, lesson_id, summary)
 
-        for user_id, user_transcript in user_transcripts.items():
-            if user_transcript['role'] == 'tutor':
-                agent = TutorFeedbackAgent(tutors_name=user_transcript['name'])
-            else:
-                agent = StudentFeedbackAgent(students_name=user_transcript['name'])
+    async def _give_feedback(
+        self,
+        lesson_id: str,
+        speaker: SpeakerTranscript,
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        if speaker.role == 'tutor':
+            agent = TutorFeedbackAgent(tutors_name=speaker.name)
+        else:
+            agent = StudentFeedbackAgent(students_name=speaker.name)
+        async with semaphore:
             strengths, improvements = await agent.provide_feedback_with_str(
-                user_transcript['text']
+                speaker.text
             )
-            create_feedback(
+        async with self.session_factory() as db:
+            await create_feedback(
                 db,
                 lesson_id,
-                user_id,
-                user_transcript['role'],
+                speaker.user_id,
+                speaker.role,
                 strengths,
                 improvements,
             )
 
-    async def get_transcript_by_id(self, lesson_id: str, db: Session) -> Transcript:
-        transcript = get_transcript(lesson_id, db)
+    async def get_transcript_by_id(
+        self, lesson_id: str, db: AsyncSession
+    ) -> Transcript:
+        transcript = await get_transcript(lesson_id, db)
         if not transcript:
             raise HTTPException(
                 status_code=404,
                 detail=f'Transcript not found for lesson ID: {lesson_id}',
             )
 
-    async def get_lesson_summary(self, lesson_id: str, db: Session) -> dict[str, list]:
-        if transcript := get_transcript(lesson_id, db):
-            transcription = transcript.transcription
+    async def get_segments(
+        self,
+        lesson_id: str,
+        db: AsyncSession,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        user_id: Optional[int] = None,
+        after: Optional[int] = None,
+        limit: int = 100,
+    ) -> TranscriptSegmentPage:
+        """A page of the lesson's stored segments, read without loading the transcript."""
+        segments = await get_segments(lesson_id, db, start, end, user_id, after, limit)
+        return TranscriptSegmentPage(
+            segments=[segment.to_schema() for segment in segments],
+            next_cursor=segments[-1].position if len(segments) == limit else None,
+        )
+
+    async def get_lesson_summary(self, lesson_id: str) -> dict[str, list]:
+        async with self.session_factory() as db:
+            if transcript := await get_transcript(lesson_id, db):
+                transcription = transcript.segments
 
-        if summary := get_summary(lesson_id, db):
-            summary = summary.to_schema()
+            if summary := await get_summary(lesson_id, db):
+                summary = summary.to_schema()
 
-        feedback = get_feedback(lesson_id, db)
+            feedback = await get_feedback(lesson_id, db)
         feedback = [
             {
                 'user_id': feedback.user_id,
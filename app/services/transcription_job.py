@@ -0,0 +1,190 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Annotated, Optional
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.dal.transcription_job import claim_due_jobs, enqueue_job, save_jobs
+from app.db.session import get_async_session_factory
+from app.models.transcription_job import TranscriptionJob
+from app.schema.space import TranscriptionJobResponse, TranscriptionWebhook
+from app.services.transcription import (
+    TranscriptInProgressError,
+    TranscriptionService,
+)
+from app.utils.logging import logger
+from app.utils.metrics import metrics
+from app.utils.settings import get_settings
+
+settings = get_settings()
+
+
+class TranscriptionJobService:
+    """Queues transcription webhooks and runs them from the transcription worker.
+
+    The webhook only stores a job, so Lessonspace gets its response straight
+    away; the download and agent calls happen in ``run_due``.
+    """
+
+    def __init__(
+        self,
+        transcription: Annotated[
+            Optional[TranscriptionService], Depends(TranscriptionService)
+        ] = None,
+        session_factory: Annotated[
+            Optional[async_sessionmaker], Depends(get_async_session_factory)
+        ] = None,
+    ):
+        self.session_factory = session_factory or get_async_session_factory()
+        self.transcription = transcription or TranscriptionService(
+            session_factory=self.session_factory
+        )
+        # Jobs being run, one per slot of ``transcription_concurrency``.
+        self.running: set[asyncio.Task] = set()
+        self.slot_freed = asyncio.Event()
+
+    async def enqueue(
+        self, webhook: TranscriptionWebhook, lesson_id: str, db: AsyncSession
+    ) -> TranscriptionJobResponse:
+        job = await enqueue_job(db, lesson_id, webhook)
+        metrics.increment('transcription_jobs.enqueued')
+        logger.info(
+            '[TranscriptionJobService] queued webhook',
+            lesson_id=lesson_id,
+            job_id=job.id,
+        )
+        return TranscriptionJobResponse(
+            job_id=job.id, lesson_id=lesson_id, status=job.status
+        )
+
+    @property
+    def free_slots(self) -> int:
+        return max(settings.transcription_concurrency - len(self.running), 0)
+
+    async def start_due(self) -> int:
+        """Claim a due job for each free slot and start it; returns how many started.
+
+        Jobs are claimed and saved in short sessions, so no connection is held
+        while they run.
+        """
+        self.slot_freed.clear()
+        if not self.free_slots:
+            return 0
+        now = datetime.now(timezone.utc)
+        async with self.session_factory() as db:
+            jobs = await claim_due_jobs(
+                db,
+                now,
+                limit=self.free_slots,
+                stale_before=now
+                - timedelta(seconds=settings.transcription_claim_timeout),
+            )
+        for job in jobs:
+            task = asyncio.create_task(self._run(job))
+            self.running.add(task)
+            task.add_done_callback(self._slot_done)
+        return len(jobs)
+
+    def _slot_done(self, task: asyncio.Task) -> None:
+        self.running.discard(task)
+        self.slot_freed.set()
+
+    async def wait_for_slot(self, stop: asyncio.Event, poll_interval: float) -> None:
+        """Wait until a job finishes or ``stop`` is set.
+
+        While a slot is free, nothing more was due when it was last claimed
+        for, so this also returns after ``poll_interval`` seconds.
+        """
+        timeout = poll_interval if self.free_slots else None
+        waiters = [
+            asyncio.ensure_future(stop.wait()),
+            asyncio.ensure_future(self.slot_freed.wait()),
+        ]
+        try:
+            await asyncio.wait(
+                waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
+    async def drain(self) -> None:
+        """Wait for every running job to finish."""
+        await asyncio.gather(*self.running)
+
+    async def run_due(self) -> int:
+        """Run up to ``transcription_concurrency`` due jobs to completion.
+
+        Returns how many were claimed.
+        """
+        started = await self.start_due()
+        await self.drain()
+        return started
+
+    async def _run(self, job: TranscriptionJob) -> None:
+        started = time.perf_counter()
+        if job.reclaims >= settings.transcription_max_attempts:
+            # Claimed again after the workers running it died too many times.
+            self._fail(job, 'worker stopped while running the job')
+        else:
+            try:
+                await self.transcription.handle_webhook(job.to_webhook(), job.lesson_id)
+            except TranscriptInProgressError as e:
+                self._defer(job, str(e))
+            except Exception as e:
+                self._fail(job, str(e) or e.__class__.__name__)
+            else:
+                job.status = 'done'
+                job.last_error = None
+                metrics.increment('transcription_jobs.done')
+        job.claimed_at = None
+        async with self.session_factory() as db:
+            await save_jobs(db, [job])
+        metrics.observe(
+            'transcription_jobs.run_ms', (time.perf_counter() - started) * 1000
+        )
+
+    def _defer(self, job: TranscriptionJob, reason: str) -> None:
+        """Run ``job`` again later, without counting this run as an attempt."""
+        job.attempts -= 1
+        job.status = 'pending'
+        job.last_error = reason
+        job.run_at = datetime.now(timezone.utc) + timedelta(
+            seconds=settings.transcription_retry_delay
+        )
+        metrics.increment('transcription_jobs.deferred')
+        logger.info(
+            '[TranscriptionJobService] transcript busy, deferring job',
+            job_id=job.id,
+            lesson_id=job.lesson_id,
+            retry_in=settings.transcription_retry_delay,
+        )
+
+    def _fail(self, job: TranscriptionJob, error: str) -> None:
+        job.last_error = error
+        if job.attempts < settings.transcription_max_attempts:
+            delay = settings.transcription_retry_delay * 2 ** (job.attempts - 1)
+            job.status = 'pending'
+            job.run_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+            metrics.increment('transcription_jobs.retried')
+            logger.warning(
+                '[TranscriptionJobService] job failed, retrying',
+                job_id=job.id,
+                lesson_id=job.lesson_id,
+                attempts=job.attempts,
+                retry_in=delay,
+                error=error,
+            )
+        else:
+            job.status = 'dead'
+            metrics.increment('transcription_jobs.dead')
+            logger.error(
+                '[TranscriptionJobService] job dead-lettered',
+                job_id=job.id,
+                lesson_id=job.lesson_id,
+                attempts=job.attempts,
+                error=error,
+            )
@@ -0,0 +1,160 @@
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from app.utils.logging import logger
+from app.utils.metrics import Metrics, metrics as default_metrics
+
+T = TypeVar('T')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency while its breaker is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f'{name} circuit is open, retry in {retry_in:.1f}s')
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Stops calling a dependency that is failing or too slow.
+
+    The outcome of the last ``window_size`` calls is kept. Once at least
+    ``minimum_calls`` have been seen, the breaker opens when the share of
+    failures reaches ``failure_rate_threshold`` or the share of calls slower
+    than ``slow_call_duration`` seconds reaches ``slow_call_rate_threshold``.
+    While open every call fails fast with ``CircuitOpenError``. After
+    ``open_duration`` seconds up to ``half_open_calls`` probes are let
+    through: if they all succeed the breaker closes, and any failure opens it
+    again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        slow_call_duration: float = 5.0,
+        slow_call_rate_threshold: float = 0.8,
+        window_size: int = 20,
+        minimum_calls: int = 10,
+        open_duration: float = 30.0,
+        half_open_calls: int = 3,
+        metrics: Optional[Metrics] = None,
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.open_duration = open_duration
+        self.half_open_calls = half_open_calls
+        self.metrics = metrics or default_metrics
+        # (failed, slow) for each recent call.
+        self._outcomes: deque[tuple[bool, bool]] = deque(maxlen=window_size)
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        self.state = CLOSED
+        self.metrics.set_gauge(f'{self.name}.circuit.state', _STATE_VALUES[CLOSED])
+
+    def _transition(self, state: str, **fields) -> None:
+        if state == self.state:
+            return
+        logger.warning(
+            '[CircuitBreaker] state changed',
+            circuit=self.name,
+            from_state=self.state,
+            to_state=state,
+            **fields,
+        )
+        self.state = state
+        self._probes = 0
+        self._probe_successes = 0
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        elif state == CLOSED:
+            self._outcomes.clear()
+        self.metrics.set_gauge(f'{self.name}.circuit.state', _STATE_VALUES[state])
+        self.metrics.increment(f'{self.name}.circuit.{state}')
+
+    def _acquire(self) -> None:
+        if self.state == OPEN:
+            retry_in = self._opened_at + self.open_duration - time.monotonic()
+            if retry_in > 0:
+                self.metrics.increment(f'{self.name}.circuit.rejected')
+                raise CircuitOpenError(self.name, retry_in)
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._probes >= self.half_open_calls:
+                self.metrics.increment(f'{self.name}.circuit.rejected')
+                raise CircuitOpenError(self.name, 0)
+            self._probes += 1
+
+    def _record(self, probe: bool, failed: bool, duration: float) -> None:
+        slow = duration >= self.slow_call_duration
+        self.metrics.increment(f'{self.name}.calls')
+        self.metrics.observe(f'{self.name}.call_ms', duration * 1000)
+        if failed:
+            self.metrics.increment(f'{self.name}.failures')
+        if slow:
+            self.metrics.increment(f'{self.name}.slow_calls')
+
+        if probe:
+            if self.state != HALF_OPEN:
+                return
+            if failed or slow:
+                self._transition(OPEN, failed=failed, slow=slow)
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_calls:
+                self._transition(CLOSED)
+            return
+
+        if self.state != CLOSED:
+            return
+        self._outcomes.append((failed, slow))
+        count = len(self._outcomes)
+        if count < self.minimum_calls:
+            return
+        failure_rate = sum(1 for f, _ in self._outcomes if f) / count
+        slow_rate = sum(1 for _, s in self._outcomes if s) / count
+        if (
+            failure_rate >= self.failure_rate_threshold
+            or slow_rate >= self.slow_call_rate_threshold
+        ):
+            self._transition(
+                OPEN, failure_rate=round(failure_rate, 3), slow_rate=round(slow_rate, 3)
+            )
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        is_failure: Callable[[T], bool] = lambda _: False,
+    ) -> T:
+        """Run ``fn`` through the breaker.
+
+        Exceptions count as failures, as do results for which ``is_failure``
+        returns True; those results are still returned to the caller.
+        """
+        self._acquire()
+        probe = self.state == HALF_OPEN
+        started = time.monotonic()
+        try:
+            result = await fn()
+        except Exception:
+            self._record(probe, True, time.monotonic() - started)
+            raise
+        except BaseException:
+            # Cancelled calls say nothing about the dependency; free the probe.
+            if probe and self.state == HALF_OPEN:
+                self._probes -= 1
+            raise
+        self._record(probe, is_failure(result), time.monotonic() - started)
+        return result
@@ -0,0 +1,58 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import httpx
+from fastapi import Request
+
+from app.utils.settings import Settings, get_settings
+
+
+def create_http_client(settings: Optional[Settings] = None) -> httpx.AsyncClient:
+    """Build the pooled ``httpx.AsyncClient`` shared by every request in a worker.
+
+    Connections are kept alive between requests so repeat calls to Lessonspace
+    and S3 skip the TCP and TLS handshake. Hosts listed in
+    ``http_per_host_max_connections`` get their own transport so one busy
+    upstream cannot take every connection in the pool.
+    """
+    settings = settings or get_settings()
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+    mounts = {
+        pattern: httpx.AsyncHTTPTransport(
+            http2=settings.http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=min(
+                    max_connections, settings.http_max_keepalive_connections
+                ),
+                keepalive_expiry=settings.http_keepalive_expiry,
+            ),
+        )
+        for pattern, max_connections in settings.http_per_host_max_connections.items()
+    }
+    return httpx.AsyncClient(limits=limits, http2=settings.http2, mounts=mounts)
+
+
+def get_http_client(request: Request) -> Optional[httpx.AsyncClient]:
+    """FastAPI dependency returning the worker's shared client, if the lifespan created one."""
+    return getattr(request.app.state, 'http_client', None)
+
+
+@asynccontextmanager
+async def client_session(
+    client: Optional[httpx.AsyncClient] = None,
+) -> AsyncIterator[httpx.AsyncClient]:
+    """Yield ``client`` untouched, or a short-lived client when none is shared.
+
+    The shared client is owned by the application lifespan so it is never
+    closed here.
+    """
+    if client is not None:
+        yield client
+    else:
+        async with httpx.AsyncClient() as fresh_client:
+            yield fresh_client
@@ -0,0 +1,76 @@
+import codecs
+import json
+from typing import Any
+
+_NUMBER_TAIL = set('0123456789.eE+-')
+
+
+class JSONArrayStream:
+    """Decodes the items of a top-level JSON array from chunks of bytes.
+
+    Items are returned as soon as they are complete, and the text they came
+    from is dropped, so memory is bounded by one chunk plus the item being
+    read rather than by the size of the document.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        # What comes next: '[' (start), an item or ']' (first), an item
+        # (item), ',' or ']' (separator), or nothing (done).
+        self._state = 'start'
+
+    def feed(self, chunk: bytes) -> list[Any]:
+        self._buffer += self._text.decode(chunk)
+        return self._drain(final=False)
+
+    def close(self) -> list[Any]:
+        """Decode what is left; raises ``ValueError`` if the array is incomplete."""
+        self._buffer += self._text.decode(b'', final=True)
+        items = self._drain(final=True)
+        if self._state != 'done':
+            raise ValueError('Incomplete JSON array')
+        return items
+
+    def _drain(self, final: bool) -> list[Any]:
+        items = []
+        buffer = self._buffer
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos == len(buffer):
+                break
+            char = buffer[pos]
+            if self._state == 'start':
+                if char != '[':
+                    raise ValueError(f'Expected a JSON array, got {char!r}')
+                self._state = 'first'
+                pos += 1
+            elif self._state == 'done':
+                raise ValueError(f'Unexpected data after JSON array: {char!r}')
+            elif char == ']' and self._state in ('first', 'separator'):
+                self._state = 'done'
+                pos += 1
+            elif self._state == 'separator':
+                if char != ',':
+                    raise ValueError(f'Expected "," or "]", got {char!r}')
+                self._state = 'item'
+                pos += 1
+            else:
+                try:
+                    item, end = self._decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    # The item continues in the next chunk.
+                    break
+                if not final and (end == len(buffer) or buffer[end] in _NUMBER_TAIL):
+                    # A number may go on in the next chunk ("1" of "1.5").
+                    break
+                items.append(item)
+                self._state = 'separator'
+                pos = end
+        self._buffer = buffer[pos:]
+        return items
@@ -0,0 +1,52 @@
+from collections import defaultdict
+from threading import Lock
+
+
+class Metrics:
+    """In-process counters, gauges and timings, exposed at ``/api/metrics``.
+
+    Each gunicorn worker keeps its own registry, so the endpoint reports the
+    worker that served the request.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._counters: dict[str, float] = defaultdict(float)
+        self._gauges: dict[str, float] = {}
+        self._timings: dict[str, dict[str, float]] = {}
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            timing = self._timings.setdefault(
+                name, {'count': 0, 'sum': 0.0, 'max': 0.0}
+            )
+            timing['count'] += 1
+            timing['sum'] += value
+            timing['max'] = max(timing['max'], value)
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'gauges': dict(self._gauges),
+                'timings': {
+                    name: dict(timing) for name, timing in self._timings.items()
+                },
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timings.clear()
+
+
+metrics = Metrics()
@@ -0,0 +1,210 @@
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, Protocol
+
+import httpx
+from fastapi import Request
+
+from app.utils.logging import logger
+from app.utils.settings import Settings, get_settings
+
+RETRY_STATUS_CODES = (429, 503)
+
+# Refills the bucket from Redis' own clock so every worker sees the same
+# state. Returns 0 when a token was taken, otherwise the milliseconds to wait.
+_REDIS_TOKEN_BUCKET = """
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local paused = redis.call('PTTL', key .. ':paused')
+if paused > 0 then
+    return paused
+end
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local state = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate / 1000)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) * 1000 / rate)
+end
+redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', key, math.ceil(capacity * 1000 / rate) + 1000)
+return wait
+"""
+
+
+class TokenBucket(Protocol):
+    async def acquire(self) -> None: ...
+
+    async def pause(self, seconds: float) -> None: ...
+
+    async def aclose(self) -> None: ...
+
+
+class LocalTokenBucket:
+    """In-process token bucket, used when Redis is not configured."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        # Waiters queue on the lock so tokens are handed out in arrival order.
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    async def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class RedisTokenBucket:
+    """Token bucket stored in Redis so the limit is shared by every worker."""
+
+    def __init__(self, redis, key: str, rate: float, capacity: int):
+        self.redis = redis
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity
+        self._script = redis.register_script(_REDIS_TOKEN_BUCKET)
+
+    async def acquire(self) -> None:
+        while True:
+            wait_ms = await self._script(
+                keys=[self.key], args=[self.rate, self.capacity]
+            )
+            if not wait_ms:
+                return
+            await asyncio.sleep(int(wait_ms) / 1000)
+
+    async def pause(self, seconds: float) -> None:
+        await self.redis.set(f'{self.key}:paused', 1, px=max(1, int(seconds * 1000)))
+
+    async def aclose(self) -> None:
+        await self.redis.aclose()
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Parse ``Retry-After`` given either as seconds or as an HTTP date."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class LaunchScheduler:
+    """Meters Lessonspace launch calls through a token bucket.
+
+    Responses with a 429 or 503 status pause the whole bucket for the
+    ``Retry-After`` delay (or a jittered exponential backoff when the header
+    is missing) and are retried up to ``max_retries`` times.
+    """
+
+    def __init__(
+        self,
+        bucket: TokenBucket,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        backoff_max: float = 10.0,
+    ):
+        self.bucket = bucket
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+
+    def _backoff_delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2**attempt))
+
+    async def send(
+        self, send: Callable[[], Awaitable[httpx.Response]]
+    ) -> httpx.Response:
+        attempt = 0
+        while True:
+            await self.bucket.acquire()
+            response = await send()
+            if (
+                response.status_code not in RETRY_STATUS_CODES
+                or attempt >= self.max_retries
+            ):
+                return response
+            retry_after = retry_after_seconds(response)
+            delay = (
+                retry_after + random.uniform(0, self.backoff)
+                if retry_after is not None
+                else self._backoff_delay(attempt)
+            )
+            logger.warning(
+                '[LaunchScheduler] rate limited by Lessonspace, retrying',
+                status_code=response.status_code,
+                retry_after=retry_after,
+                delay=round(delay, 3),
+                attempt=attempt + 1,
+            )
+            await self.bucket.pause(delay)
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self.bucket.aclose()
+
+
+def create_launch_scheduler(settings: Optional[Settings] = None) -> LaunchScheduler:
+    settings = settings or get_settings()
+    if settings.lessonspace_rate_limit_backend == 'redis':
+        import redis.asyncio as redis
+
+        bucket = RedisTokenBucket(
+            redis.from_url(settings.redis_url),
+            key='eurus:lessonspace:launch',
+            rate=settings.lessonspace_rate_limit,
+            capacity=settings.lessonspace_rate_burst,
+        )
+    else:
+        bucket = LocalTokenBucket(
+            rate=settings.lessonspace_rate_limit,
+            capacity=settings.lessonspace_rate_burst,
+        )
+    return LaunchScheduler(
+        bucket,
+        max_retries=settings.lessonspace_max_retries,
+        backoff=settings.lessonspace_retry_backoff,
+        backoff_max=settings.lessonspace_retry_backoff_max,
+    )
+
+
+def get_launch_scheduler(request: Request) -> Optional[LaunchScheduler]:
+    """FastAPI dependency returning the worker's scheduler, if the lifespan created one."""
+    return getattr(request.app.state, 'launch_scheduler', None)
@@ -0,0 +1,74 @@
+"""Pre-warm worker: launches scheduled lessons ahead of ``not_before``.
+
+Run with ``python -m app.workers.prewarm``.
+"""
+
+import asyncio
+import signal
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.session import async_engine
+from app.services.lessonspace import LessonspaceService, create_lesson_semaphore
+from app.services.prewarm import PrewarmService, prewarm_batch_limit
+from app.utils.http import create_http_client
+from app.utils.logging import logger
+from app.utils.rate_limit import create_launch_scheduler
+from app.utils.settings import get_settings
+
+settings = get_settings()
+
+
+async def run(stop: asyncio.Event | None = None) -> None:
+    stop = stop or asyncio.Event()
+    http_client = create_http_client(settings)
+    launch_scheduler = create_launch_scheduler(settings)
+    lesson_semaphore = create_lesson_semaphore(settings)
+    logger.info('[PrewarmWorker] started', poll_interval=settings.prewarm_poll_interval)
+    try:
+        while not stop.is_set():
+            # A fresh service per batch so every batch gets its own launch limit.
+            service = PrewarmService(
+                LessonspaceService(
+                    http_client=http_client,
+                    launch_scheduler=launch_scheduler,
+                    lesson_semaphore=lesson_semaphore,
+                )
+            )
+            try:
+                async with AsyncSession(async_engine, expire_on_commit=False) as db:
+                    claimed = await service.run_due(db)
+            except Exception as e:
+                logger.error(
+                    '[PrewarmWorker] error launching due lessons', error=str(e)
+                )
+                claimed = 0
+            # Keep draining while full batches are due, otherwise wait.
+            if claimed < prewarm_batch_limit():
+                try:
+                    await asyncio.wait_for(
+                        stop.wait(), timeout=settings.prewarm_poll_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+    finally:
+        await launch_scheduler.aclose()
+        await http_client.aclose()
+        logger.info('[PrewarmWorker] stopped')
+
+
+async def main() -> None:
+    """Run until SIGTERM or SIGINT, then finish the current batch."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+    try:
+        await run(stop)
+    finally:
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.remove_signal_handler(signum)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+"""Transcription worker: processes queued transcription webhooks.
+
+Run with ``python -m app.workers.transcription``.
+"""
+
+import asyncio
+import signal
+
+from app.db.session import async_session
+from app.services.transcription import TranscriptionService
+from app.services.transcription_job import TranscriptionJobService
+from app.utils.http import create_http_client
+from app.utils.logging import logger
+from app.utils.settings import get_settings
+
+settings = get_settings()
+
+
+async def run(stop: asyncio.Event | None = None) -> None:
+    stop = stop or asyncio.Event()
+    http_client = create_http_client(settings)
+    service = TranscriptionJobService(
+        TranscriptionService(http_client=http_client, session_factory=async_session),
+        session_factory=async_session,
+    )
+    logger.info(
+        '[TranscriptionWorker] started',
+        concurrency=settings.transcription_concurrency,
+        poll_interval=settings.transcription_poll_interval,
+    )
+    try:
+        while not stop.is_set():
+            # A job is claimed as soon as a slot frees up, rather than once a
+            # whole batch has finished.
+            try:
+                await service.start_due()
+            except Exception as e:
+                logger.error('[TranscriptionWorker] error running jobs', error=str(e))
+            await service.wait_for_slot(stop, settings.transcription_poll_interval)
+    finally:
+        await service.drain()
+        await http_client.aclose()
+        logger.info('[TranscriptionWorker] stopped')
+
+
+async def main() -> None:
+    """Run until SIGTERM or SIGINT, then let the running jobs finish."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+    try:
+        await run(stop)
+    finally:
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.remove_signal_handler(signum)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
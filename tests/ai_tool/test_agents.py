@@ -4,7 +4,11 @@ import sys
 import pytest
 
 from app.ai_tool import agents as agent_module
-from app.ai_tool.output_formats import LessonChaptersOutput, SummaryOutput
+from app.ai_tool.output_formats import (
+    FeedbackOutput,
+    LessonChaptersOutput,
+    SummaryOutput,
+)
 from app.models.transcript import Transcript
 
 
@@ -30,6 +34,7 @@ def _stub_agent(monkeypatch):
         ):  # pragma: no cover – exercised asynchronously
             calls['run_called'] = True
             output_type = self.kwargs['output_type']
+            calls.setdefault('prompts', []).append((self.kwargs['name'], args[0]))
             # Produce minimal valid output for each type.
             if output_type is LessonChaptersOutput:
                 output = LessonChaptersOutput(
@@ -48,6 +53,10 @@ def _stub_agent(monkeypatch):
                     long_summary='long' * 300,
                     recommended_focus='focus' * 15,
                 )
+            elif output_type is FeedbackOutput:
+                output = FeedbackOutput(
+                    strengths=['a', 'b', 'c'], improvements=['d', 'e', 'f']
+                )
             else:
                 output = SimpleNamespace()
             return SimpleNamespace(output=output)
@@ -85,3 +94,83 @@ async def test_summary_agent(_stub_agent):
     summary = await agent_module.SummaryAgent().summarize_lesson(_sample_transcript())
     assert summary.key_points == 'kp'
     assert len(summary.long_summary) > 1000
+
+
+def _long_transcript(segments=40):
+    return Transcript(
+        lesson_id='L1',
+        transcription=[
+            {
+                'start_time': float(n * 30),
+                'end_time': float(n * 30 + 30),
+                'user': {'id': n % 2, 'name': f'User {n % 2}'},
+                'breakout_id': 'main',
+                'text': f'segment {n} ' + ' '.join(f'w{k}' for k in range(20)),
+            }
+            for n in range(segments)
+        ],
+    )
+
+
+@pytest.fixture()
+def small_windows(monkeypatch):
+    monkeypatch.setattr(
+        agent_module,
+        'settings',
+        agent_module.settings.model_copy(update={'agent_window_tokens': 200}),
+    )
+
+
+@pytest.mark.asyncio
+async def test_summary_agent_map_reduces_long_lessons(_stub_agent, small_windows):
+    summary = await agent_module.SummaryAgent().summarize_lesson(_long_transcript())
+
+    assert summary.key_points == 'kp'
+    prompts = _stub_agent['prompts']
+    window_prompts = [p for name, p in prompts if name == 'Summary Agent']
+    assert len(window_prompts) > 1
+    assert window_prompts[0].startswith(f'Part 1 of {len(window_prompts)}')
+    # Every segment is summarized exactly once.
+    for n in range(40):
+        assert sum(f'segment {n} ' in p for p in window_prompts) == 1
+    # The partial summaries didn't fit one prompt, so they were combined in
+    # more than one round.
+    reduce_prompts = [p for name, p in prompts if name == 'Summary Reduce Agent']
+    assert len(reduce_prompts) > 1
+
+
+@pytest.mark.asyncio
+async def test_short_lessons_use_a_single_call(_stub_agent):
+    await agent_module.SummaryAgent().summarize_lesson(_long_transcript(3))
+    await agent_module.ChapterAgent().break_down_lesson(_long_transcript(3))
+
+    assert len(_stub_agent['prompts']) == 2
+
+
+@pytest.mark.asyncio
+async def test_chapter_agent_chapters_long_lessons_per_window(
+    _stub_agent, small_windows
+):
+    chapters = await agent_module.ChapterAgent().break_down_lesson(_long_transcript())
+
+    prompts = [prompt for _, prompt in _stub_agent['prompts']]
+    assert len(prompts) > 1
+    assert len(chapters) == len(prompts)
+    assert all(prompt.startswith('Speakers:\nS1 = User 0\n') for prompt in prompts)
+    assert '\n[00:30] S2: segment 1 ' in prompts[0]
+    # The stub's '0' and '1' timestamps are mapped back to segment times.
+    assert (chapters[0].start_time, chapters[0].end_time) == ('0.0', '30.0')
+
+
+@pytest.mark.asyncio
+async def test_feedback_agent_compacts_the_speakers_text(_stub_agent):
+    agent = agent_module.TutorFeedbackAgent(tutors_name='A')
+
+    strengths, improvements = await agent.provide_feedback_with_str(
+        'Um, so so we we start with with with fractions'
+    )
+
+    assert strengths == ['a', 'b', 'c']
+    assert _stub_agent['prompts'] == [
+        ('Tutor Feedback Agent', 'so we start with fractions')
+    ]
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from app.ai_tool.chunking import (
+    estimate_tokens,
+    format_timestamp,
+    map_windows,
+    split_windows,
+)
+from conftest import make_segment
+
+TEN_WORDS = ' '.join(['word'] * 10)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens('') == 0
+    assert estimate_tokens('Hi there!') == 4
+    # Long words count one token per four characters.
+    assert estimate_tokens('internationalisation') == 5
+
+
+def test_windows_stay_under_budget_and_keep_order():
+    segments = [make_segment(float(n), n % 3, TEN_WORDS) for n in range(50)]
+
+    windows = split_windows(list(reversed(segments)), max_tokens=60)
+
+    assert all(window.tokens <= 60 for window in windows)
+    assert [s for window in windows for s in window.segments] == segments
+    assert windows[0].start_time == 0.0
+    assert windows[-1].end_time == 50.0
+
+
+def test_windows_are_cut_where_the_speaker_turn_began():
+    # Speaker 1 talks for four segments, then speaker 2 for four.
+    segments = [make_segment(float(n), 1 if n < 4 else 2, TEN_WORDS) for n in range(8)]
+
+    windows = split_windows(segments, max_tokens=66)
+
+    assert [len(window.segments) for window in windows] == [4, 4]
+    assert {s['user']['id'] for s in windows[1].segments} == {2}
+
+
+def test_oversized_segment_gets_its_own_window():
+    segments = [
+        make_segment(0.0, 1, TEN_WORDS),
+        make_segment(1.0, 2, ' '.join(['word'] * 100)),
+        make_segment(2.0, 1, TEN_WORDS),
+    ]
+
+    windows = split_windows(segments, max_tokens=30)
+
+    assert [len(window.segments) for window in windows] == [1, 1, 1]
+
+
+@pytest.mark.asyncio
+async def test_map_windows_limits_concurrency_and_keeps_order():
+    windows = split_windows(
+        [make_segment(float(n), n, TEN_WORDS) for n in range(6)], 11
+    )
+    running = max_running = 0
+
+    async def run(index, window):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return index
+
+    assert await map_windows(windows, run, concurrency=2) == list(range(6))
+    assert max_running == 2
+
+
+def test_format_timestamp():
+    assert format_timestamp(0) == '00:00'
+    assert format_timestamp(75.9) == '01:15'
+    assert format_timestamp(2 * 3600 + 5) == '120:05'
@@ -0,0 +1,72 @@
+import pytest
+
+from app.ai_tool.compaction import compact_segments, compact_text
+from app.utils.metrics import metrics
+from conftest import make_segment
+
+
+@pytest.mark.parametrize(
+    'text, expected',
+    [
+        ('  So,  um, we   start here. ', 'So we start here.'),
+        ('Um, I I I think uh that works', 'I think that works'),
+        ('you know, you know, it is fine', 'you know, it is fine'),
+        ('Hmm.', ''),
+        ('Erm what about her answer?', 'what about her answer?'),
+        ('To err is human.', 'To err is human.'),
+        ('Er, the ER doctor is busy', 'Er, the ER doctor is busy'),
+        ('Um, she said "hmm, maybe" and left', 'she said "hmm, maybe" and left'),
+        ('ahead of the umbrella', 'ahead of the umbrella'),
+        ('The the answer is is is four', 'The answer is four'),
+        ('The sequence is 1, 1, 2, 3, 5, 8', 'The sequence is 1, 1, 2, 3, 5, 8'),
+        ('so 10 10 is 100', 'so 10 10 is 100'),
+        ('I had had enough', 'I had had enough'),
+        ('It was very very good', 'It was very very good'),
+    ],
+)
+def test_compact_text(text, expected):
+    assert compact_text(text) == expected
+
+
+def test_compact_segments_merges_turns_and_drops_noise():
+    segments = [
+        make_segment(2.0, 1, 'about fractions.'),
+        make_segment(0.0, 1, 'Um, today we'),
+        make_segment(1.0, 1, 'will talk'),
+        make_segment(3.0, 2, 'uh'),
+        make_segment(4.0, 2, 'Okay!'),
+        make_segment(5.0, 2, 'Okay!'),
+        make_segment(6.0, 2, 'In a breakout.', breakout_id='room-1'),
+    ]
+
+    compaction = compact_segments(segments)
+
+    assert compaction.segments == [
+        {
+            **make_segment(0.0, 1, 'today we will talk about fractions.'),
+            'end_time': 3.0,
+        },
+        make_segment(4.0, 2, 'Okay!') | {'end_time': 6.0},
+        make_segment(6.0, 2, 'In a breakout.', breakout_id='room-1'),
+    ]
+    assert segments[1]['text'] == 'Um, today we'
+    assert compaction.tokens_after < compaction.tokens_before
+    assert compaction.reduction == pytest.approx(
+        1 - compaction.tokens_after / compaction.tokens_before
+    )
+    # Compacting is deterministic and compacted segments stay as they are.
+    assert compact_segments(segments) == compaction
+    assert compact_segments(compaction.segments).segments == compaction.segments
+
+
+def test_compaction_report_records_token_counts():
+    metrics.reset()
+    segments = [make_segment(0.0, 1, 'um so so we we start')]
+
+    compaction = compact_segments(segments)
+    compaction.report('Test')
+
+    assert compaction.segments[0]['text'] == 'so we start'
+    counters = metrics.snapshot()['counters']
+    assert counters['agents.compaction.tokens_before'] == compaction.tokens_before
+    assert counters['agents.compaction.tokens_after'] == compaction.tokens_after == 5
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from app.ai_tool.chunking import estimate_tokens
+from app.ai_tool.encoding import EncodedTranscript, parse_timestamp
+from app.ai_tool.output_formats import ChapterOutput
+from conftest import make_segment
+
+
+SEGMENTS = [
+    make_segment(3604.5, 7, 'Shall we start?', end_time=3610.0, name='Alice'),
+    make_segment(3600.0, 9, 'Hello!', end_time=3604.0, name='Bob'),
+    make_segment(3700.2, 7, 'Fractions next.', end_time=3760.0, name='Alice'),
+    make_segment(4500.0, 9, 'Thanks, bye.', end_time=4530.0, name='Bob'),
+]
+
+
+def test_render_uses_a_legend_and_relative_timestamps():
+    encoding = EncodedTranscript.from_segments(SEGMENTS)
+
+    assert encoding.render() == (
+        'Speakers:\n'
+        'S1 = Bob\n'
+        'S2 = Alice\n'
+        '\n'
+        '[00:00] S1: Hello!\n'
+        '[00:04] S2: Shall we start?\n'
+        '[01:40] S2: Fractions next.\n'
+        '[15:00] S1: Thanks, bye.'
+    )
+    assert encoding.render(encoding.segments[2:3]).endswith(
+        '\n\n[01:40] S2: Fractions next.'
+    )
+    assert estimate_tokens(encoding.render()) < estimate_tokens(json.dumps(SEGMENTS))
+
+
+@pytest.mark.parametrize(
+    'timestamp, expected',
+    [('01:40', 100), ('[15:00]', 900), ('1:00:05', 3605), ('12', 12), ('soon', None)],
+)
+def test_parse_timestamp(timestamp, expected):
+    assert parse_timestamp(timestamp) == expected
+
+
+def test_chapters_are_mapped_back_to_segment_times():
+    encoding = EncodedTranscript.from_segments(SEGMENTS)
+
+    chapters = encoding.real_chapters(
+        [
+            ChapterOutput(start_time='00:00', end_time='00:04', description='Intro'),
+            ChapterOutput(start_time='01:30', end_time='14:00', description='Main'),
+            ChapterOutput(start_time='15:00', end_time='99:00', description='End'),
+            ChapterOutput(start_time='later', end_time='15:00', description='?'),
+        ]
+    )
+
+    assert [(c.start_time, c.end_time) for c in chapters] == [
+        ('3600.0', '3610.0'),
+        ('3700.2', '3760.0'),
+        ('4500.0', '4530.0'),
+        ('later', '4530.0'),
+    ]
@@ -6,14 +6,25 @@ import importlib
 
 from app.main import app
 from app.utils.settings import get_settings
-from app.schema.space import SpaceResponse, UserSpace
+from app.schema.space import (
+    MAX_BATCH_SIZE,
+    BatchSpaceResponse,
+    BatchSpaceResult,
+    PrewarmResponse,
+    ScheduledLaunchResponse,
+    SpaceResponse,
+    TranscriptionJobResponse,
+    UserSpace,
+)
 from app.schema.transcript import TranscriptResponse
 
 from app.api import space as space_module
 from app.services.lessonspace import LessonspaceService
 from app.services.transcription import TranscriptionService
+from app.services.transcription_job import TranscriptionJobService
 from app.services.lesson_planning import LessonPlanService, LessonSequenceService
-from app.db.session import get_db
+from app.services.prewarm import PrewarmService
+from app.db.session import get_async_db
 
 
 # ---------------------------------------------------------------------------
@@ -49,20 +60,33 @@ class _DummyLessonspaceService:
             ],
         )
 
+    async def create_spaces(self, requests, db):  # type: ignore[override]
+        results = [
+            BatchSpaceResult(
+                lesson_id=request.lesson_id,
+                space=await self.get_or_create_space(request, db),
+            )
+            for request in requests
+        ]
+        results.append(BatchSpaceResult(lesson_id='failed', error='boom'))
+        return BatchSpaceResponse(results=results)
 
-class _DummyTranscriptionService:
-    """Stub for every async method used in the space API routes."""
 
-    def __init__(self):
-        self.handled = False
-        self.handled_lesson_id = None
-        self.handled_webhook = None
+class _DummyPrewarmService:
+    async def schedule(self, requests, db):  # type: ignore[override]
+        return PrewarmResponse(
+            scheduled=[
+                ScheduledLaunchResponse(
+                    lesson_id=request.lesson_id, launch_at=request.not_before
+                )
+                for request in requests
+            ],
+            skipped=[],
+        )
 
-    async def handle_webhook(self, webhook, lesson_id, db):  # type: ignore[override]
-        # Simply record the call – business logic is irrelevant for route tests.
-        self.handled = True
-        self.handled_lesson_id = lesson_id
-        self.handled_webhook = webhook
+
+class _DummyTranscriptionService:
+    """Stub for every async method used in the space API routes."""
 
     async def get_transcript_by_id(self, lesson_id, db):  # type: ignore[override]
         # Return a minimal TranscriptResponse payload.
@@ -84,7 +108,22 @@ class _DummyTranscriptionService:
             'updated_at': '2020-01-01T00:00:00',
         }
 
-    async def get_lesson_summary(self, lesson_id, db):  # type: ignore[override]
+    async def get_segments(self, lesson_id, db, **filters):  # type: ignore[override]
+        self.segment_filters = filters
+        return {
+            'segments': [
+                {
+                    'start_time': 1200.0,
+                    'end_time': 1201.0,
+                    'user': {'id': 2, 'name': 'Student'},
+                    'breakout_id': 'main',
+                    'text': 'Hello',
+                }
+            ],
+            'next_cursor': 7,
+        }
+
+    async def get_lesson_summary(self, lesson_id):  # type: ignore[override]
         return {
             'transcription': [],
             'feedback': [],
@@ -96,6 +135,16 @@ class _DummyTranscriptionService:
         }
 
 
+class _DummyTranscriptionJobService:
+    def __init__(self):
+        self.queued = []
+
+    async def enqueue(self, webhook, lesson_id, db):  # type: ignore[override]
+        # Simply record the call – business logic is irrelevant for route tests.
+        self.queued.append((lesson_id, webhook))
+        return TranscriptionJobResponse(job_id=1, lesson_id=lesson_id, status='pending')
+
+
 class _DummyLessonPlanService:
     async def create_lesson_plan(self, info):  # type: ignore[override]
         return 'Here is a lesson plan'
@@ -124,12 +173,16 @@ def _override_dependencies():
     dummy_transcription = _DummyTranscriptionService()
     dummy_lesson_plan = _DummyLessonPlanService()
     dummy_lesson_sequence = _DummyLessonSequenceService()
+    dummy_prewarm = _DummyPrewarmService()
+    dummy_transcription_job = _DummyTranscriptionJobService()
 
     app.dependency_overrides[LessonspaceService] = lambda: dummy_lessonspace
     app.dependency_overrides[TranscriptionService] = lambda: dummy_transcription
     app.dependency_overrides[LessonPlanService] = lambda: dummy_lesson_plan
     app.dependency_overrides[LessonSequenceService] = lambda: dummy_lesson_sequence
-    app.dependency_overrides[get_db] = lambda: None
+    app.dependency_overrides[PrewarmService] = lambda: dummy_prewarm
+    app.dependency_overrides[TranscriptionJobService] = lambda: dummy_transcription_job
+    app.dependency_overrides[get_async_db] = lambda: None
 
     # Patch the TranscriptionService reference inside the space router module so that
     # direct instantiation within the route (service = TranscriptionService()) returns
@@ -199,15 +252,56 @@ def test_create_space_route(client):
     assert len(data['student_spaces']) == 1
 
 
+def test_create_spaces_batch_route(client):
+    """POST /api/space/batch returns one result per lesson, including failures."""
+    response = client.post(
+        '/api/space/batch', json=[_sample_space_request_json()], headers=_AUTH_HEADER
+    )
+    assert response.status_code == 200
+    results = response.json()['results']
+
+    assert results[0]['lesson_id'] == 'lesson-123'
+    assert results[0]['space']['space_id'] == 'space-001'
+    assert results[0]['error'] is None
+    assert results[1] == {'lesson_id': 'failed', 'space': None, 'error': 'boom'}
+
+
+@pytest.mark.parametrize('path', ['/api/space/batch', '/api/space/prewarm'])
+def test_batch_routes_cap_the_number_of_lessons(client, path):
+    lessons = [_sample_space_request_json()] * (MAX_BATCH_SIZE + 1)
+
+    response = client.post(path, json=lessons, headers=_AUTH_HEADER)
+
+    assert response.status_code == 422
+
+
+def test_prewarm_spaces_route(client):
+    """POST /api/space/prewarm reports when each lesson will be launched."""
+    response = client.post(
+        '/api/space/prewarm', json=[_sample_space_request_json()], headers=_AUTH_HEADER
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        'scheduled': [
+            {'lesson_id': 'lesson-123', 'launch_at': '2020-01-01T12:00:00'},
+        ],
+        'skipped': [],
+    }
+
+
 def test_transcription_webhook_route(client):
-    """POST /api/space/webhook/transcription/{lesson_id} should delegate to the service and return success."""
+    """POST /api/space/webhook/transcription/{lesson_id} should queue a job and return 202."""
     payload = {'transcriptionUrl': 'https://example.com/lesson.json'}
     response = client.post(
         '/api/space/webhook/transcription/lesson-123',
         json=payload,
     )
-    assert response.status_code == 200
-    assert response.json() == {'status': 'success'}
+    assert response.status_code == 202
+    assert response.json() == {
+        'job_id': 1,
+        'lesson_id': 'lesson-123',
+        'status': 'pending',
+    }
 
 
 def test_get_transcript_route(client):
@@ -220,6 +314,35 @@ def test_get_transcript_route(client):
     assert 'transcription' in data
 
 
+def test_get_transcript_segments_route(client):
+    """GET /api/space/transcripts/{lesson_id}/segments passes the filters through."""
+    response = client.get(
+        '/api/space/transcripts/lesson-123/segments',
+        params={'start': 1200, 'end': 1800, 'user_id': 2, 'after': 3, 'limit': 50},
+        headers=_AUTH_HEADER,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data['next_cursor'] == 7
+    assert data['segments'][0]['text'] == 'Hello'
+
+    dummy = app.dependency_overrides[TranscriptionService]()
+    assert dummy.segment_filters == {
+        'start': 1200.0,
+        'end': 1800.0,
+        'user_id': 2,
+        'after': 3,
+        'limit': 50,
+    }
+
+    response = client.get(
+        '/api/space/transcripts/lesson-123/segments',
+        params={'limit': 0},
+        headers=_AUTH_HEADER,
+    )
+    assert response.status_code == 422
+
+
 def test_get_lesson_summary_route(client):
     """GET /api/space/lesson-summary/{lesson_id} returns merged lesson summary information."""
     response = client.get('/api/space/lesson-summary/lesson-123', headers=_AUTH_HEADER)
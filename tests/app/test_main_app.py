@@ -7,3 +7,12 @@ def test_health_endpoint():
     resp = client.get('/')
     assert resp.status_code == 200
     assert resp.json() == {'status': 'healthy'}
+
+
+def test_metrics_endpoint_requires_api_key(settings):
+    client = TestClient(app)
+    assert client.get('/api/metrics').status_code == 401
+
+    resp = client.get('/api/metrics', headers={'X-API-Key': settings.api_key})
+    assert resp.status_code == 200
+    assert set(resp.json()) == {'counters', 'gauges', 'timings'}
@@ -1,14 +1,18 @@
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlalchemy.orm import sessionmaker
 import os
 import types, sys
 from sqlalchemy.dialects.sqlite.base import SQLiteTypeCompiler
 from sqlalchemy.dialects.postgresql import JSONB
 
-from app.db.session import get_db
+from app.db.session import async_database_url, get_async_db, get_db
 from sqlmodel import SQLModel, Session as SQLModelSession
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.main import app
 from app.utils.settings import get_settings
 
@@ -26,6 +30,9 @@ engine = create_engine(DATABASE_URL)
 TestingSessionLocal = sessionmaker(
     class_=SQLModelSession, autocommit=False, autoflush=False, bind=engine
 )
+# Each async test runs on its own event loop, so connections are not pooled
+# across tests.
+async_engine = create_async_engine(async_database_url(DATABASE_URL), poolclass=NullPool)
 
 
 @pytest.fixture(scope='function')
@@ -39,20 +46,54 @@ def db_session():
         SQLModel.metadata.drop_all(bind=engine)
 
 
+@pytest_asyncio.fixture(scope='function')
+async def async_db_session(db_session):
+    """``AsyncSession`` on the test database; tables come from ``db_session``."""
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+@pytest.fixture(scope='function')
+def async_session_factory(db_session):
+    """Factory for short-lived ``AsyncSession`` objects on the test database."""
+    return async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+
 @pytest.fixture(scope='function')
-def client(db_session):
+def client(db_session, monkeypatch):
+    # Tables come from create_all in ``db_session`` rather than migrations.
+    monkeypatch.setattr('app.main.check_schema_version', lambda bind: None)
+
     def override_get_db():
         try:
             yield db_session
         finally:
             db_session.close()
 
+    async def override_get_async_db():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
 
 
+def make_segment(
+    start_time, user_id, text='', end_time=None, name=None, breakout_id='main'
+):
+    """A Lessonspace transcript segment, one second long unless ``end_time`` is given."""
+    return {
+        'start_time': start_time,
+        'end_time': start_time + 1.0 if end_time is None else end_time,
+        'user': {'id': user_id, 'name': name or f'User {user_id}'},
+        'breakout_id': breakout_id,
+        'text': text,
+    }
+
+
 @pytest.fixture(scope='function')
 def settings():
     return get_settings()
@@ -0,0 +1,125 @@
+"""EXPLAIN checks that the hot lesson_id reads stay index-backed.
+
+A realistic number of rows is seeded so the planner picks the plan it would
+in production rather than a sequential scan of a near-empty table.
+"""
+
+import pytest
+from sqlalchemy import text
+
+from app.dal import transcript as dal
+
+LESSONS = 5_000
+PARTICIPANTS = 4
+SEGMENTS = 20
+
+
+@pytest.fixture()
+def seeded_db(db_session):
+    db_session.execute(
+        text(
+            """
+            INSERT INTO transcript (lesson_id, transcription, created_at)
+            SELECT 'lesson-' || n, '[]'::jsonb, now()
+            FROM generate_series(1, :lessons) AS n;
+
+            INSERT INTO summary (lesson_id, long_summary, created_at)
+            SELECT 'lesson-' || n, 'summary', now()
+            FROM generate_series(1, :lessons) AS n;
+
+            INSERT INTO space (lesson_id, lesson_space_id, created_at)
+            SELECT 'lesson-' || n, 'room-' || n, now()
+            FROM generate_series(1, :lessons) AS n;
+
+            INSERT INTO feedback (lesson_id, user_id, role, created_at)
+            SELECT 'lesson-' || n, u, 'student', now()
+            FROM generate_series(1, :lessons) AS n,
+                generate_series(1, :participants) AS u;
+
+            INSERT INTO transcriptsegmentmodel (
+                transcript_id, lesson_id, position, start_time, end_time,
+                user_id, user_name, text
+            )
+            SELECT n, 'lesson-' || n, s, s * 5, s * 5 + 5, s % :participants,
+                'User', 'text'
+            FROM generate_series(1, :lessons) AS n,
+                generate_series(0, :segments - 1) AS s;
+
+            INSERT INTO userspacemodel (lesson_id, user_id, role, leader, created_at)
+            SELECT 'lesson-' || n, u, 'student', u = 1, now()
+            FROM generate_series(1, :lessons) AS n,
+                generate_series(1, :participants) AS u;
+
+            INSERT INTO speakertranscript (
+                transcript_id, lesson_id, user_id, name, role, text,
+                segment_count, created_at
+            )
+            SELECT n, 'lesson-' || n, u, 'User', 'student', 'text', 5, now()
+            FROM generate_series(1, :lessons) AS n,
+                generate_series(1, :participants) AS u;
+            """
+        ),
+        {'lessons': LESSONS, 'participants': PARTICIPANTS, 'segments': SEGMENTS},
+    )
+    db_session.commit()
+    db_session.execute(text('ANALYZE'))
+    return db_session
+
+
+def _explain(db, statement):
+    """The EXPLAIN plan of ``statement``."""
+    compiled = statement.compile(dialect=db.bind.dialect)
+    with db.connection().connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + str(compiled), compiled.params)
+        return cursor.fetchone()[0][0]['Plan']
+
+
+def _nodes(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from _nodes(child)
+
+
+# Every segment index leads with lesson_id.
+_SEGMENT_INDEXES = {
+    'uq_segment_lesson_position',
+    'ix_segment_lesson_start_time',
+    'ix_segment_lesson_user',
+}
+
+
+LESSON = 'lesson-1234'
+
+
+@pytest.mark.parametrize(
+    'statement, indexes',
+    [
+        # Both transcript indexes lead with lesson_id.
+        (
+            dal.transcript_statement(LESSON),
+            {'ix_transcript_lesson_id', 'uq_transcript_lesson_hash'},
+        ),
+        (
+            dal.transcript_by_hash_statement(LESSON, 'hash'),
+            {'uq_transcript_lesson_hash'},
+        ),
+        (dal.summary_statement(LESSON), {'ix_summary_lesson_id'}),
+        (dal.feedback_statement(LESSON), {'ix_feedback_lesson_id'}),
+        (dal.space_statement(LESSON), {'ix_space_lesson_id', 'uq_space_lesson_room'}),
+        (dal.user_spaces_statement(LESSON), {'uq_userspace_lesson_user'}),
+        (
+            dal.speaker_transcripts_statement(LESSON),
+            {'uq_speakertranscript_lesson_user'},
+        ),
+        (dal.segments_statement(LESSON), _SEGMENT_INDEXES),
+        (dal.segments_statement(LESSON, start=20, end=40), _SEGMENT_INDEXES),
+        (dal.segments_statement(LESSON, user_id=1), _SEGMENT_INDEXES),
+        (dal.segments_statement(LESSON, after=10), _SEGMENT_INDEXES),
+    ],
+)
+def test_lesson_reads_use_index(seeded_db, statement, indexes):
+    plan = _explain(seeded_db, statement)
+    nodes = list(_nodes(plan))
+
+    assert not [node for node in nodes if node['Node Type'] == 'Seq Scan'], plan
+    assert indexes & {node.get('Index Name') for node in nodes}, plan
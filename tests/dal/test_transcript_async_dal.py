@@ -0,0 +1,168 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from sqlmodel import select
+
+from app.dal import transcript_async as dal
+from app.ai_tool.output_formats import SummaryOutput
+from app.db.session import async_database_url
+from app.models.transcript import Space
+from app.schema.space import UserSpace
+from conftest import make_segment
+
+
+def test_async_database_url_uses_asyncpg_for_postgres():
+    assert (
+        async_database_url('postgresql://user:secret@db:5432/eurus')
+        == 'postgresql+asyncpg://user:secret@db:5432/eurus'
+    )
+    assert async_database_url('sqlite:///:memory:') == 'sqlite:///:memory:'
+
+
+@pytest.mark.asyncio
+async def test_full_transcript_async_dal_cycle(async_db_session):
+    lesson_id = 'lesson-async-dal'
+    session = async_db_session
+
+    transcript = await dal.create_transcript(session, lesson_id, [{'text': 'Hi'}])
+    assert (await dal.get_transcript(lesson_id, session)).id == transcript.id
+
+    summary = await dal.create_summary(
+        session,
+        lesson_id,
+        SummaryOutput(
+            key_points='Key points',
+            short_summary='s' * 60,
+            long_summary='l' * 1200,
+            recommended_focus='r' * 60,
+        ),
+    )
+    assert (await dal.get_summary(lesson_id, session)).id == summary.id
+
+    feedback = await dal.create_feedback(
+        session, lesson_id, 1, 'tutor', 'Great explanation', 'Speak slower'
+    )
+    assert [f.id for f in await dal.get_feedback(lesson_id, session)] == [feedback.id]
+
+    space = await dal.get_or_create_space(session, lesson_id, 'space-xyz')
+    assert (await dal.get_or_create_space(session, lesson_id, 'space-xyz')).id == (
+        space.id
+    )
+
+    user_space = await dal.create_or_update_user_space(
+        session, user_id=9, lesson_id=lesson_id, role='student', leader=False
+    )
+    updated = await dal.create_or_update_user_space(
+        session, user_id=9, lesson_id=lesson_id, role='student', leader=True
+    )
+    assert updated.id == user_space.id
+    assert updated.leader is True
+
+
+@pytest.mark.asyncio
+async def test_save_space_launches_async(async_db_session):
+    expires_at = datetime.now(timezone.utc)
+    for url in ('a', 'b'):
+        await dal.save_space_launches(
+            async_db_session,
+            'lesson-bulk',
+            'room-1',
+            [
+                UserSpace(
+                    user_id=user_id,
+                    name=f'User {user_id}',
+                    role='student',
+                    space_url=f'{url}/{user_id}',
+                    leader=False,
+                )
+                for user_id in range(3)
+            ],
+            client_url_expires_at=expires_at,
+        )
+
+    user_spaces = await dal.get_user_spaces('lesson-bulk', async_db_session)
+    assert {us.client_url for us in user_spaces} == {'b/0', 'b/1', 'b/2'}
+    assert all(us.client_url_expires_at == expires_at for us in user_spaces)
+    space = await dal.get_space('lesson-bulk', async_db_session)
+    assert space.lesson_space_id == 'room-1'
+
+
+@pytest.mark.asyncio
+async def test_concurrent_upserts_do_not_duplicate_rows(
+    async_session_factory, async_db_session
+):
+    async def upsert(index):
+        async with async_session_factory() as session:
+            await dal.get_or_create_space(session, 'lesson-race', 'room-1')
+            await dal.create_or_update_user_space(
+                session,
+                user_id=1,
+                lesson_id='lesson-race',
+                role='student',
+                leader=False,
+                client_url=f'https://space/{index}',
+            )
+
+    await asyncio.gather(*[upsert(index) for index in range(10)])
+
+    assert len(await dal.get_user_spaces('lesson-race', async_db_session)) == 1
+    result = await async_db_session.exec(
+        select(Space).where(Space.lesson_id == 'lesson-race')
+    )
+    assert len(result.all()) == 1
+
+
+@pytest.mark.asyncio
+async def test_transcripts_are_stored_packed(async_db_session):
+    segments = [
+        {
+            'start_time': 0.0,
+            'end_time': 1.0,
+            'user': {'id': 1, 'name': 'Alice'},
+            'breakout_id': 'main',
+            'text': 'Hello',
+        }
+    ]
+    await dal.create_transcript(async_db_session, 'lesson-packed', segments)
+    async_db_session.expire_all()
+
+    transcript = await dal.get_transcript('lesson-packed', async_db_session)
+
+    assert transcript.transcription is None
+    assert isinstance(transcript.transcription_packed, bytes)
+    assert transcript.segments == segments
+
+
+@pytest.mark.asyncio
+async def test_segments_are_stored_sorted_and_paged(async_db_session):
+    segments = [
+        make_segment(30.0, 2, 'third'),
+        make_segment(0.0, 1, 'first'),
+        make_segment(10.0, 2, 'second'),
+        make_segment(45.0, 1, 'fourth'),
+    ]
+    transcript = await dal.create_transcript(async_db_session, 'lesson-seg', segments)
+    await dal.save_segments(async_db_session, transcript)
+
+    rows = await dal.get_segments('lesson-seg', async_db_session)
+    assert [row.text for row in rows] == ['first', 'second', 'third', 'fourth']
+    assert [row.position for row in rows] == [0, 1, 2, 3]
+
+    window = await dal.get_segments('lesson-seg', async_db_session, start=10, end=45)
+    assert [row.text for row in window] == ['second', 'third']
+
+    spoken = await dal.get_segments('lesson-seg', async_db_session, user_id=1)
+    assert [row.text for row in spoken] == ['first', 'fourth']
+
+    page = await dal.get_segments('lesson-seg', async_db_session, limit=2)
+    rest = await dal.get_segments(
+        'lesson-seg', async_db_session, after=page[-1].position, limit=2
+    )
+    assert [row.text for row in page + rest] == ['first', 'second', 'third', 'fourth']
+
+    # Storing a newer transcript replaces the lesson's segments.
+    newer = await dal.create_transcript(async_db_session, 'lesson-seg', segments[:1])
+    await dal.save_segments(async_db_session, newer)
+    rows = await dal.get_segments('lesson-seg', async_db_session)
+    assert [row.text for row in rows] == ['third']
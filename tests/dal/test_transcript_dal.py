@@ -1,7 +1,11 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import event
 from sqlmodel import SQLModel, Session, create_engine
 
 from app.dal import transcript as dal
 from app.ai_tool.output_formats import SummaryOutput
+from app.schema.space import UserSpace
 
 
 # NB:  The project targets PostgreSQL in production, therefore we run the tests
@@ -109,3 +113,82 @@ def test_full_transcript_dal_cycle():
         )
         assert user_space_updated.id == user_space_obj.id
         assert user_space_updated.leader is True
+
+
+def _count_statements(engine):
+    statements = []
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    return statements
+
+
+def test_save_space_launches_uses_constant_round_trips():
+    lesson_id = 'lesson-bulk'
+
+    def launches(count, url):
+        return [
+            UserSpace(
+                user_id=user_id,
+                name=f'User {user_id}',
+                role='tutor' if user_id == 0 else 'student',
+                space_url=f'{url}/{user_id}',
+                leader=user_id == 0,
+            )
+            for user_id in range(count)
+        ]
+
+    with _memory_session() as session:
+        statements = _count_statements(session.get_bind())
+        dal.save_space_launches(session, lesson_id, 'room-1', launches(3, 'a'))
+        small_lesson = len(statements)
+
+        statements.clear()
+        dal.save_space_launches(session, 'lesson-big', 'room-2', launches(30, 'a'))
+        assert len(statements) == small_lesson
+
+        # A repeat save updates the stored rows instead of duplicating them.
+        expires_at = datetime.now(timezone.utc)
+        dal.save_space_launches(
+            session,
+            lesson_id,
+            'room-1',
+            launches(3, 'b'),
+            client_url_expires_at=expires_at,
+        )
+        user_spaces = dal.get_user_spaces(lesson_id, session)
+        assert len(user_spaces) == 3
+        assert {us.client_url for us in user_spaces} == {'b/0', 'b/1', 'b/2'}
+        assert all(us.client_url_expires_at == expires_at for us in user_spaces)
+        assert dal.get_space(lesson_id, session).lesson_space_id == 'room-1'
+
+
+def test_writers_are_single_statement_upserts():
+    with _memory_session() as session:
+        statements = _count_statements(session.get_bind())
+        transcript = dal.create_transcript(session, 'lesson-upsert', [{'text': 'Hi'}])
+        space = dal.get_or_create_space(session, 'lesson-upsert', 'room-1')
+        user_space = dal.create_or_update_user_space(
+            session, user_id=1, lesson_id='lesson-upsert', role='tutor', leader=True
+        )
+        assert len(statements) == 3
+        assert all('RETURNING' in statement for statement in statements)
+
+        assert transcript.id is not None
+        assert dal.get_or_create_space(session, 'lesson-upsert', 'room-1').id == (
+            space.id
+        )
+        updated = dal.create_or_update_user_space(
+            session,
+            user_id=1,
+            lesson_id='lesson-upsert',
+            role='tutor',
+            leader=False,
+            client_url='https://space/1',
+        )
+        assert updated.id == user_space.id
+        assert updated.leader is False
+        assert updated.client_url == 'https://space/1'
+        assert len(dal.get_user_spaces('lesson-upsert', session)) == 1
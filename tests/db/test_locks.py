@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+
+from app.db.locks import advisory_lock
+
+
+@pytest.mark.asyncio
+async def test_advisory_lock_serialises_holders_of_the_same_key(
+    async_session_factory,
+):
+    events = []
+
+    async def hold(name):
+        async with async_session_factory() as db:
+            async with advisory_lock(db, 1, 'lesson-1', poll_interval=0.01):
+                events.append(f'{name}-start')
+                await asyncio.sleep(0.05)
+                events.append(f'{name}-end')
+
+    await asyncio.gather(hold('a'), hold('b'))
+
+    assert events in (
+        ['a-start', 'a-end', 'b-start', 'b-end'],
+        ['b-start', 'b-end', 'a-start', 'a-end'],
+    )
+
+
+@pytest.mark.asyncio
+async def test_advisory_lock_times_out(async_session_factory):
+    async with async_session_factory() as holder, async_session_factory() as waiter:
+        async with advisory_lock(holder, 1, 'lesson-2'):
+            with pytest.raises(TimeoutError):
+                async with advisory_lock(waiter, 1, 'lesson-2', timeout=0.05):
+                    pass
+
+
+@pytest.mark.asyncio
+async def test_advisory_lock_is_released_when_the_session_commits(
+    async_session_factory,
+):
+    async with async_session_factory() as holder, async_session_factory() as waiter:
+        async with advisory_lock(holder, 1, 'lesson-3'):
+            # The guarded writes commit inside the block, ending the lock.
+            await holder.commit()
+            async with advisory_lock(waiter, 1, 'lesson-3', timeout=0.05):
+                pass
+        # The lock is taken on the session's connection, not a second one.
+        count = await holder.scalar(
+            text(
+                "SELECT count(*) FROM pg_locks WHERE locktype = 'advisory'"
+                ' AND pid = pg_backend_pid()'
+            )
+        )
+        assert count == 0
@@ -0,0 +1,125 @@
+import json
+
+import pytest
+
+from app.models.transcript import (
+    Transcript,
+    TranscriptBuilder,
+    TranscriptSegmentModel,
+    transcript_hash,
+)
+from app.models.transcript_codec import can_pack, pack_segments, unpack_segments
+
+
+def _segments(count=600):
+    speakers = [(3632572, 'Alice Tutor'), (123, 'Bob Student'), (456, 'Carla Student')]
+    return [
+        {
+            'start_time': i * 2.5,
+            'end_time': i * 2.5 + 2.25,
+            'user': {'id': speakers[i % 3][0], 'name': speakers[i % 3][1]},
+            'breakout_id': 'main' if i < count // 2 else 'room-1',
+            'text': f'Sentence number {i}, with ünïcode and "quotes".',
+        }
+        for i in range(count)
+    ]
+
+
+def test_round_trip_is_lossless():
+    segments = _segments()
+    segments[3].pop('breakout_id')
+    segments[4]['breakout_id'] = None
+    segments[5]['text'] = ''
+
+    assert can_pack(segments)
+    assert unpack_segments(pack_segments(segments)) == segments
+    assert unpack_segments(pack_segments([])) == []
+
+
+def test_packed_is_several_times_smaller_than_json():
+    segments = _segments()
+
+    assert len(pack_segments(segments)) * 4 < len(json.dumps(segments))
+
+
+@pytest.mark.parametrize(
+    'segment',
+    [
+        {'text': 'no times or user'},
+        {
+            'start_time': 0,
+            'end_time': 1,
+            'user': {'id': 1, 'name': 'A', 'email': 'a@example.com'},
+            'text': 'extra user field',
+        },
+        {
+            'start_time': 0,
+            'end_time': 1,
+            'user': {'id': 1, 'name': 'A'},
+            'text': 'extra field',
+            'confidence': 0.9,
+        },
+    ],
+)
+def test_unexpected_segments_are_stored_as_json(segment):
+    assert not can_pack([segment])
+
+    transcript = Transcript.from_segments([segment], lesson_id='lesson-1')
+
+    assert transcript.transcription_packed is None
+    assert transcript.segments == [segment]
+
+
+def test_transcript_helpers_read_packed_segments():
+    segments = _segments(3)
+    packed = Transcript.from_segments(segments, lesson_id='lesson-1')
+    plain = Transcript(transcription=segments, lesson_id='lesson-1')
+
+    assert packed.transcription is None
+    assert packed.segments == segments
+    assert packed.to_concatonated_transcript() == plain.to_concatonated_transcript()
+    assert packed.get_user_transcript(123) == plain.get_user_transcript(123)
+    assert packed.gather_user_transcripts({}) == plain.gather_user_transcripts({})
+
+
+def test_builder_packs_segments_as_they_arrive():
+    segments = _segments(10)
+    builder = TranscriptBuilder()
+    for segment in segments:
+        builder.add(segment)
+
+    transcript = builder.build(lesson_id='lesson-1')
+
+    assert builder.segment_count == 10
+    assert builder.content_hash == transcript_hash(segments)
+    assert transcript.transcription is None
+    assert transcript.transcription_packed == pack_segments(segments)
+
+
+def test_builder_falls_back_to_json_mid_transcript():
+    segments = _segments(3)
+    segments.insert(2, {'text': 'no times or user'})
+    builder = TranscriptBuilder()
+    for segment in segments:
+        builder.add(segment)
+
+    transcript = builder.build(lesson_id='lesson-1')
+
+    assert transcript.transcription_packed is None
+    assert transcript.segments == segments
+    assert list(TranscriptSegmentModel.from_transcript(transcript)) == []
+
+
+def test_segment_rows_are_numbered_in_start_time_order():
+    segments = _segments(4)
+    segments[0]['start_time'] = 100.0
+    transcript = Transcript.from_segments(segments, lesson_id='lesson-1')
+
+    rows = TranscriptSegmentModel.from_transcript(transcript)
+
+    assert [(row.position, row.text) for row in rows] == [
+        (3, segments[0]['text']),
+        (0, segments[1]['text']),
+        (1, segments[2]['text']),
+        (2, segments[3]['text']),
+    ]
@@ -1,4 +1,4 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 from app.models.transcript import Transcript, UserSpaceModel
 
@@ -71,3 +71,48 @@ def test_transcript_helper_methods():
     # The student (123) should be labelled as student and only have their own line.
     assert user_transcripts[123]['role'] == 'student'
     assert user_transcripts[123]['text'] == 'Hi Alice!'
+    assert user_transcripts[3632572]['segment_count'] == 2
+    assert user_transcripts[123]['segment_count'] == 1
+
+
+def test_gather_user_transcripts_takes_roles_from_user_spaces():
+    transcript = _sample_transcript()
+    user_lookup = {
+        123: UserSpaceModel(user_id=123, role='tutor', leader=True, lesson_id='x'),
+    }
+
+    user_transcripts = transcript.gather_user_transcripts(user_lookup)
+
+    assert user_transcripts[123]['role'] == 'tutor'
+    # Speakers without a user space are taken to be students.
+    assert user_transcripts[3632572]['role'] == 'student'
+    assert user_transcripts[3632572]['text'] == 'Hello there. How are you?'
+
+
+def test_user_space_has_valid_client_url():
+    now = datetime.now(timezone.utc)
+    not_before = datetime(2024, 3, 20, 10, 0, tzinfo=timezone.utc)
+    user_space = UserSpaceModel(
+        user_id=1,
+        role='student',
+        leader=False,
+        lesson_id='lesson-xyz',
+        client_url='https://lesson.space/1',
+        client_url_expires_at=now + timedelta(minutes=5),
+        not_before=not_before,
+    )
+
+    assert user_space.has_valid_client_url('student', False, not_before)
+    # Naive datetimes from the API are compared as UTC.
+    assert user_space.has_valid_client_url(
+        'student', False, not_before.replace(tzinfo=None)
+    )
+    assert not user_space.has_valid_client_url('tutor', False, not_before)
+    assert not user_space.has_valid_client_url('student', False, None)
+
+    user_space.client_url_expires_at = now - timedelta(seconds=1)
+    assert not user_space.has_valid_client_url('student', False, not_before)
+
+    user_space.client_url = None
+    user_space.client_url_expires_at = now + timedelta(minutes=5)
+    assert not user_space.has_valid_client_url('student', False, not_before)
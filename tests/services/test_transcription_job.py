@@ -0,0 +1,217 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlmodel import select
+
+from app.models.transcription_job import TranscriptionJob
+from app.schema.space import TranscriptionWebhook
+from app.services import transcription_job as job_module
+from app.services.transcription import TranscriptInProgressError
+from app.services.transcription_job import TranscriptionJobService
+
+WEBHOOK = TranscriptionWebhook(transcriptionUrl='https://example.com/lesson.json')
+
+
+class _StubTranscription:
+    def __init__(self, failing=(), delay=0.0, delays=None, busy=()):
+        self.failing = set(failing)
+        self.busy = set(busy)
+        self.delay = delay
+        self.delays = delays or {}
+        self.lessons = []
+        self.running = 0
+        self.max_running = 0
+
+    async def handle_webhook(self, webhook, lesson_id):
+        self.lessons.append(lesson_id)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delays.get(lesson_id, self.delay))
+            if lesson_id in self.failing:
+                raise RuntimeError('boom')
+            if lesson_id in self.busy:
+                raise TranscriptInProgressError(lesson_id)
+        finally:
+            self.running -= 1
+
+
+def _add_jobs(db_session, *lesson_ids, **fields):
+    past = datetime.now(timezone.utc) - timedelta(minutes=1)
+    for lesson_id in lesson_ids:
+        db_session.add(
+            TranscriptionJob(
+                lesson_id=lesson_id,
+                webhook=WEBHOOK.model_dump(mode='json'),
+                run_at=past,
+                **fields,
+            )
+        )
+    db_session.commit()
+
+
+def _jobs(db_session):
+    db_session.expire_all()
+    return {job.lesson_id: job for job in db_session.exec(select(TranscriptionJob))}
+
+
+@pytest.mark.asyncio
+async def test_enqueue_stores_pending_job(db_session, async_db_session):
+    transcription = _StubTranscription()
+    service = TranscriptionJobService(transcription)
+
+    response = await service.enqueue(WEBHOOK, 'lesson-1', async_db_session)
+
+    assert response.status == 'pending'
+    job = _jobs(db_session)['lesson-1']
+    assert job.id == response.job_id
+    assert job.to_webhook() == WEBHOOK
+    # Nothing runs until a worker picks the job up.
+    assert transcription.lessons == []
+
+
+@pytest.mark.asyncio
+async def test_run_due_processes_and_retries(db_session, async_session_factory):
+    _add_jobs(db_session, 'ok', 'flaky')
+    transcription = _StubTranscription(failing={'flaky'})
+    service = TranscriptionJobService(transcription, async_session_factory)
+
+    assert await service.run_due() == 2
+
+    jobs = _jobs(db_session)
+    assert jobs['ok'].status == 'done'
+    assert jobs['flaky'].status == 'pending'
+    assert jobs['flaky'].last_error == 'boom'
+    assert jobs['flaky'].run_at > datetime.now(timezone.utc)
+    # Nothing else is due until the retry delay has passed.
+    assert await service.run_due() == 0
+
+
+@pytest.mark.asyncio
+async def test_run_due_dead_letters_after_max_attempts(
+    db_session, async_session_factory, settings
+):
+    _add_jobs(db_session, 'broken', attempts=settings.transcription_max_attempts - 1)
+    service = TranscriptionJobService(
+        _StubTranscription(failing={'broken'}), async_session_factory
+    )
+
+    await service.run_due()
+
+    job = _jobs(db_session)['broken']
+    assert job.status == 'dead'
+    assert job.attempts == settings.transcription_max_attempts
+    assert job.last_error == 'boom'
+
+
+@pytest.mark.asyncio
+async def test_duplicate_of_a_transcript_in_progress_is_deferred(
+    db_session, async_session_factory, settings
+):
+    _add_jobs(db_session, 'busy', attempts=settings.transcription_max_attempts - 1)
+    service = TranscriptionJobService(
+        _StubTranscription(busy={'busy'}), async_session_factory
+    )
+
+    assert await service.run_due() == 1
+
+    job = _jobs(db_session)['busy']
+    assert job.status == 'pending'
+    assert job.attempts == settings.transcription_max_attempts - 1
+    assert 'being processed elsewhere' in job.last_error
+    assert job.run_at > datetime.now(timezone.utc)
+
+
+@pytest.mark.asyncio
+async def test_run_due_dead_letters_jobs_that_keep_killing_workers(
+    db_session, async_session_factory, settings
+):
+    stale = datetime.now(timezone.utc) - timedelta(
+        seconds=settings.transcription_claim_timeout + 60
+    )
+    _add_jobs(
+        db_session,
+        'crashing',
+        status='running',
+        claimed_at=stale,
+        attempts=settings.transcription_max_attempts,
+        reclaims=settings.transcription_max_attempts - 1,
+    )
+    transcription = _StubTranscription()
+
+    await TranscriptionJobService(transcription, async_session_factory).run_due()
+
+    assert transcription.lessons == []
+    job = _jobs(db_session)['crashing']
+    assert job.status == 'dead'
+    assert job.last_error == 'worker stopped while running the job'
+
+
+@pytest.mark.asyncio
+async def test_dead_job_set_back_to_pending_runs_again(
+    db_session, async_session_factory, settings
+):
+    _add_jobs(
+        db_session,
+        'redriven',
+        attempts=settings.transcription_max_attempts,
+        reclaims=settings.transcription_max_attempts,
+        last_error='boom',
+    )
+    transcription = _StubTranscription()
+
+    await TranscriptionJobService(transcription, async_session_factory).run_due()
+
+    assert transcription.lessons == ['redriven']
+    job = _jobs(db_session)['redriven']
+    assert job.status == 'done'
+    assert job.reclaims == 0
+
+
+@pytest.mark.asyncio
+async def test_run_due_limits_concurrency(
+    db_session, async_session_factory, monkeypatch, settings
+):
+    monkeypatch.setattr(
+        job_module,
+        'settings',
+        settings.model_copy(update={'transcription_concurrency': 2}),
+    )
+    _add_jobs(db_session, 'a', 'b', 'c')
+    transcription = _StubTranscription(delay=0.05)
+    service = TranscriptionJobService(transcription, async_session_factory)
+
+    assert await service.run_due() == 2
+    assert await service.run_due() == 1
+
+    assert transcription.max_running == 2
+    assert {job.status for job in _jobs(db_session).values()} == {'done'}
+
+
+@pytest.mark.asyncio
+async def test_freed_slot_is_refilled_while_other_jobs_run(
+    db_session, async_session_factory, monkeypatch, settings
+):
+    monkeypatch.setattr(
+        job_module,
+        'settings',
+        settings.model_copy(update={'transcription_concurrency': 2}),
+    )
+    _add_jobs(db_session, 'slow', 'fast', 'next')
+    transcription = _StubTranscription(delays={'slow': 0.5, 'fast': 0.01})
+    service = TranscriptionJobService(transcription, async_session_factory)
+
+    assert await service.start_due() == 2
+    assert service.free_slots == 0
+    await service.wait_for_slot(asyncio.Event(), poll_interval=5)
+    assert await service.start_due() == 1
+
+    # "next" took the slot "fast" freed while "slow" was still running.
+    assert {lesson_id: job.status for lesson_id, job in _jobs(db_session).items()} == {
+        'slow': 'running',
+        'fast': 'done',
+        'next': 'running',
+    }
+    await service.drain()
+    assert {job.status for job in _jobs(db_session).values()} == {'done'}
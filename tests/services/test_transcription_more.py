@@ -18,15 +18,9 @@ def transcription_service():
 async def test_download_transcription_access_denied(transcription_service):
     """Simulate a 403 from S3 and ensure custom HTTPException is raised."""
 
-    # Build a fake Response object with status 403
-    request = httpx.Request('GET', 'http://s3/test')
-    response = httpx.Response(403, request=request)
-
-    def raise_error(*args, **kwargs):
-        raise httpx.HTTPStatusError('denied', request=request, response=response)
-
-    with patch('httpx.AsyncClient') as mock_client:
-        mock_client.return_value.__aenter__.return_value.get.side_effect = raise_error
+    transport = httpx.MockTransport(lambda request: httpx.Response(403))
+    async with httpx.AsyncClient(transport=transport) as client:
+        transcription_service.http_client = client
 
         with pytest.raises(HTTPException) as exc:
             await transcription_service.download_transcription('http://s3/test')
@@ -46,7 +40,6 @@ async def test_handle_webhook_generic_error(transcription_service):
             await transcription_service.handle_webhook(
                 webhook=type('W', (), {'transcriptionUrl': 'u'})(),  # minimal stub
                 lesson_id='L',
-                db=Session(create_engine('sqlite:///:memory:')),
             )
         assert exc.value.status_code == 500
         assert 'Failed to process transcription' in str(exc.value.detail)
@@ -85,8 +78,11 @@ async def test_get_lesson_summary(transcription_service, monkeypatch):
         db.commit()
 
         # Patch DAL helpers
+        async def fake_get_transcript(lesson_id, db):
+            return transcript_obj
+
         monkeypatch.setattr(
-            'app.dal.transcript.get_transcript', lambda lesson_id, db: transcript_obj
+            'app.services.transcription.get_transcript', fake_get_transcript
         )
         dummy_summary_output = SummaryOutput(
             key_points='kp',
@@ -99,15 +95,14 @@ async def test_get_lesson_summary(transcription_service, monkeypatch):
             def to_schema(self):
                 return dummy_summary_output
 
-        monkeypatch.setattr(
-            'app.dal.transcript.get_summary', lambda l, db: DummySummary()
-        )
-        monkeypatch.setattr('app.dal.transcript.get_feedback', lambda l, db: [])
-        monkeypatch.setattr('app.services.transcription.get_feedback', lambda l, db: [])
-        monkeypatch.setattr('app.dal.transcript.get_user_spaces', lambda l, db: [])
-        monkeypatch.setattr(
-            'app.services.transcription.get_user_spaces', lambda l, db: []
-        )
+        async def fake_get_summary(lesson_id, db):
+            return DummySummary()
+
+        async def fake_get_list(lesson_id, db):
+            return []
+
+        monkeypatch.setattr('app.services.transcription.get_feedback', fake_get_list)
+        monkeypatch.setattr('app.services.transcription.get_user_spaces', fake_get_list)
 
         # ChapterAgent
         async def fake_chapters(self, t):
@@ -118,11 +113,9 @@ async def test_get_lesson_summary(transcription_service, monkeypatch):
             fake_chapters,
         )
 
-        monkeypatch.setattr(
-            'app.services.transcription.get_summary', lambda l, db: DummySummary()
-        )
+        monkeypatch.setattr('app.services.transcription.get_summary', fake_get_summary)
 
-        summary = await transcription_service.get_lesson_summary(lesson_id, db)
+        summary = await transcription_service.get_lesson_summary(lesson_id)
 
         assert summary['key_points'] == 'kp'
         assert summary['chapters'][0].description == 'intro'
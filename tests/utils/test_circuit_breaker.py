@@ -0,0 +1,111 @@
+import pytest
+
+from app.utils import circuit_breaker as breaker_module
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.utils.metrics import Metrics
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(breaker_module.time, 'monotonic', clock.monotonic)
+    return clock
+
+
+def _breaker(**kwargs):
+    options = dict(
+        failure_rate_threshold=0.5,
+        window_size=4,
+        minimum_calls=4,
+        open_duration=10,
+        half_open_calls=2,
+        metrics=Metrics(),
+    )
+    options.update(kwargs)
+    return CircuitBreaker('test', **options)
+
+
+async def _ok():
+    return 'ok'
+
+
+async def _boom():
+    raise RuntimeError('boom')
+
+
+@pytest.mark.asyncio
+async def test_opens_on_failure_rate_and_fails_fast(clock):
+    breaker = _breaker()
+    calls = []
+
+    async def tracked():
+        calls.append(1)
+        return await _ok()
+
+    for fn in (_ok, _ok, _boom, _boom):
+        try:
+            await breaker.call(fn)
+        except RuntimeError:
+            pass
+
+    assert breaker.state == 'open'
+    with pytest.raises(CircuitOpenError) as exc_info:
+        await breaker.call(tracked)
+    assert calls == []
+    assert exc_info.value.retry_in == 10
+
+    snapshot = breaker.metrics.snapshot()
+    assert snapshot['gauges']['test.circuit.state'] == 2
+    assert snapshot['counters']['test.circuit.rejected'] == 1
+    assert snapshot['counters']['test.failures'] == 2
+
+
+@pytest.mark.asyncio
+async def test_half_open_probes_close_or_reopen(clock):
+    breaker = _breaker(minimum_calls=1, window_size=1)
+    with pytest.raises(RuntimeError):
+        await breaker.call(_boom)
+    assert breaker.state == 'open'
+
+    # A failed probe opens the breaker again for another open_duration.
+    clock.now = 10
+    with pytest.raises(RuntimeError):
+        await breaker.call(_boom)
+    assert breaker.state == 'open'
+    clock.now = 15
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(_ok)
+
+    clock.now = 20
+    assert await breaker.call(_ok) == 'ok'
+    assert breaker.state == 'half_open'
+    assert await breaker.call(_ok) == 'ok'
+    assert breaker.state == 'closed'
+    assert breaker.metrics.snapshot()['gauges']['test.circuit.state'] == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_calls_and_failed_results_count(clock):
+    breaker = _breaker(slow_call_duration=1, slow_call_rate_threshold=0.5)
+
+    async def slow():
+        clock.now += 2
+        return 'slow'
+
+    for fn in (_ok, _ok, slow, slow):
+        assert await breaker.call(fn) in ('ok', 'slow')
+    assert breaker.state == 'open'
+
+    breaker = _breaker()
+    for _ in range(4):
+        # Failed results are still handed back to the caller.
+        assert await breaker.call(_ok, is_failure=lambda result: True) == 'ok'
+    assert breaker.state == 'open'
@@ -0,0 +1,86 @@
+import types
+
+import httpx
+import pytest
+
+from app.services.transcription import TranscriptionService
+from app.utils.http import client_session, create_http_client, get_http_client
+
+
+def _settings(**overrides):
+    values = {
+        'http_max_connections': 50,
+        'http_max_keepalive_connections': 10,
+        'http_keepalive_expiry': 15.0,
+        'http2': False,
+        'http_per_host_max_connections': {},
+    }
+    values.update(overrides)
+    return types.SimpleNamespace(**values)
+
+
+@pytest.mark.asyncio
+async def test_create_http_client_applies_limits_and_host_caps():
+    client = create_http_client(
+        _settings(
+            http_per_host_max_connections={'https://api.thelessonspace.com': 5},
+        )
+    )
+    try:
+        pool = client._transport._pool
+        assert pool._max_connections == 50
+        assert pool._max_keepalive_connections == 10
+        assert pool._keepalive_expiry == 15.0
+
+        # The capped host is routed through its own, smaller pool.
+        transport = client._transport_for_url(
+            httpx.URL('https://api.thelessonspace.com/v2/spaces/launch/')
+        )
+        assert transport is not client._transport
+        assert transport._pool._max_connections == 5
+        assert transport._pool._max_keepalive_connections == 5
+    finally:
+        await client.aclose()
+
+
+def test_get_http_client_reads_app_state():
+    client = object()
+    request = types.SimpleNamespace(
+        app=types.SimpleNamespace(state=types.SimpleNamespace(http_client=client))
+    )
+    assert get_http_client(request) is client
+
+    request.app.state = types.SimpleNamespace()
+    assert get_http_client(request) is None
+
+
+@pytest.mark.asyncio
+async def test_client_session_does_not_close_shared_client():
+    shared = httpx.AsyncClient()
+    async with client_session(shared) as client:
+        assert client is shared
+    assert not shared.is_closed
+    await shared.aclose()
+
+    async with client_session() as client:
+        fresh = client
+    assert fresh.is_closed
+
+
+@pytest.mark.asyncio
+async def test_transcription_service_uses_injected_client():
+    calls = []
+
+    def handler(request):
+        calls.append(str(request.url))
+        return httpx.Response(200, json=[{'text': 'hi'}])
+
+    shared = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    service = TranscriptionService(http_client=shared)
+
+    result = await service.download_transcription('https://s3.example.com/t.json')
+
+    assert result.build(lesson_id='lesson-1').segments == [{'text': 'hi'}]
+    assert calls == ['https://s3.example.com/t.json']
+    assert not shared.is_closed
+    await shared.aclose()
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from app.utils.json_stream import JSONArrayStream
+
+
+def _parse(body: bytes, chunk_size: int) -> list:
+    stream = JSONArrayStream()
+    items = []
+    for start in range(0, len(body), chunk_size):
+        items.extend(stream.feed(body[start : start + chunk_size]))
+    return items + stream.close()
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 16, 4096])
+def test_items_survive_any_chunking(chunk_size):
+    data = [{'text': 'naïve café ' * i, 'user': {'id': i}} for i in range(20)] + [
+        12345,
+        1.5e10,
+        None,
+        True,
+        'text',
+        [1, [2]],
+    ]
+
+    assert _parse(json.dumps(data).encode(), chunk_size) == data
+
+
+def test_items_are_returned_as_soon_as_complete():
+    stream = JSONArrayStream()
+
+    assert stream.feed(b' [ {"a": 1}, {"b"') == [{'a': 1}]
+    assert stream.feed(b': 2} ]') == [{'b': 2}]
+    assert stream.close() == []
+
+
+def test_empty_array():
+    assert _parse(b' [ ] ', 1) == []
+
+
+@pytest.mark.parametrize(
+    'body', [b'', b'{"a": 1}', b'[1 2]', b'[1, 2', b'[1,]', b'[,1]', b'[1] 2']
+)
+def test_invalid_documents_raise(body):
+    with pytest.raises(ValueError):
+        _parse(body, 4)
@@ -0,0 +1,145 @@
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from app.utils import rate_limit
+from app.utils.rate_limit import (
+    LaunchScheduler,
+    LocalTokenBucket,
+    RedisTokenBucket,
+    retry_after_seconds,
+)
+
+
+class _RecordingBucket:
+    def __init__(self):
+        self.acquired = 0
+        self.pauses = []
+
+    async def acquire(self):
+        self.acquired += 1
+
+    async def pause(self, seconds):
+        self.pauses.append(seconds)
+
+    async def aclose(self):
+        pass
+
+
+def _response(status_code, headers=None):
+    return httpx.Response(
+        status_code,
+        headers=headers,
+        request=httpx.Request('POST', 'https://api.thelessonspace.com/v2'),
+    )
+
+
+def test_retry_after_seconds_parses_seconds_and_dates():
+    assert retry_after_seconds(_response(429, {'Retry-After': '3'})) == 3.0
+    assert retry_after_seconds(_response(429)) is None
+    assert retry_after_seconds(_response(429, {'Retry-After': 'soon'})) is None
+
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    parsed = retry_after_seconds(
+        _response(429, {'Retry-After': format_datetime(retry_at, usegmt=True)})
+    )
+    assert 25 < parsed <= 30
+
+
+@pytest.mark.asyncio
+async def test_local_token_bucket_allows_burst_then_meters():
+    bucket = LocalTokenBucket(rate=100, capacity=2)
+
+    started = time.monotonic()
+    for _ in range(4):
+        await bucket.acquire()
+    elapsed = time.monotonic() - started
+
+    # Two tokens are available immediately; the next two wait ~10ms each.
+    assert 0.015 <= elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_local_token_bucket_pause_delays_acquire():
+    bucket = LocalTokenBucket(rate=100, capacity=5)
+    await bucket.pause(0.05)
+
+    started = time.monotonic()
+    await bucket.acquire()
+    assert time.monotonic() - started >= 0.04
+
+
+@pytest.mark.asyncio
+async def test_scheduler_honours_retry_after(monkeypatch):
+    monkeypatch.setattr(rate_limit.random, 'uniform', lambda a, b: 0)
+    bucket = _RecordingBucket()
+    scheduler = LaunchScheduler(bucket, max_retries=3)
+    responses = [
+        _response(429, {'Retry-After': '2'}),
+        _response(503),
+        _response(200),
+    ]
+
+    async def send():
+        return responses.pop(0)
+
+    response = await scheduler.send(send)
+
+    assert response.status_code == 200
+    assert bucket.acquired == 3
+    # Retry-After is used when present; the jittered backoff otherwise.
+    assert bucket.pauses == [2.0, 0]
+
+
+@pytest.mark.asyncio
+async def test_scheduler_gives_up_after_max_retries():
+    bucket = _RecordingBucket()
+    scheduler = LaunchScheduler(bucket, max_retries=2, backoff=0.01)
+
+    async def send():
+        return _response(429, {'Retry-After': '0'})
+
+    response = await scheduler.send(send)
+
+    assert response.status_code == 429
+    assert bucket.acquired == 3
+    assert len(bucket.pauses) == 2
+
+
+@pytest.mark.asyncio
+async def test_redis_token_bucket_waits_for_script(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(rate_limit.asyncio, 'sleep', fake_sleep)
+
+    class FakeRedis:
+        def __init__(self):
+            self.waits = [250, 0]
+            self.calls = []
+            self.set_calls = []
+
+        def register_script(self, script):
+            async def run(keys, args):
+                self.calls.append((keys, args))
+                return self.waits.pop(0)
+
+            return run
+
+        async def set(self, key, value, px):
+            self.set_calls.append((key, px))
+
+    redis = FakeRedis()
+    bucket = RedisTokenBucket(redis, key='bucket', rate=5, capacity=10)
+
+    await bucket.acquire()
+    await bucket.pause(1.5)
+
+    assert sleeps == [0.25]
+    assert redis.calls == [(['bucket'], [5, 10])] * 2
+    assert redis.set_calls == [('bucket:paused', 1500)]
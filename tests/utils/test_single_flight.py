@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return 'result'
+
+    results = await asyncio.gather(*[flight.do('lesson-1', work) for _ in range(5)])
+
+    assert results == ['result'] * 5
+    assert calls == 1
+    assert not flight.in_flight('lesson-1')
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter_and_key_is_released():
+    flight = SingleFlight()
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise ValueError('boom')
+
+    results = await asyncio.gather(
+        flight.do('lesson-1', failing),
+        flight.do('lesson-1', failing),
+        return_exceptions=True,
+    )
+
+    assert calls == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+    async def succeeding():
+        return 'ok'
+
+    assert await flight.do('lesson-1', succeeding) == 'ok'
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_work():
+    flight = SingleFlight()
+    finished = asyncio.Event()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        finished.set()
+        return 'done'
+
+    leader = asyncio.ensure_future(flight.do('lesson-1', work))
+    follower = asyncio.ensure_future(flight.do('lesson-1', work))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == 'done'
+    assert finished.is_set()
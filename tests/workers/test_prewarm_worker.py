@@ -0,0 +1,81 @@
+import asyncio
+import os
+import signal
+
+import pytest
+
+from app.workers import prewarm as worker
+
+
+@pytest.mark.asyncio
+async def test_worker_polls_until_stopped(monkeypatch):
+    stop = asyncio.Event()
+    calls = []
+
+    async def fake_run_due(self, db):
+        calls.append(db)
+        if len(calls) == 2:
+            stop.set()
+        return 0
+
+    monkeypatch.setattr(worker.PrewarmService, 'run_due', fake_run_due)
+    monkeypatch.setattr(
+        worker,
+        'settings',
+        worker.settings.model_copy(update={'prewarm_poll_interval': 0.01}),
+    )
+
+    await asyncio.wait_for(worker.run(stop), timeout=1)
+
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_worker_survives_errors(monkeypatch):
+    stop = asyncio.Event()
+    calls = 0
+
+    async def failing_run_due(self, db):
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            stop.set()
+        raise RuntimeError('database unavailable')
+
+    monkeypatch.setattr(worker.PrewarmService, 'run_due', failing_run_due)
+    monkeypatch.setattr(
+        worker,
+        'settings',
+        worker.settings.model_copy(update={'prewarm_poll_interval': 0.01}),
+    )
+
+    await asyncio.wait_for(worker.run(stop), timeout=1)
+
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('signum', [signal.SIGTERM, signal.SIGINT])
+async def test_signal_stops_worker_after_the_batch(monkeypatch, signum):
+    started = asyncio.Event()
+    finished = []
+
+    async def fake_run_due(self, db):
+        started.set()
+        await asyncio.sleep(0.05)
+        finished.append(db)
+        return 0
+
+    monkeypatch.setattr(worker.PrewarmService, 'run_due', fake_run_due)
+    monkeypatch.setattr(
+        worker,
+        'settings',
+        worker.settings.model_copy(update={'prewarm_poll_interval': 10}),
+    )
+
+    main = asyncio.create_task(worker.main())
+    await asyncio.wait_for(started.wait(), timeout=1)
+    os.kill(os.getpid(), signum)
+    await asyncio.wait_for(main, timeout=1)
+
+    assert len(finished) == 1
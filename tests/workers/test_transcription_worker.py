@@ -0,0 +1,67 @@
+import asyncio
+import os
+import signal
+
+import pytest
+
+from app.workers import transcription as worker
+
+
+@pytest.mark.asyncio
+async def test_worker_polls_until_stopped_and_survives_errors(monkeypatch):
+    stop = asyncio.Event()
+    calls = 0
+
+    async def start_due(self):
+        nonlocal calls
+        calls += 1
+        if calls == 3:
+            stop.set()
+        if calls == 1:
+            raise RuntimeError('database unavailable')
+        return 0
+
+    monkeypatch.setattr(worker.TranscriptionJobService, 'start_due', start_due)
+    monkeypatch.setattr(
+        worker,
+        'settings',
+        worker.settings.model_copy(update={'transcription_poll_interval': 0.01}),
+    )
+
+    await asyncio.wait_for(worker.run(stop), timeout=1)
+
+    assert calls == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('signum', [signal.SIGTERM, signal.SIGINT])
+async def test_signal_stops_worker_after_running_jobs_finish(monkeypatch, signum):
+    started = asyncio.Event()
+    finished = []
+
+    async def job():
+        started.set()
+        await asyncio.sleep(0.05)
+        finished.append('lesson-1')
+
+    async def start_due(self):
+        if self.running or finished:
+            return 0
+        task = asyncio.create_task(job())
+        self.running.add(task)
+        task.add_done_callback(self._slot_done)
+        return 1
+
+    monkeypatch.setattr(worker.TranscriptionJobService, 'start_due', start_due)
+    monkeypatch.setattr(
+        worker,
+        'settings',
+        worker.settings.model_copy(update={'transcription_poll_interval': 0.01}),
+    )
+
+    main = asyncio.create_task(worker.main())
+    await asyncio.wait_for(started.wait(), timeout=1)
+    os.kill(os.getpid(), signum)
+    await asyncio.wait_for(main, timeout=1)
+
+    assert finished == ['lesson-1']